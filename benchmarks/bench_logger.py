@@ -0,0 +1,52 @@
+"""
+로그 호출 1회당 오버헤드 비교 (기존 동기 방식 vs 큐 기반 비동기 방식)
+
+python -m benchmarks.bench_logger
+"""
+import contextlib
+import datetime
+import os
+import tempfile
+import time
+from utils import logger
+
+N = 20000
+
+
+def legacy_log(path, message):
+    # 기존 utils.logger.log 구현 (매 호출마다 파일 열기/쓰기/닫기 + print)
+    time_ = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    log_line = f"[{time_}] {message}"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(log_line + "\n")
+    print(log_line)
+
+
+def measure(fn, n=N):
+    started = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - started) / n * 1e6  # 호출당 마이크로초
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        legacy_path = os.path.join(tmp, "legacy.log")
+        logger.LOG_FILE = os.path.join(tmp, "trade.log")
+        with contextlib.redirect_stdout(devnull):
+            legacy = measure(lambda i: legacy_log(legacy_path, f"[RSI 매수] RSI: {i:.2f}"))
+            queued = measure(lambda i: logger.log(f"[RSI 매수] RSI: {i:.2f}", logger.INFO))
+            skipped = measure(lambda i: logger.log(f"[RSI 매수] RSI: {i:.2f}", logger.DEBUG))
+            started = time.perf_counter()
+            logger.flush(timeout=60)
+            drain = time.perf_counter() - started
+
+    print(f"📊 로그 호출 {N:,}회 기준 호출당 오버헤드")
+    print(f"   └ 기존 동기 기록:        {legacy:8.2f} µs")
+    print(f"   └ 큐 기반 비동기 기록:   {queued:8.2f} µs")
+    print(f"   └ 레벨 미달(DEBUG) 생략: {skipped:8.2f} µs")
+    print(f"   └ 백그라운드 잔여 기록 완료까지: {drain * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+거래 프로세스 시작 비용 점검 (import 시간 예산, 무거운 패키지 로드 여부, 첫 판단까지 걸리는 시간,
+LazyUpbit의 백그라운드 pyupbit 로드 시간)
+python -X importtime으로 진입 모듈을 새 프로세스에서 import해 측정하고, 예산을 넘으면 종료 코드 1
+로그/거래 기록은 임시 폴더에 쓰므로 저장소의 logs/는 바뀌지 않음
+
+python -m benchmarks.import_budget                  # 기본 예산으로 점검
+python -m benchmarks.import_budget --budget-ms 200 --decision-ms 500
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ENTRY_MODULES = ("main", "service.async_runtime", "service.trader", "service.scanner")
+FORBIDDEN = ("pandas", "matplotlib", "pyupbit", "requests")  # 거래 루프 시작 전에 로드되면 안 되는 패키지
+IMPORT_BUDGET_MS = 300  # 진입 모듈 하나의 누적 import 시간
+DECISION_BUDGET_MS = 1000  # 프로세스 시작부터 첫 전략 판단까지
+PREWARM_BUDGET_MS = 2000  # LazyUpbit 생성부터 pyupbit 주문 클라이언트 준비까지 (첫 판단과 별도 스레드)
+
+# 모의 거래소로 Trader를 만들고 첫 틱 판단까지 실행 (네트워크 없이 시작 경로만 측정)
+FIRST_DECISION = """
+import os
+import sys
+import numpy as np
+from utils import logger, logger_trade
+logger.LOG_FILE = os.path.join(os.environ["BENCH_LOG_DIR"], "trade.log")
+logger.console = False
+logger_trade.TRADE_LOG_FILE = os.path.join(os.environ["BENCH_LOG_DIR"], "trade_history.csv")
+from service.market_data import KST_OFFSET
+from service.paper_exchange import PaperUpbit, ReplayMarketData, SimClock
+from service.trader import Trader
+from strategy.moving_average import default_strategies
+
+close = 10_000 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.002, 200)))
+rows = np.column_stack([1_700_000_000 + KST_OFFSET + 60 * np.arange(200), close, close, close, close, np.ones(200)])
+clock = SimClock(rows[24, 0] - KST_OFFSET)
+feed = ReplayMarketData(rows, "KRW-BENCH", "minute1", 25, clock)
+trader = Trader(default_strategies(), feed, "KRW-BENCH", upbit=PaperUpbit({"KRW": 1_000_000}, {"KRW-BENCH": feed}, clock),
+                clock=clock)
+trader.step(feed.get_prices())
+print("modules:", ",".join(sorted(m for m in sys.modules if "." not in m)))
+"""
+
+# 실제 거래(upbit 미지정)에서 Trader가 만드는 LazyUpbit의 백그라운드 import
+# 첫 판단 측정은 PaperUpbit을 쓰므로 포함되지 않고, 첫 주문 전에 끝나야 하는 별도 경로라 따로 측정
+PREWARM = """
+import time
+started = time.perf_counter()
+from service.upbit_api import LazyUpbit
+LazyUpbit("", "")._load()  # 백그라운드 import가 끝날 때까지 대기
+print("prewarm:", (time.perf_counter() - started) * 1000)
+"""
+
+
+def import_times(module):
+    """
+    :param module: 진입 모듈 이름
+    :return: (누적 import 시간(ms), 로드된 최상위 패키지 집합)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total) / 1000
+    packages = {name.split(".")[0] for name in cumulative}
+    return cumulative.get(module, 0.0), packages
+
+
+def first_decision():
+    """
+    :return: (새 프로세스 시작부터 첫 판단 종료까지 시간(ms), 로드된 최상위 패키지 집합)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, METRICS="0", BENCH_LOG_DIR=tmp)  # 로그/거래 기록은 임시 폴더로
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", FIRST_DECISION], capture_output=True, text=True, check=True,
+                                env=env)
+        elapsed = (time.perf_counter() - started) * 1000
+    line = next(line for line in result.stdout.splitlines() if line.startswith("modules:"))
+    return elapsed, set(line.split(":", 1)[1].strip().split(","))
+
+
+def prewarm():
+    """
+    :return: LazyUpbit 생성부터 pyupbit 클라이언트 준비까지 시간(ms) (새 프로세스, 네트워크 요청 없음)
+    """
+    result = subprocess.run([sys.executable, "-c", PREWARM], capture_output=True, text=True, check=True)
+    line = next(line for line in result.stdout.splitlines() if line.startswith("prewarm:"))
+    return float(line.split(":", 1)[1])
+
+
+def check(budget_ms=IMPORT_BUDGET_MS, decision_ms=DECISION_BUDGET_MS, prewarm_ms=PREWARM_BUDGET_MS):
+    """
+    :return: 예산 초과 항목 설명 리스트 (비어 있으면 통과)
+    """
+    failures = []
+    for module in ENTRY_MODULES:
+        total, packages = import_times(module)
+        heavy = sorted(packages.intersection(FORBIDDEN))
+        print(f"{module:<28} {total:>8.1f}ms  {'무거운 패키지: ' + ', '.join(heavy) if heavy else ''}")
+        if total > budget_ms:
+            failures.append(f"{module} import {total:.1f}ms > {budget_ms}ms")
+        if heavy:
+            failures.append(f"{module} import 시 {', '.join(heavy)} 로드")
+
+    elapsed, packages = first_decision()
+    heavy = sorted(packages.intersection(FORBIDDEN))
+    print(f"{'첫 판단 (프로세스 시작부터)':<28} {elapsed:>8.1f}ms  {'무거운 패키지: ' + ', '.join(heavy) if heavy else ''}")
+    if elapsed > decision_ms:
+        failures.append(f"첫 판단 {elapsed:.1f}ms > {decision_ms}ms")
+    if heavy:
+        failures.append(f"첫 판단까지 {', '.join(heavy)} 로드")
+
+    loaded = prewarm()
+    print(f"{'pyupbit 백그라운드 로드':<28} {loaded:>8.1f}ms")
+    if loaded > prewarm_ms:
+        failures.append(f"pyupbit 백그라운드 로드 {loaded:.1f}ms > {prewarm_ms}ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="import 시간 예산 점검")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS, help="진입 모듈별 누적 import 시간 예산")
+    parser.add_argument("--decision-ms", type=float, default=DECISION_BUDGET_MS, help="첫 판단까지 시간 예산")
+    parser.add_argument("--prewarm-ms", type=float, default=PREWARM_BUDGET_MS,
+                        help="LazyUpbit 백그라운드 pyupbit 로드 시간 예산")
+    args = parser.parse_args()
+
+    failures = check(args.budget_ms, args.decision_ms, args.prewarm_ms)
+    if failures:
+        print(f"\n🔴 예산 초과 {len(failures)}건")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n✅ 예산 이내")
+
+
+if __name__ == "__main__":
+    main()
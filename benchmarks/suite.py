@@ -0,0 +1,341 @@
+"""
+성능 벤치마크 모음 (지표 계산, 전략 판단, 시세 수집/파싱, 로그, Trader 루프)
+결과는 JSON으로 저장하고, 이전 결과와 비교해 기준 이상 느려진 항목을 표시
+
+python -m benchmarks.suite run                        # 전체 (25 / 10k / 1M 캔들, 1 / 200 티커)
+python -m benchmarks.suite run --quick                # 빠른 확인용 (1M 캔들, 200 티커 제외)
+python -m benchmarks.suite run --recorded data.npy    # 기록된 캔들로도 측정
+python -m benchmarks.suite compare base.json new.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from service import upbit_api
+from service.candle_store import CandleStore, rows_from_df
+from service.market_data import KST_OFFSET, MarketData
+from service.paper_exchange import PaperUpbit, ReplayMarketData, SimClock
+from service.signal_cache import SignalCache
+from service.strategy_executor import StrategyExecutor
+from service.trader import Trader
+from strategy.candle_series import CandleSeries
+from strategy.indicators import IndicatorEngine
+from strategy.moving_average import BollingerBandStrategy, MACDStrategy, RSIStrategy, default_strategies
+from utils import logger, logger_trade
+
+FULL = {"sizes": (25, 10_000), "signal_sizes": (10_000, 1_000_000), "tickers": (1, 200)}
+QUICK = {"sizes": (25, 10_000), "signal_sizes": (10_000,), "tickers": (1, 20)}
+DEFAULT_THRESHOLD = 0.2  # 20% 이상 느려지면 회귀로 표시
+
+
+def synthetic_ohlcv(n, seed=0, step=60):
+    """
+    재현 가능한 합성 캔들 (로그 정규 랜덤 워크)
+    :return: (N, 6) 캔들 배열 (KST 기준 epoch 초)
+    """
+    rng = np.random.default_rng(seed)
+    close = 10_000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.001, n)) * close
+    rows = np.empty((n, 6))
+    rows[:, 0] = 1_700_000_000 + KST_OFFSET + step * np.arange(n)
+    rows[:, 1] = open_
+    rows[:, 2] = np.maximum(open_, close) + spread
+    rows[:, 3] = np.minimum(open_, close) - spread
+    rows[:, 4] = close
+    rows[:, 5] = rng.exponential(1.0, n)
+    return rows
+
+
+def measure(fn, n, items=1):
+    """
+    fn을 n번 호출하며 호출마다 소요 시간 측정 + 한 번 더 호출해 메모리 사용량 측정
+    :param items: 호출 1회가 처리하는 항목 수 (캔들 수 등, 처리량 계산용)
+    :return: 결과 dict (마이크로초, 초당 처리량, 최대 할당 KB)
+    """
+    fn()  # 워밍업
+    samples = np.empty(n)
+    for i in range(n):
+        started = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - started
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    mean = samples.mean() / 1e9
+    return {
+        "n": n,
+        "p50_us": float(np.median(samples)) / 1000,
+        "p95_us": float(np.percentile(samples, 95)) / 1000,
+        "mean_us": mean * 1e6,
+        "items_per_s": items / mean if mean else float("inf"),
+        "peak_kb": peak / 1024,
+    }
+
+
+def alternating(prices):
+    """
+    같은 길이지만 현재가만 다른 두 리스트를 번갈아 반환 (지표 엔진 캐시를 피해 매 틱 계산하게 함)
+    """
+    lists = [list(prices), list(prices[:-1]) + [prices[-1] * 1.001]]
+    state = {"i": 0}
+
+    def next_prices():
+        state["i"] ^= 1
+        return lists[state["i"]]
+    return next_prices
+
+
+def bench_indicators(series, sizes, tag):
+    results = {}
+    for size in sizes:
+        closes = series[-size:, 4].tolist()
+        cases = {
+            "calculate_rsi": (RSIStrategy(), lambda s, p: s.calculate_rsi(p)),
+            "calculate_macd": (MACDStrategy(), lambda s, p: s.calculate_macd(p)),
+            "calculate_bands": (BollingerBandStrategy(), lambda s, p: s.calculate_bands(p)),
+        }
+        for name, (strategy, call) in cases.items():
+            next_prices = alternating(closes)
+            results[f"indicators/{name}/n={size}{tag}"] = measure(lambda: call(strategy, next_prices()),
+                                                                   n=2000 if size <= 100 else 50, items=size)
+    return results
+
+
+def bench_strategy_ticks(series, sizes, tag):
+    """
+    Trader와 같은 경로: 공유 엔진을 timestamps로 증분 갱신한 뒤 전략별 should_buy/should_sell
+    """
+    results = {}
+    for size in sizes:
+        closes = series[-size:, 4].tolist()
+        timestamps = series[-size:, 0].tolist()
+        for strategy in default_strategies():
+            engine = IndicatorEngine()
+            strategy.bind(engine)
+            next_prices = alternating(closes)
+
+            def tick():
+                prices = next_prices()
+                engine.sync(prices, timestamps)
+                strategy.should_buy(prices)
+                strategy.should_sell(prices)
+            results[f"strategy_tick/{strategy.__class__.__name__}/n={size}{tag}"] = measure(tick, n=2000)
+
+    # 같은 틱을 여러 소비자가 읽는 경우 (주문 판단 + 출력/대시보드): 캐시가 있으면 두 번째부터 계산 없음
+    window = CandleSeries(np.ascontiguousarray(series[-25:]))
+    executor = StrategyExecutor(default_strategies())
+    results[f"strategy_tick/evaluate_all/uncached{tag}"] = measure(lambda: executor.evaluate(window), n=2000)
+    cached = StrategyExecutor(default_strategies(), cache=SignalCache(), ticker="KRW-BENCH")
+    results[f"strategy_tick/evaluate_all/cached{tag}"] = measure(lambda: cached.evaluate(window), n=2000)
+    return results
+
+
+def bench_signals(series, sizes, tickers, tag):
+    results = {}
+    for size in sizes:
+        if size > len(series):
+            continue
+        closes = series[-size:, 4]
+        for strategy in default_strategies():
+            results[f"signals/{strategy.__class__.__name__}/n={size}{tag}"] = measure(
+                lambda: strategy.signals(closes), n=3 if size >= 1_000_000 else 20, items=size)
+    for count in tickers:
+        if count < 2:
+            continue
+        batch = np.stack([synthetic_ohlcv(25, seed=i) for i in range(count)])
+        for strategy in default_strategies():
+            results[f"signals_batch/{strategy.__class__.__name__}/tickers={count}"] = measure(
+                lambda: strategy.signals(batch), n=200, items=count)
+    return results
+
+
+def bench_ingest(tmp):
+    """
+    시세 응답 파싱과 get_prices (캔들 API 응답은 미리 만든 JSON 리스트로 대체)
+    """
+    results = {}
+    rows = synthetic_ohlcv(200)
+    index = pd.to_datetime(rows[:, 0], unit="s")
+    df = pd.DataFrame(rows[:, 1:], index=index, columns=["open", "high", "low", "close", "volume"])
+    df["value"] = df["close"] * df["volume"]
+    results["ingest/rows_from_df/n=200"] = measure(lambda: rows_from_df(df), n=2000, items=200)
+
+    times = rows[:, 0].astype("datetime64[s]").astype(str)
+    candles = [{"candle_date_time_kst": t, "opening_price": o, "high_price": h, "low_price": l,
+                "trade_price": c, "candle_acc_trade_volume": v}
+               for t, (_, o, h, l, c, v) in zip(times, rows.tolist())][::-1]  # 최신 캔들이 앞
+    results["ingest/rows_from_candles/n=200"] = measure(lambda: upbit_api.rows_from_candles(candles),
+                                                       n=2000, items=200)
+
+    def source(ticker, interval="minute1", count=200, limiter=None):
+        return upbit_api.rows_from_candles(candles[:count])
+
+    market_data = MarketData("KRW-BENCH", interval="minute1", store=CandleStore(os.path.join(tmp, "candles")),
+                             source=source)
+    market_data.get_prices()  # 저장소 채움
+    market_data._fetch_count = lambda: 2  # 이후 틱은 최근 2개 캔들만 받는 상황
+    results["ingest/get_prices/incremental"] = measure(market_data.get_prices, n=2000)
+    return results
+
+
+def bench_logging():
+    results = {}
+    results["log/info_queued"] = measure(lambda: logger.log("📊 [KRW-BENCH] 현재가: 1000.0, 전략 평가 시작"), n=20000)
+    results["log/debug_skipped"] = measure(lambda: logger.log("[RSI 매수] RSI: 30.00", logger.DEBUG), n=20000)
+    results["log/log_trade"] = measure(lambda: logger_trade.log_trade("buy", 1000.0, 1.0, "KRW-BENCH", "Bench"),
+                                       n=20000)
+    logger.flush(timeout=60)
+    return results
+
+
+def bench_loop(series, tickers):
+    """
+    모의 거래소 위에서 Trader.run 한 바퀴 (get_prices → step → sleep)를 티커 수만큼 실행
+    """
+    results = {}
+    for count in tickers:
+        clock = SimClock(series[24, 0] - KST_OFFSET)
+        feeds = {f"KRW-B{i:03d}": ReplayMarketData(synthetic_ohlcv(len(series), seed=i) if i else series,
+                                                   f"KRW-B{i:03d}", "minute1", clock=clock)
+                 for i in range(count)}
+        upbit = PaperUpbit({"KRW": 1_000_000}, feeds, clock)
+        traders = [Trader(default_strategies(), feed, ticker, upbit=upbit, clock=clock) for ticker, feed in feeds.items()]
+
+        def iteration():
+            for trader in traders:
+                trader.step(trader.market_data.get_prices())
+            clock.sleep(5)
+        results[f"loop/trader_iteration/tickers={count}"] = measure(iteration, n=max(20, 2000 // count),
+                                                                    items=count)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(quick=False, recorded=None, only=None):
+    """
+    벤치마크 실행
+    :param quick: True면 1M 캔들, 200 티커 제외
+    :param recorded: 기록된 캔들 파일 (.npy/.bin/.csv) - 지정하면 같은 항목을 이 데이터로도 측정
+    :param only: 이 문자열이 이름에 들어간 항목만 남김
+    :return: {"meta": ..., "results": {이름: 결과}}
+    """
+    config = QUICK if quick else FULL
+    synthetic = synthetic_ohlcv(max(config["signal_sizes"] + config["sizes"]))
+    series = {"": synthetic}
+    if recorded:
+        from service.backtest import load_ohlcv
+        series["/recorded"] = np.asarray(load_ohlcv(recorded))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # 벤치마크 중 로그/거래 기록은 임시 폴더로 (콘솔 출력 없음)
+        logger.LOG_FILE = os.path.join(tmp, "trade.log")
+        logger.console = False
+        logger_trade.TRADE_LOG_FILE = os.path.join(tmp, "trade_history.csv")
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for tag, data in series.items():
+                results.update(bench_indicators(data, config["sizes"], tag))
+                results.update(bench_strategy_ticks(data, config["sizes"], tag))
+                results.update(bench_signals(data, config["signal_sizes"], config["tickers"] if not tag else (), tag))
+            results.update(bench_ingest(tmp))
+            results.update(bench_logging())
+            results.update(bench_loop(synthetic[:2_000], config["tickers"]))
+
+    if only:
+        results = {name: r for name, r in results.items() if only in name}
+    return {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "quick": quick,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "results": results,
+    }
+
+
+def compare(base, new, threshold=DEFAULT_THRESHOLD, metric="p50_us"):
+    """
+    두 결과 비교
+    :return: [(이름, 기준값, 새 값, 비율)] 회귀 항목 리스트
+    """
+    regressions = []
+    print(f"{'항목':<60} {'기준':>12} {'현재':>12} {'변화':>8}")
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        before = base["results"][name][metric]
+        after = new["results"][name][metric]
+        ratio = after / before if before else float("inf")
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "🔴 회귀"
+            regressions.append((name, before, after, ratio))
+        elif ratio < 1 - threshold:
+            mark = "🟢 개선"
+        print(f"{name:<60} {before:>10.2f}µs {after:>10.2f}µs {ratio - 1:>+7.0%} {mark}")
+    missing = sorted(set(base["results"]) - set(new["results"]))
+    if missing:
+        print(f"⚠️ 새 결과에 없는 항목 {len(missing)}개: {', '.join(missing)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="성능 벤치마크")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="벤치마크 실행 후 JSON 저장")
+    run_parser.add_argument("--out", default=None, help="결과 파일 (기본: benchmarks/results/<시각>.json)")
+    run_parser.add_argument("--quick", action="store_true", help="1M 캔들/200 티커 제외")
+    run_parser.add_argument("--recorded", help="기록된 캔들 파일 (.npy/.bin/.csv)")
+    run_parser.add_argument("--only", help="이름에 이 문자열이 들어간 항목만 저장")
+    compare_parser = commands.add_parser("compare", help="두 결과 비교 (회귀가 있으면 종료 코드 1)")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="회귀 기준 (0.2 = 20%%)")
+    compare_parser.add_argument("--metric", default="p50_us", choices=["p50_us", "p95_us", "mean_us"])
+    args = parser.parse_args()
+
+    if args.command == "run":
+        result = run(args.quick, args.recorded, args.only)
+        out = args.out or os.path.join("benchmarks", "results",
+                                       datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        for name, r in result["results"].items():
+            print(f"{name:<60} p50 {r['p50_us']:>12.2f}µs  p95 {r['p95_us']:>12.2f}µs  {r['peak_kb']:>10.1f}KB")
+        print(f"\n💾 결과 저장: {out}")
+    else:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        regressions = compare(base, new, args.threshold, args.metric)
+        if regressions:
+            print(f"\n🔴 {len(regressions)}개 항목이 {args.threshold:.0%} 이상 느려졌습니다.")
+            sys.exit(1)
+        print("\n✅ 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,3 +19,29 @@ USE_STRATEGY = "MovingAverageRSIStrategy"
 #USE_STRATEGY = "MACDStrategy"
 #USE_STRATEGY = "BollingerBandStrategy"
 
+# 멀티 티커 런타임(service/async_runtime.py)에서 거래할 마켓 목록
+TICKERS = [TICKER]
+
+# 자금 배분/위험 관리 (service/portfolio.py) - 비율은 모두 총 평가 금액(KRW + 보유 포지션) 대비
+POSITION_SIZE = 0.2  # 새 포지션 하나에 쓰는 금액
+MAX_EXPOSURE = 0.9  # 전체 포지션 비중 상한
+STRATEGY_ALLOCATION = {}  # 전략별 비중 상한 (예: {"RSIStrategy": 0.3}), 없는 전략은 전략 수로 균등 분배
+TICKER_ALLOCATION = 0.5  # 마켓별 비중 상한 (dict로 마켓마다 지정 가능, 예: {"KRW-BTC": 0.6})
+STOP_LOSS = 0.05  # 진입가 대비 이만큼 하락하면 손절 (None이면 사용 안 함)
+TAKE_PROFIT = 0.10  # 진입가 대비 이만큼 상승하면 익절 (None이면 사용 안 함)
+
+# 거래 상태 저장 위치 (포지션, 진행 중인 주문, 지표 상태 - 재시작 시 복원)
+STATE_DIR = "data/state"
+
+# 로그 설정
+LOG_FILE = "logs/trade.log"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # DEBUG로 바꾸면 전략별 지표 값까지 기록
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "json"이면 JSON Lines로 기록
+LOG_MAX_BYTES = 10 * 1024 * 1024  # 이 크기를 넘으면 trade.log 회전
+LOG_BACKUP_COUNT = 5  # 보관할 회전 파일 수 (trade.log.1 ~ .5)
+LOG_ROTATE_SECONDS = None  # 시간 기준 회전 주기(초), 예: 86400 (하루)
+
+# 성능 지표 (utils/metrics.py)
+METRICS_ENABLED = os.getenv("METRICS", "").lower() in ("1", "true", "on")  # 켜면 단계별 소요 시간/호출 수 수집
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))  # http://127.0.0.1:9100/metrics (0이면 끔)
+METRICS_FILE = os.getenv("METRICS_FILE") or None  # 지정하면 주기적으로 이 파일에 저장
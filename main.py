@@ -1,6 +1,6 @@
 import time
-from utils.logger import log
-from utils.logger_trade import log_trade
+from utils import metrics
+from utils.logger import DEBUG, WARNING, ERROR, log
 from strategy.moving_average import (
     MovingAverageRSIStrategy,
     RSIStrategy,
@@ -28,59 +28,63 @@ def test_all_strategies_loop(interval=300):  # 기본: 1분 간격
         try:
             prices = market_data.get_prices()
             if not prices or len(prices) < 20:
-                log("⚠️ 가격 데이터 부족 - 건너뜀")
+                log("⚠️ 가격 데이터 부족 - 건너뜀", WARNING)
                 time.sleep(5)
                 continue
 
             current_price = prices[-1]
+            trader.orders.poll()  # 진행 중인 주문 체결 조회
+            trader.settle()  # 체결이 확인된 주문만 포지션/거래 기록에 반영
+            trader.signals.indicators(TICKER, prices, trader.engine, market_data.timestamps)  # 틱당 지표 1회 계산
             log(f"📊 현재가: {current_price}, 전략 평가 시작")
+            decisions = trader.executor.evaluate(prices)  # 전략별 1회 평가 (SignalCache에 남아 다른 소비자도 재사용)
+            signal_at = time.time()
 
-            for strategy in strategies:
+            for strategy, decision in zip(strategies, decisions):
                 strategy_name = strategy.__class__.__name__
-                log(f"🔍 평가 중 전략: {strategy_name}")
-                buy = strategy.should_buy(prices)
-                sell = strategy.should_sell(prices)
+                log(f"🔍 평가 중 전략: {strategy_name}", DEBUG)
+                buy = decision["buy"]
+                sell = decision["sell"]
 
                 print(f"📌 전략: {strategy_name}")
                 print(f"   └ 매수 조건: {'✅' if buy else '❌'}")
                 print(f"   └ 매도 조건: {'✅' if sell else '❌'}")
                 print("-------------------------------------------------")
 
+                if trader.pending:
+                    log(f"⏳ 주문 체결 대기 중 ({trader.pending.state}) - [{strategy_name}] 주문 생략")
+                    continue
+
+                # 주문은 Trader 경로로 전송 (OrderManager가 체결을 추적하고 settle()이 실제 체결만 반영)
                 try:
                     if buy:
                         log(f"🟢 [{strategy_name}] 매수 조건 충족")
                         krw = trader.get_balance("KRW")
-                        log(f"💰 현재 KRW 잔액: {krw:,.0f}원")
+                        amount = trader.portfolio.size(TICKER, strategy_name, krw)  # 배분 한도 안에서만 매수
+                        log(f"💰 현재 KRW 잔액: {krw:,.0f}원, 배분 금액: {amount:,.0f}원")
 
-                        if krw > 5000:  # 최소 매수 금액 5000 KRW 이상
+                        if amount:
                             log("📦 매수 주문 시도 중...")
-                            res = trader.upbit.buy_market_order(TICKER, krw * 0.9995)
-                            log(f"✅ 매수 주문 응답: {res}")
-                            log_trade("buy", current_price, krw)
+                            trader.submit("bid", amount, strategy_name, signal_at)
                         else:
-                            log("🚫 매수 금액 부족. 주문 생략됨.")
+                            log("🚫 배분 한도 또는 잔액 부족. 주문 생략됨.")
 
                     elif sell:
                         log(f"🔴 [{strategy_name}] 매도 조건 충족")
-                        coin = TICKER.split("-")[1]
-                        amount = trader.get_balance(coin)
-                        log(f"📦 현재 {coin} 잔액: {amount:.8f}")
-
-                        if amount > 0.0001:  # 최소 매도 수량 0.0001 이상
+                        if trader.portfolio.position(TICKER, strategy_name):
                             log("📤 매도 주문 시도 중...")
-                            res = trader.upbit.sell_market_order(TICKER, amount)
-                            log(f"✅ 매도 주문 응답: {res}")
-                            log_trade("sell", current_price, amount)
+                            trader.sell(strategy_name, signal_at)  # 그 전략의 포지션만 (잔고가 적으면 잔고만큼)
                         else:
-                            log("🚫 코인 잔량 부족. 매도 생략됨.")
+                            log(f"🚫 [{strategy_name}] 보유 포지션 없음. 매도 생략됨.")
                 except Exception as e:
-                    log(f"❗ 전략 평가 오류: {e}")
+                    log(f"❗ 전략 평가 오류: {e}", ERROR)
 
         except Exception as e:
-            log(f"❗ 루프 오류 발생: {str(e)}")
+            log(f"❗ 루프 오류 발생: {str(e)}", ERROR)
 
         print(f"\n⏳ {interval}초 후 다시 확인...\n")
         time.sleep(interval)
 
 if __name__ == "__main__":
+    metrics.start()  # METRICS=1 일 때만 /metrics 엔드포인트 시작
     test_all_strategies_loop()
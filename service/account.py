@@ -0,0 +1,87 @@
+import threading
+import time
+from utils import metrics
+from utils.logger import WARNING, log
+
+
+class AccountState:
+    """
+    잔고 스냅샷 캐시
+    - get_balances() 결과를 ttl 초 동안 재사용
+    - 주문 응답으로 알 수 있는 변화(매수 시 묶인 KRW, 매도 수량)는 로컬에서 바로 반영
+    - 체결 결과가 불확실해지면(주문 직후 등) 다음 조회 때 거래소와 다시 동기화
+    여러 Trader(티커)가 같은 계좌를 쓰면 하나의 인스턴스를 공유
+    """
+
+    def __init__(self, upbit, ttl=30, clock=None):
+        """
+        :param upbit: pyupbit.Upbit 호환 클라이언트
+        :param ttl: 스냅샷 유효 시간(초)
+        :param clock: monotonic() 제공자 (모의 거래/재생 시 가상 시계)
+        """
+        self.upbit = upbit
+        self.ttl = ttl
+        self.clock = clock or time
+        self.balances = {}
+        self.synced_at = None
+        self.stale = True  # 거래소와 다시 맞춰야 하는 상태
+        self.lock = threading.Lock()
+
+    def sync(self):
+        """
+        거래소 잔고로 스냅샷 갱신
+        """
+        metrics.inc("api_calls_total", api="get_balances")
+        with metrics.timer("stage_seconds", stage="balance_sync"):
+            balances = self.upbit.get_balances()
+        if not isinstance(balances, list):
+            raise Exception(f"잔고 응답 오류: {balances}")
+        self.balances = {b['currency']: float(b['balance']) for b in balances}
+        self.synced_at = self.clock.monotonic()
+        self.stale = False
+
+    def get(self, currency):
+        """
+        통화별 잔고 (필요할 때만 거래소 조회)
+        :param currency: 통화 코드 (예: "KRW", "BTC")
+        """
+        with self.lock:
+            if self.stale or self.clock.monotonic() - self.synced_at > self.ttl:
+                self.sync()
+            return self.balances.get(currency, 0)
+
+    def invalidate(self):
+        """다음 조회 때 거래소와 다시 동기화"""
+        self.stale = True
+
+    def apply_order(self, ticker, res):
+        """
+        주문 응답을 스냅샷에 반영
+        체결 완료(state == "done") 응답이면 로컬 계산만으로 갱신하고,
+        시장가 주문처럼 응답 시점에 체결이 끝나지 않았으면 다음 조회 때 동기화하도록 표시
+        :param ticker: 마켓 (예: "KRW-BTC")
+        :param res: buy_market_order / sell_market_order 응답
+        """
+        quote, coin = ticker.split("-")
+        with self.lock:
+            try:
+                done = res.get('state') == 'done'
+                fee = float(res.get('paid_fee') or 0)
+                funds = sum(float(t['funds']) for t in res.get('trades') or [])
+                if res.get('side') == 'bid':
+                    # 체결 전에는 주문 금액 + 예약 수수료가 묶임
+                    spent = funds + fee if done else float(res['price']) + float(res.get('reserved_fee') or 0)
+                    self.balances[quote] = self.balances.get(quote, 0) - spent
+                    self.balances[coin] = self.balances.get(coin, 0) + float(res.get('executed_volume') or 0)
+                elif res.get('side') == 'ask':
+                    # 체결 완료면 실제 체결 수량만큼, 아니면 주문 수량 전체가 묶임
+                    sold = float(res['executed_volume']) if done else float(res['volume'])
+                    self.balances[coin] = self.balances.get(coin, 0) - sold
+                    self.balances[quote] = self.balances.get(quote, 0) + funds - fee
+                else:
+                    done = False
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                log(f"⚠️ 주문 응답 반영 실패 - 잔고 재동기화 예정: {e}", WARNING)
+                done = False
+            if not done:
+                self.stale = True
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.config import ACCESS_KEY, SECRET_KEY, TICKERS
+from service.account import AccountState
+from service.candle_store import CandleStore
+from service.order_manager import OrderManager
+from service.portfolio import Portfolio
+from service.rate_limiter import EXCHANGE_RATE, QUOTATION_RATE, RateLimiter, RateLimitedClient
+from service.signal_cache import SignalCache
+from service.state_store import StateStore
+from service.timeframes import build_market_data
+from service.trader import Trader
+from service.upbit_api import LazyUpbit
+from strategy.moving_average import default_strategies
+from utils import metrics
+from utils.logger import DEBUG, WARNING, ERROR, log
+
+async def run_ticker(trader, executor, interval=5, offset=0.0):
+    """
+    티커 하나의 거래 루프
+    블로킹 API 호출은 스레드 풀에서 실행하므로 다른 티커를 막지 않음
+    :param trader: 티커 전용 Trader
+    :param executor: 공유 스레드 풀
+    :param interval: 틱 간격(초)
+    :param offset: 시작 지연(초) - 티커별 요청 시점을 분산
+    """
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(offset)
+    while True:
+        started = time.monotonic()
+        try:
+            prices = await loop.run_in_executor(executor, trader.market_data.get_prices, 1)
+            if not prices or len(prices) < 20:
+                log(f"⚠️ [{trader.ticker}] 가격 데이터 부족 - 건너뜀", WARNING)
+            else:
+                await loop.run_in_executor(executor, trader.step, prices)
+                log(f"⏱️ [{trader.ticker}] 틱 처리 {(time.monotonic() - started) * 1000:.0f}ms", DEBUG)
+        except Exception as e:
+            log(f"❗ [{trader.ticker}] 루프 오류 발생: {str(e)}", ERROR)
+
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def build_traders(tickers, interval="minute5"):
+    """
+    티커별 Trader 생성
+    - 시세 조회와 주문/잔고 조회는 각각 하나의 요청 제한기를 공유
+    - 티커마다 전략 세트를 따로 유지하고, 전략별 포지션과 자금 배분은 하나의 Portfolio가 모든 티커를 함께 관리
+    - 주문 체결 추적은 하나의 OrderManager 스레드가 모든 티커를 함께 처리
+    - 포지션/주문/지표 상태는 하나의 StateStore에 남겨 재시작 시 복원
+    - 틱별 전략 판단은 하나의 SignalCache에 남겨 리포트/대시보드가 다시 계산하지 않고 읽음
+    - 전략이 다른 간격(timeframes)을 쓰면 가장 작은 간격만 요청하고 나머지는 만들어 씀 (MultiTimeframeData)
+    :param tickers: 거래할 마켓 목록
+    :param interval: 캔들 간격
+    :return: Trader 리스트
+    """
+    store = CandleStore()
+    quotation_limiter = RateLimiter(QUOTATION_RATE, name="quotation")
+    upbit = RateLimitedClient(LazyUpbit(ACCESS_KEY, SECRET_KEY), RateLimiter(EXCHANGE_RATE, name="exchange"))
+    account = AccountState(upbit)  # 모든 티커가 같은 계좌 잔고 스냅샷을 공유
+    orders = OrderManager(upbit, account)
+    orders.start()
+    state = StateStore()
+    portfolio = Portfolio(account, [s.__class__.__name__ for s in default_strategies()])
+    signals = SignalCache()
+    traders = []
+    for ticker in tickers:
+        strategies = default_strategies()
+        market_data = build_market_data(ticker, strategies, interval, store=store, limiter=quotation_limiter)
+        traders.append(Trader(strategies, market_data, ticker=ticker, upbit=upbit, account=account,
+                              orders=orders, state=state, portfolio=portfolio, signals=signals))
+    return traders
+
+
+async def run(tickers=TICKERS, interval=5, workers=None):
+    """
+    여러 티커를 한 프로세스에서 동시에 거래
+    :param tickers: 거래할 마켓 목록
+    :param interval: 티커별 틱 간격(초)
+    :param workers: 블로킹 호출용 스레드 수 (기본: 티커 수, 최대 32)
+    """
+    traders = build_traders(tickers)
+    log(f"🚀 멀티 티커 런타임 시작: {len(traders)}개 마켓")
+
+    with ThreadPoolExecutor(max_workers=workers or min(len(traders), 32)) as executor:
+        await asyncio.gather(*(
+            run_ticker(trader, executor, interval, offset=interval * i / len(traders))
+            for i, trader in enumerate(traders)
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="멀티 티커 자동매매")
+    parser.add_argument("--tickers", nargs="+", default=TICKERS, help="거래할 마켓 (예: KRW-BTC KRW-ETH)")
+    parser.add_argument("--interval", type=float, default=5, help="티커별 틱 간격(초)")
+    parser.add_argument("--workers", type=int, default=None, help="블로킹 호출용 스레드 수")
+    parser.add_argument("--scan", type=int, default=None, metavar="TOP",
+                        help="마켓 스캐너로 매수 신호 상위 TOP개 마켓을 골라 거래 (--tickers 무시)")
+    args = parser.parse_args()
+
+    metrics.start()
+    tickers = args.tickers
+    if args.scan:
+        from service.scanner import MarketScanner
+        tickers = MarketScanner().select(args.scan)
+        log(f"🔎 스캐너 선택 마켓: {', '.join(tickers) or '없음'}")
+        if not tickers:
+            return
+    asyncio.run(run(tickers, args.interval, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+from service import upbit_api
+from service.candle_store import INTERVAL_SECONDS
+from service.history_store import HISTORY_DIR, HistoryStore
+from service.market_data import KST_OFFSET
+from service.rate_limiter import QUOTATION_RATE, RateLimiter
+from utils import metrics
+from utils.logger import WARNING, ERROR, log
+
+PAGES_PER_JOB = 20  # 작업 하나가 이어서 받는 페이지 수 (작업이 끝날 때마다 저장 - 중단 시 잃는 범위)
+MAX_ATTEMPTS = 5  # 페이지별 최대 시도 횟수
+RETRY_BASE = 0.5  # 재시도 대기(초) - 시도마다 2배
+
+
+def parse_time(text):
+    """
+    "2024-01-01" 또는 "2024-01-01 09:00" (KST) -> KST 기준 epoch 초
+    """
+    return int(np.datetime64(text.strip().replace(" ", "T"), "s").astype("int64"))
+
+
+def format_utc(timestamp):
+    """
+    KST 기준 epoch 초 -> 캔들 API의 to 파라미터 (UTC, "YYYY-MM-DD HH:MM:SS")
+    """
+    return str(np.datetime64(int(timestamp - KST_OFFSET), "s")).replace("T", " ")
+
+
+class Backfiller:
+    """
+    여러 티커/간격의 과거 캔들을 기간 단위로 받아 HistoryStore에 저장
+    - 받을 구간을 PAGES_PER_JOB 페이지(200개 x 간격) 단위 작업으로 나눠 스레드 풀에서 동시에 요청
+    - 모든 요청은 하나의 요청 제한기를 거침 (실시간 런타임과 같은 초당 요청 수)
+    - 이미 받은 구간(coverage.json)은 건너뛰므로 중단 후 다시 실행하면 이어서 받고, 겹치는 기간을 요청해도 중복 요청/저장 없음
+    - 진행 중인 캔들은 저장하지 않음 (끝 시각은 마지막 확정 캔들까지로 제한)
+    """
+
+    def __init__(self, store=None, limiter=None, workers=4, base_url=upbit_api.API_URL):
+        """
+        :param store: HistoryStore
+        :param limiter: 시세 API 요청 제한기 (다른 런타임과 공유 가능)
+        :param workers: 동시 요청 스레드 수
+        :param base_url: 업비트 API 주소 (테스트용 로컬 서버로 바꿀 수 있음)
+        """
+        self.store = store or HistoryStore()
+        self.limiter = limiter or RateLimiter(QUOTATION_RATE, name="quotation")
+        self.workers = workers
+        self.base_url = base_url
+        self.requests = 0  # 보낸 캔들 API 요청 수
+        self.lock = threading.Lock()
+
+    def jobs(self, ticker, interval, start, end):
+        """
+        [start, end) 중 받지 않은 구간을 작업 단위로 나눔
+        :return: [(ticker, interval, 작업 시작, 작업 끝), ...] (최근 구간부터)
+        """
+        step = INTERVAL_SECONDS[interval]
+        end = min(end, time.time() + KST_OFFSET - step)  # 확정 캔들만
+        span = PAGES_PER_JOB * upbit_api.CANDLE_LIMIT * step
+        jobs = []
+        for lo, hi in reversed(self.store.missing(ticker, interval, start, end)):
+            while hi > lo:
+                jobs.append((ticker, interval, max(lo, hi - span), hi))
+                hi -= span
+        return jobs
+
+    def _page(self, ticker, interval, lo, hi):
+        """
+        [lo, hi) 구간 캔들 한 페이지 (최대 200개 x 간격)
+        :return: (N, 6) 배열
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.limiter.wait()
+            metrics.inc("api_calls_total", api="get_candles")
+            with self.lock:
+                self.requests += 1
+            try:
+                candles = upbit_api.get_candle_page(ticker, interval, upbit_api.CANDLE_LIMIT, format_utc(hi),
+                                                    self.base_url)
+                rows = upbit_api.rows_from_candles(candles)
+                return rows[rows[:, 0] >= lo]
+            except Exception as e:  # 요청 수 초과(429), 네트워크 오류 - 잠시 후 다시
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                delay = RETRY_BASE * 2 ** (attempt - 1)
+                log(f"⚠️ [{ticker} {interval}] 캔들 요청 실패 - {delay:.1f}초 후 재시도 ({attempt}/{MAX_ATTEMPTS}): {e}",
+                    WARNING)
+                metrics.inc("retries_total", stage="backfill")
+                time.sleep(delay)
+
+    def _run_job(self, ticker, interval, start, end):
+        """
+        작업 구간을 최근 페이지부터 차례로 받아 한 번에 저장
+        :return: 저장한 캔들 수
+        """
+        page_span = upbit_api.CANDLE_LIMIT * INTERVAL_SECONDS[interval]
+        pages = []
+        hi = end
+        while hi > start:
+            lo = max(start, hi - page_span)
+            pages.append(self._page(ticker, interval, lo, hi))
+            hi = lo
+        rows = np.concatenate(pages[::-1])
+        self.store.write(ticker, interval, rows, start, end)
+        return len(rows)
+
+    def run(self, tickers, intervals, start, end):
+        """
+        :param tickers: 마켓 목록
+        :param intervals: 캔들 간격 목록 (INTERVAL_SECONDS 키)
+        :param start: 시작 시각 (KST 기준 epoch 초)
+        :param end: 끝 시각 (미포함)
+        :return: 결과 요약 dict
+        """
+        started = time.monotonic()
+        jobs = [job for ticker in tickers for interval in intervals
+                for job in self.jobs(ticker, interval, start, end)]
+        log(f"📥 과거 캔들 백필 시작: {len(tickers)}개 마켓 x {len(intervals)}개 간격, 작업 {len(jobs)}개")
+        candles = failed = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._run_job, *job): job for job in jobs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                ticker, interval, lo, hi = futures[future]
+                try:
+                    candles += future.result()
+                except Exception as e:
+                    failed += 1
+                    log(f"❌ [{ticker} {interval}] {format_utc(lo)} ~ {format_utc(hi)} (UTC) 백필 실패: {e}", ERROR)
+                if done % 50 == 0:
+                    log(f"📥 백필 진행: 작업 {done}/{len(jobs)}, 캔들 {candles}개")
+        elapsed = time.monotonic() - started
+        log(f"✅ 백필 완료: 캔들 {candles}개, 요청 {self.requests}회, 실패 작업 {failed}개 ({elapsed:.1f}초)")
+        return {"작업 수": len(jobs), "실패 작업 수": failed, "캔들 수": candles, "요청 수": self.requests,
+                "실행 시간 (초)": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="과거 캔들 백필 (중단 후 다시 실행하면 이어서 받음)")
+    parser.add_argument("--tickers", nargs="+", required=True, help="마켓 (예: KRW-BTC KRW-ETH)")
+    parser.add_argument("--intervals", nargs="+", default=["minute5"], choices=list(INTERVAL_SECONDS),
+                        help="캔들 간격")
+    parser.add_argument("--start", required=True, help="시작 시각 KST (예: 2024-01-01 또는 \"2024-01-01 09:00\")")
+    parser.add_argument("--end", default=None, help="끝 시각 KST (미포함, 기본: 현재)")
+    parser.add_argument("--workers", type=int, default=4, help="동시 요청 스레드 수")
+    parser.add_argument("--root", default=HISTORY_DIR, help="저장 위치")
+    parser.add_argument("--base-url", default=upbit_api.API_URL, help="업비트 API 주소")
+    args = parser.parse_args()
+
+    end = parse_time(args.end) if args.end else time.time() + KST_OFFSET
+    backfiller = Backfiller(HistoryStore(args.root), workers=args.workers, base_url=args.base_url)
+    result = backfiller.run(args.tickers, args.intervals, parse_time(args.start), end)
+    for key, value in result.items():
+        print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+    if result["실패 작업 수"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import os
+import time
+import numpy as np
+from service.candle_store import rows_from_df
+from service.history_store import load_history
+from strategy.candle_series import CLOSE, OHLCV_COLUMNS, CandleSeries
+from strategy.moving_average import (
+    MovingAverageRSIStrategy,
+    RSIStrategy,
+    VolatilityBreakoutStrategy,
+    MACDStrategy,
+    BollingerBandStrategy
+)
+
+# Trader.run과 동일한 주문 조건
+FEE_FACTOR = 0.9995  # 잔액의 99.95% 매수
+MIN_ORDER_KRW = 5000  # 최소 매수 금액
+MIN_SELL_VOLUME = 0.0001  # 최소 매도 수량
+TRADE_FEE = 0.0005  # 업비트 거래 수수료
+
+
+def load_ohlcv(path):
+    """
+    과거 OHLCV 데이터 로드
+    - .npy: (N, 6) 배열 (OHLCV_COLUMNS 순서)
+    - .bin: CandleStore 파일
+    - .csv: pyupbit.get_ohlcv(...).to_csv() 형식 (첫 컬럼이 시각)
+    - 디렉터리: HistoryStore의 티커/간격 디렉터리 (예: data/history/KRW-BTC/minute1, service/backfill.py로 받음)
+    :param path: 파일 경로
+    :return: (N, 6) float64 배열
+    """
+    if os.path.isdir(path):
+        return load_history(path)
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    if path.endswith(".bin"):
+        return np.memmap(path, dtype=np.float64, mode="r").reshape(-1, len(OHLCV_COLUMNS))
+    import pandas as pd  # CSV 로드에만 필요
+    return rows_from_df(pd.read_csv(path, index_col=0, parse_dates=True))
+
+
+def simulate(prices, buy, sell, initial_krw=1_000_000):
+    """
+    신호 배열로 전략 하나의 체결 시뮬레이션 (자금 배분/손절/익절 없이 전략 신호만 비교 - Portfolio 규칙은 모의 거래로 확인)
+    - 포지션이 없을 때 매수 신호가 나오면 잔액의 99.95%로 시장가 매수
+    - 포지션이 있을 때 매도 신호가 나오면 전량 시장가 매도
+    :param prices: 종가 배열 (신호가 나온 캔들의 종가로 체결)
+    :param buy: 매수 신호 bool 배열
+    :param sell: 매도 신호 bool 배열
+    :param initial_krw: 시작 KRW 잔액
+    :return: 결과 dict (trades, equity, 요약 통계)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    buy_idx = np.flatnonzero(buy)
+    sell_idx = np.flatnonzero(sell)
+
+    krw = float(initial_krw)
+    trades = []
+    i = 0
+    while krw > MIN_ORDER_KRW:
+        # 다음 매수 시점 -> 그 이후 첫 매도 시점 (이벤트 사이만 건너뜀)
+        b = np.searchsorted(buy_idx, i)
+        if b == len(buy_idx):
+            break
+        entry = buy_idx[b]
+        order_amount = krw * FEE_FACTOR
+        volume = order_amount / prices[entry]
+        s = np.searchsorted(sell_idx, entry + 1)
+        if s == len(sell_idx) or volume <= MIN_SELL_VOLUME:
+            trades.append((entry, -1, prices[entry], np.nan, volume, order_amount, np.nan))
+            krw -= order_amount * (1 + TRADE_FEE)
+            break
+        exit_ = sell_idx[s]
+        proceeds = volume * prices[exit_] * (1 - TRADE_FEE)
+        profit = proceeds - order_amount * (1 + TRADE_FEE)
+        trades.append((entry, exit_, prices[entry], prices[exit_], volume, order_amount, profit))
+        krw += profit
+        i = exit_ + 1
+
+    trades = np.array(trades, dtype=[
+        ("buy_index", np.int64), ("sell_index", np.int64), ("buy_price", np.float64),
+        ("sell_price", np.float64), ("volume", np.float64), ("amount", np.float64),
+        ("profit", np.float64),
+    ])
+    return _summarize(prices, trades, initial_krw)
+
+
+def _summarize(prices, trades, initial_krw):
+    closed = trades[trades["sell_index"] >= 0]
+    # 캔들별 평가 금액 = 현금 + 보유 수량 x 종가 (체결 시점 변화량을 누적)
+    cash = np.zeros(len(prices))
+    volume = np.zeros(len(prices))
+    np.add.at(cash, trades["buy_index"], -trades["amount"] * (1 + TRADE_FEE))
+    np.add.at(volume, trades["buy_index"], trades["volume"])
+    np.add.at(cash, closed["sell_index"], closed["profit"] + closed["amount"] * (1 + TRADE_FEE))
+    np.add.at(volume, closed["sell_index"], -closed["volume"])
+    equity = initial_krw + np.cumsum(cash) + np.cumsum(volume) * prices
+    peak = np.maximum.accumulate(equity)
+    drawdown = (equity - peak) / peak * 100
+
+    wins = int((closed["profit"] > 0).sum())
+    return {
+        "trades": trades,
+        "equity": equity,
+        "총 거래 횟수": len(closed),
+        "총 수익 (KRW)": float(closed["profit"].sum()),
+        "평균 수익 (KRW)": float(closed["profit"].mean()) if len(closed) else 0.0,
+        "승률 (%)": wins / len(closed) * 100 if len(closed) else 0.0,
+        "최대 낙폭 (%)": float(drawdown.min()),
+        "최종 평가 금액 (KRW)": float(equity[-1]),
+    }
+
+
+def backtest(strategies, ohlcv, initial_krw=1_000_000):
+    """
+    여러 전략을 같은 과거 데이터로 백테스트 (전략별 독립 계좌)
+    :param strategies: 전략 리스트
+    :param ohlcv: (N, 6) OHLCV 배열
+    :param initial_krw: 전략별 시작 KRW 잔액
+    :return: 전략 이름별 결과 dict
+    """
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    prices = np.ascontiguousarray(ohlcv[:, CLOSE])
+    results = {}
+    for strategy in strategies:
+        buy, sell = strategy.signals(ohlcv)  # 고가/저가를 쓰는 전략(변동성 돌파)도 같은 배열로 계산
+        results[strategy.__class__.__name__] = simulate(prices, buy, sell, initial_krw)
+    return results
+
+
+def parity_check(strategy, prices, samples=200, seed=0):
+    """
+    벡터화 신호와 스칼라 should_buy/should_sell 결과를 캔들별로 비교
+    :param strategy: 전략 인스턴스
+    :param prices: (N, 6) OHLCV 배열 (스칼라 쪽에는 CandleSeries로 전달) 또는 종가 배열
+    :param samples: 비교할 캔들 수 (None이면 전체, O(N^2) 주의)
+    :return: 불일치 캔들 인덱스 리스트
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    buy, sell = strategy.signals(prices)
+    indices = np.arange(len(prices))
+    if samples is not None and samples < len(prices):
+        indices = np.sort(np.random.default_rng(seed).choice(indices, samples, replace=False))
+
+    history = CandleSeries(prices) if prices.ndim == 2 else prices.tolist()
+    mismatches = []
+    for i in indices:
+        window = history[:i + 1]
+        scalar = (bool(strategy.should_buy(window)), bool(strategy.should_sell(window)))
+        if scalar != (bool(buy[i]), bool(sell[i])):
+            mismatches.append(int(i))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전략 백테스트")
+    parser.add_argument("path", help="OHLCV 파일 (.npy, .bin 또는 .csv)")
+    parser.add_argument("--krw", type=float, default=1_000_000, help="시작 KRW 잔액")
+    parser.add_argument("--parity", type=int, default=0, help="스칼라 구현과 비교할 캔들 수")
+    args = parser.parse_args()
+
+    strategies = [
+        MovingAverageRSIStrategy(),
+        RSIStrategy(),
+        VolatilityBreakoutStrategy(),
+        MACDStrategy(),
+        BollingerBandStrategy()
+    ]
+    ohlcv = load_ohlcv(args.path)
+    started = time.perf_counter()
+    results = backtest(strategies, ohlcv, args.krw)
+    elapsed = time.perf_counter() - started
+    print(f"📊 캔들 {len(ohlcv):,}개 x 전략 {len(strategies)}개 백테스트 완료 ({elapsed:.2f}초)")
+
+    for name, result in results.items():
+        print(f"\n📌 전략: {name}")
+        for k, v in result.items():
+            if k in ("trades", "equity"):
+                continue
+            print(f"   └ {k}: {v:,.2f}" if isinstance(v, float) else f"   └ {k}: {v}")
+        if args.parity:
+            strategy = next(s for s in strategies if s.__class__.__name__ == name)
+            mismatches = parity_check(strategy, ohlcv, args.parity)
+            print(f"   └ 스칼라 비교 불일치: {len(mismatches)}건 / {args.parity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import numpy as np
+from strategy.candle_series import OHLCV_COLUMNS, CandleSeries
+
+
+class CandleBuffer:
+    """
+    고정 용량 OHLCV 링 버퍼
+    - 각 행을 두 곳(i, i + capacity)에 기록해 최근 capacity 개가 항상 연속 메모리에 있음
+    - append / replace_last는 O(1), window()는 복사 없는 읽기 전용 CandleSeries
+    - window() 결과는 버퍼를 공유하므로 다음 append 전까지만 유효 (보관하려면 복사)
+    """
+
+    def __init__(self, capacity):
+        """
+        :param capacity: 보관할 최대 캔들 수
+        """
+        self.capacity = capacity
+        self.buffer = np.zeros((2 * capacity, len(OHLCV_COLUMNS)))
+        self.pos = 0  # 다음에 기록할 위치
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        self.pos = 0
+        self.size = 0
+
+    def append(self, row):
+        """
+        캔들 한 개 추가 (가득 차면 가장 오래된 캔들을 덮어씀)
+        :param row: (timestamp, open, high, low, close, volume)
+        """
+        self.buffer[self.pos] = row
+        self.buffer[self.pos + self.capacity] = row
+        self.pos = (self.pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, rows):
+        """
+        :param rows: (N, 6) 배열 (시각 오름차순)
+        """
+        rows = rows[-self.capacity:]
+        index = (self.pos + np.arange(len(rows))) % self.capacity
+        self.buffer[index] = rows
+        self.buffer[index + self.capacity] = rows
+        self.pos = (self.pos + len(rows)) % self.capacity
+        self.size = min(self.size + len(rows), self.capacity)
+
+    def replace_last(self, row):
+        """
+        마지막 캔들 교체 (진행 중인 캔들 갱신)
+        """
+        i = (self.pos - 1) % self.capacity
+        self.buffer[i] = row
+        self.buffer[i + self.capacity] = row
+
+    def rewind(self, timestamp):
+        """
+        timestamp 이후(포함) 캔들 제거 (다시 계산한 캔들로 교체하기 전)
+        """
+        timestamps = self.window().timestamp
+        drop = len(timestamps) - int(np.searchsorted(timestamps, timestamp))
+        self.pos = (self.pos - drop) % self.capacity
+        self.size -= drop
+
+    def last(self):
+        """마지막 캔들 행 (읽기 전용 view, 비어 있으면 None)"""
+        if not self.size:
+            return None
+        row = self.buffer[(self.pos - 1) % self.capacity + self.capacity]
+        row.flags.writeable = False
+        return row
+
+    def window(self, count=None):
+        """
+        최근 count 개 캔들
+        :param count: 캔들 수 (None이면 전체)
+        :return: CandleSeries (읽기 전용 view)
+        """
+        count = self.size if count is None else min(count, self.size)
+        end = self.pos + self.capacity
+        data = self.buffer[end - count:end]
+        data.flags.writeable = False
+        return CandleSeries(data)
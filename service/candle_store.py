@@ -0,0 +1,95 @@
+import os
+import numpy as np
+from strategy.candle_series import OHLCV_COLUMNS  # 캔들 한 행 컬럼 (timestamp, open, high, low, close, volume)
+
+ROW_BYTES = len(OHLCV_COLUMNS) * 8
+
+# 업비트 캔들 간격(초)
+INTERVAL_SECONDS = {
+    "minute1": 60,
+    "minute3": 180,
+    "minute5": 300,
+    "minute10": 600,
+    "minute15": 900,
+    "minute30": 1800,
+    "minute60": 3600,
+    "minute240": 14400,
+    "day": 86400,
+    "week": 604800,
+}
+
+
+def rows_from_df(df):
+    """
+    pyupbit.get_ohlcv DataFrame을 (N, 6) 배열로 변환
+    시각은 KST 기준 naive datetime을 그대로 epoch 초로 저장
+    """
+    rows = np.empty((len(df), len(OHLCV_COLUMNS)))
+    rows[:, 0] = df.index.values.astype("datetime64[s]").astype("int64")
+    for i, column in enumerate(OHLCV_COLUMNS[1:], start=1):
+        rows[:, i] = df[column].to_numpy(dtype=np.float64)
+    return rows
+
+
+class CandleStore:
+    """
+    티커/간격별 확정 캔들을 디스크에 쌓아두는 append-only 저장소
+    - 파일은 float64 (N, 6) 행을 이어붙인 바이너리 (data/candles/KRW-BTC_minute5.bin)
+    - 읽기는 memmap으로 하므로 window()는 복사 없는 view
+    """
+
+    def __init__(self, root="data/candles"):
+        self.root = root
+        self._cache = {}  # (ticker, interval) -> memmap 배열
+
+    def path(self, ticker, interval):
+        return os.path.join(self.root, f"{ticker}_{interval}.bin")
+
+    def load(self, ticker, interval):
+        """
+        저장된 캔들 전체 (N, 6) 배열 (읽기 전용 memmap, 없으면 빈 배열)
+        """
+        key = (ticker, interval)
+        if key in self._cache:
+            return self._cache[key]
+        path = self.path(ticker, interval)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size % ROW_BYTES:
+            # 기록 도중 중단되어 잘린 마지막 행 제거
+            size -= size % ROW_BYTES
+            with open(path, "r+b") as f:
+                f.truncate(size)
+        if size == 0:
+            data = np.empty((0, len(OHLCV_COLUMNS)))
+        else:
+            data = np.memmap(path, dtype=np.float64, mode="r").reshape(-1, len(OHLCV_COLUMNS))
+        self._cache[key] = data
+        return data
+
+    def last_timestamp(self, ticker, interval):
+        data = self.load(ticker, interval)
+        return float(data[-1, 0]) if len(data) else None
+
+    def append(self, ticker, interval, rows):
+        """
+        마지막 저장 시각 이후의 캔들만 추가
+        :param rows: (N, 6) 배열 (시각 오름차순)
+        :return: 추가된 캔들 수
+        """
+        rows = np.asarray(rows, dtype=np.float64)
+        last = self.last_timestamp(ticker, interval)
+        if last is not None:
+            rows = rows[rows[:, 0] > last]
+        if not len(rows):
+            return 0
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path(ticker, interval), "ab") as f:
+            f.write(np.ascontiguousarray(rows).tobytes())
+        self._cache.pop((ticker, interval), None)
+        return len(rows)
+
+    def window(self, ticker, interval, count):
+        """
+        최근 count 개 캔들 (복사 없는 view)
+        """
+        return self.load(ticker, interval)[-count:]
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import numpy as np
+from strategy.candle_series import OHLCV_COLUMNS
+
+HISTORY_DIR = "data/history"
+
+
+def chunk_keys(timestamps, interval):
+    """
+    캔들 시각별 청크 이름 (분봉은 월 단위 "2024-01", 일/주봉은 연 단위 "2024")
+    :param timestamps: KST 기준 epoch 초 배열
+    """
+    unit = "datetime64[M]" if interval.startswith("minute") else "datetime64[Y]"
+    return np.asarray(timestamps).astype("int64").astype("datetime64[s]").astype(unit).astype(str)
+
+
+def load_history(path, start=None, end=None):
+    """
+    HistoryStore의 티커/간격 디렉터리에서 캔들 로드
+    청크 파일은 memmap으로 열고 [start, end) 구간만 읽어 이어붙임
+    :param path: 디렉터리 (예: data/history/KRW-BTC/minute1)
+    :param start: 시작 시각 (KST 기준 epoch 초, None이면 처음부터)
+    :param end: 끝 시각 (미포함, None이면 끝까지)
+    :return: (N, 6) float64 배열 (시각 오름차순)
+    """
+    parts = []
+    names = sorted(name for name in os.listdir(path) if name.endswith(".npy")) if os.path.isdir(path) else []
+    for name in names:
+        columns = np.load(os.path.join(path, name), mmap_mode="r")  # (6, N) - 행 하나가 컬럼 하나
+        timestamps = columns[0]
+        if not len(timestamps):
+            continue
+        if (start is not None and timestamps[-1] < start) or (end is not None and timestamps[0] >= end):
+            continue
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end))
+        parts.append(columns[:, lo:hi].T)
+    if not parts:
+        return np.empty((0, len(OHLCV_COLUMNS)))
+    return np.concatenate(parts)
+
+
+class HistoryStore:
+    """
+    백필한 과거 캔들 저장소 (백테스트/최적화용, 실시간 CandleStore와 별개)
+    - data/history/<티커>/<간격>/<청크>.npy: (6, N) float64 배열이라 컬럼마다 연속 메모리 (memmap으로 컬럼 단위 읽기)
+    - 청크는 분봉은 월, 일/주봉은 연 단위 - 새 캔들은 해당 청크만 다시 써서 병합 (같은 시각은 새 값으로 교체)
+    - coverage.json: 받은 시각 구간 목록 [[시작, 끝), ...] - 중단 후 다시 실행하면 빠진 구간만 받음
+    청크를 먼저 쓰고 구간을 나중에 기록하므로, 중간에 멈춰도 구간 기록이 없는 캔들은 다시 받아 중복 없이 병합됨
+    """
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+
+    def path(self, ticker, interval):
+        return os.path.join(self.root, ticker, interval)
+
+    def coverage(self, ticker, interval):
+        """
+        :return: 받은 구간 리스트 [[시작, 끝), ...] (시각 오름차순, 겹치지 않음)
+        """
+        path = os.path.join(self.path(ticker, interval), "coverage.json")
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def missing(self, ticker, interval, start, end):
+        """
+        [start, end) 중 아직 받지 않은 구간
+        :return: [[시작, 끝), ...]
+        """
+        gaps = []
+        cursor = start
+        for lo, hi in self.coverage(ticker, interval):
+            if hi <= cursor:
+                continue
+            if lo >= end:
+                break
+            if lo > cursor:
+                gaps.append([cursor, lo])
+            cursor = max(cursor, hi)
+        if cursor < end:
+            gaps.append([cursor, end])
+        return gaps
+
+    def write(self, ticker, interval, rows, start, end):
+        """
+        캔들을 청크에 병합하고 [start, end) 구간을 받은 것으로 기록
+        :param rows: (N, 6) 배열 - [start, end) 구간의 캔들 전체 (비어 있으면 거래 없는 구간)
+        """
+        rows = np.asarray(rows, dtype=np.float64)
+        directory = self.path(ticker, interval)
+        with self.lock:
+            os.makedirs(directory, exist_ok=True)
+            keys = chunk_keys(rows[:, 0], interval)
+            for key in np.unique(keys):
+                self._merge(os.path.join(directory, f"{key}.npy"), rows[keys == key])
+            self._cover(ticker, interval, start, end)
+
+    def _merge(self, path, rows):
+        if os.path.exists(path):
+            rows = np.concatenate([rows, np.load(path).T])  # 새 캔들이 앞 - 같은 시각이면 새 값 유지
+        _, index = np.unique(rows[:, 0], return_index=True)  # 시각 오름차순 정렬 + 중복 제거
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(rows[index].T))
+        os.replace(path + ".tmp", path)
+
+    def _cover(self, ticker, interval, start, end):
+        merged = []
+        for lo, hi in sorted(self.coverage(ticker, interval) + [[start, end]]):
+            if merged and lo <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], hi)
+            else:
+                merged.append([lo, hi])
+        path = os.path.join(self.path(ticker, interval), "coverage.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(merged, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, ticker, interval, start=None, end=None):
+        """
+        :return: (N, 6) float64 배열 (load_history 참고)
+        """
+        return load_history(self.path(ticker, interval), start, end)
@@ -1,36 +1,121 @@
-import pyupbit
+import numpy as np
 import time
-from utils.logger import log
+from service import upbit_api
+from service.candle_buffer import CandleBuffer
+from service.candle_store import CandleStore, INTERVAL_SECONDS
+from strategy.candle_series import CLOSE, HIGH, LOW
+from utils import metrics
+from utils.logger import DEBUG, WARNING, ERROR, log
+
+KST_OFFSET = 9 * 3600  # 업비트 캔들 시각은 KST 기준
+MAX_SYNC_COUNT = 2000  # 한 번에 따라잡을 최대 캔들 수
 
 class MarketData:
-    def __init__(self, ticker):
+    def __init__(self, ticker, interval="minute5", count=25, store=None, limiter=None, source=None, clock=None):
         self.ticker = ticker
+        self.interval = interval
+        self.count = count  # 전략에 넘겨줄 캔들 수
+        self.store = store or CandleStore()  # 확정 캔들 로컬 저장소
+        self.limiter = limiter  # 여러 티커가 공유하는 시세 API 요청 제한기
+        self.source = source or upbit_api.get_candles  # 캔들 조회 함수 (get_candles와 같은 인자, 기록/재생 시 교체)
+        self.clock = clock or time  # time()/sleep() 제공자 (재생 시 가상 시계)
+        self.series = CandleBuffer(count)  # 최근 count 개 캔들 (마지막은 진행 중인 캔들)
+        self.timestamps = []  # 마지막으로 받은 캔들들의 시각 (지표 엔진 증분 갱신용)
+        self.forming = None  # 진행 중인 캔들 (timestamp, open, high, low, close, volume)
+
+    def _fetch_count(self):
+        """
+        마지막 저장 캔들 이후로 필요한 캔들 수 (진행 중인 캔들 포함)
+        """
+        last = self.store.last_timestamp(self.ticker, self.interval)
+        step = INTERVAL_SECONDS.get(self.interval)
+        if last is None or step is None:
+            return self.count
+        missing = int((self.clock.time() + KST_OFFSET - last) // step) + 1
+        return max(2, min(missing, MAX_SYNC_COUNT))
+
+    def apply(self, rows):
+        """
+        새로 받은 캔들을 반영하고 전략에 넘길 캔들 시계열을 만듦
+        - 이전에 진행 중이던 캔들이 응답에 있으면 확정 값으로 교체하고, 그 뒤 캔들만 링 버퍼에 추가 (틱당 O(1))
+        - 처음이거나 이어지지 않으면 저장소에서 다시 채움
+        :param rows: (N, 6) 캔들 배열 (마지막 행은 진행 중인 캔들)
+        :return: 최근 count 개 CandleSeries (마지막 캔들이 현재가)
+        """
+        # 마지막 캔들은 진행 중이므로 저장하지 않음
+        self.store.append(self.ticker, self.interval, rows[:-1])
+        self.forming = rows[-1].copy()
+        last = self.series.last()
+        start = int(np.searchsorted(rows[:, 0], last[0])) if last is not None else len(rows)
+        if start < len(rows) and rows[start, 0] == last[0]:
+            self.series.replace_last(rows[start])
+            self.series.extend(rows[start + 1:])
+        else:
+            candles = self.store.window(self.ticker, self.interval, self.count - 1)
+            candles = candles[:np.searchsorted(candles[:, 0], rows[-1, 0])]  # 복사 없는 view
+            self.series.clear()
+            self.series.extend(candles)
+            self.series.append(self.forming)
+        series = self.series.window()
+        self.timestamps = series.timestamp
+        return series
+
+    def tick(self, price):
+        """
+        현재가로 진행 중인 캔들의 종가/고가/저가 갱신 (현재가 API 일괄 조회용)
+        """
+        forming = self.forming
+        forming[CLOSE] = price
+        forming[HIGH] = max(forming[HIGH], price)
+        forming[LOW] = min(forming[LOW], price)
+        self.series.replace_last(forming)
+
+    def candles(self):
+        """
+        마지막으로 반영한 최근 count 개 캔들
+        :return: (N, 6) 캔들 배열 (마지막 행은 진행 중인 캔들, 읽기 전용 view)
+        """
+        return self.series.window().data
+
+    def fetch(self):
+        """
+        시세 데이터 한 번 요청 (재시도 없음, 저장소에 없는 캔들만)
+        :return: (응답 캔들 배열, 캔들 시계열) - 응답이 비었으면 캔들 시계열은 None
+        """
+        metrics.inc("api_calls_total", api="get_ohlcv")
+        with metrics.timer("stage_seconds", stage="fetch"):
+            # 따라잡기 요청은 여러 페이지일 수 있으므로 요청 제한기는 페이지마다 거침
+            rows = self.source(self.ticker, interval=self.interval, count=self._fetch_count(), limiter=self.limiter)
+        if len(rows) == 0:
+            return rows, None
+        return rows, self.apply(rows)
 
     def get_prices(self, retry=5):
         """
         5분 간격으로 최근 시세 데이터를 가져옴
+        확정 캔들은 로컬 저장소에 쌓아두고, 마지막 저장 이후의 캔들만 요청
         최대 retry 횟수까지 시도하며, 실패하면 예외를 발생시킴
         """
         for attempt in range(1, retry + 1):
             try:
                 # 시세 데이터 요청
-                df = pyupbit.get_ohlcv(self.ticker, interval="minute5", count=25)
-                
+                rows, prices = self.fetch()
+
                 # 응답 처리
-                if df is None:
-                    log(f"⚠️ OHLVC 응답 없음 (None) - 시도 {attempt}/{retry}")
-                elif 'close' not in df:
-                    log(f"⚠️ 'close' 컬럼 없음 - 시도 {attempt}/{retry}")
-                elif len(df) < 20:
-                    log(f"⚠️ 캔들 개수 부족 ({len(df)}개) - 시도 {attempt}/{retry}")
+                if prices is None:
+                    log(f"⚠️ OHLVC 응답 없음 (캔들 0개) - 시도 {attempt}/{retry}", WARNING)
+                elif len(prices) < 20:
+                    log(f"⚠️ 캔들 개수 부족 ({len(prices)}개) - 시도 {attempt}/{retry}", WARNING)
                 else:
-                    log(f"✅ 시세 데이터 정상 수신 (캔들 {len(df)}개)")
-                    return df['close'].tolist()  # 종가 데이터 반환
+                    log(f"✅ 시세 데이터 정상 수신 (캔들 {len(prices)}개, 신규 {len(rows)}개)", DEBUG)
+                    return prices  # 캔들 시계열 반환 (종가 리스트처럼 사용 가능)
 
             except Exception as e:
-                log(f"❌ 데이터 가져오기 실패 - {str(e)} - 시도 {attempt}/{retry}")
-                
-            time.sleep(3)  # 잠시 대기 후 재시도
+                log(f"❌ 데이터 가져오기 실패 - {str(e)} - 시도 {attempt}/{retry}", ERROR)
+
+            metrics.inc("retries_total", stage="fetch")
+            metrics.inc("retry_sleep_seconds_total", 3, stage="fetch")
+            self.clock.sleep(3)  # 잠시 대기 후 재시도
 
         # 모든 시도 후에도 데이터를 못 가져오면 예외 발생
         raise Exception("시세 데이터를 충분히 가져오지 못했습니다.")
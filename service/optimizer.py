@@ -0,0 +1,229 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from service.backtest import load_ohlcv, simulate
+from strategy.candle_series import CLOSE, OHLCV_COLUMNS
+from strategy.moving_average import (
+    MovingAverageRSIStrategy,
+    RSIStrategy,
+    VolatilityBreakoutStrategy,
+    MACDStrategy,
+    BollingerBandStrategy
+)
+
+STRATEGIES = {
+    "MovingAverageRSIStrategy": MovingAverageRSIStrategy,
+    "RSIStrategy": RSIStrategy,
+    "VolatilityBreakoutStrategy": VolatilityBreakoutStrategy,
+    "MACDStrategy": MACDStrategy,
+    "BollingerBandStrategy": BollingerBandStrategy,
+}
+
+# 전략 생성자 인자별 탐색 범위
+PARAM_GRID = {
+    "MovingAverageRSIStrategy": {
+        "rsi_period": [7, 14, 21],
+        "rsi_buy_threshold": [25, 30, 35, 40],
+        "rsi_sell_threshold": [60, 65, 70, 75],
+    },
+    "RSIStrategy": {
+        "period": [7, 14, 21],
+        "buy_threshold": [20, 25, 30, 35],
+        "sell_threshold": [65, 70, 75, 80],
+    },
+    "VolatilityBreakoutStrategy": {
+        "k": [0.3, 0.4, 0.5, 0.6, 0.7, 0.8],
+    },
+    "MACDStrategy": {
+        "short": [6, 9, 12],
+        "long": [20, 26, 34],
+        "signal": [5, 9, 12],
+    },
+    "BollingerBandStrategy": {
+        "window": [10, 15, 20, 30],
+        "num_std_dev": [1.5, 2, 2.5, 3],
+    },
+}
+
+# 워커 프로세스 전역 상태 (공유 메모리에 붙은 OHLCV 배열)
+_shm = None
+_ohlcv = None
+
+
+def _init_worker(shm_name, length):
+    global _shm, _ohlcv
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _ohlcv = np.ndarray((length, len(OHLCV_COLUMNS)), dtype=np.float64, buffer=_shm.buf)
+
+
+def _evaluate(name, params, initial_krw):
+    strategy = STRATEGIES[name](**params)
+    buy, sell = strategy.signals(_ohlcv)
+    result = simulate(_ohlcv[:, CLOSE], buy, sell, initial_krw)
+    return {k: v for k, v in result.items() if k not in ("trades", "equity")}
+
+
+def combinations(names, mode="grid", samples=50, seed=0):
+    """
+    탐색할 (전략 이름, 파라미터) 조합 생성
+    :param names: 전략 이름 리스트
+    :param mode: "grid" (전체 조합) 또는 "random" (전략별 samples 개 무작위 추출)
+    :return: (전략 이름, 파라미터 dict) 리스트
+    """
+    rng = random.Random(seed)
+    combos = []
+    for name in names:
+        grid = PARAM_GRID[name]
+        keys = list(grid)
+        space = [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+        if name == "MACDStrategy":
+            space = [p for p in space if p["short"] < p["long"]]
+        if mode == "random" and samples < len(space):
+            space = rng.sample(space, samples)
+        combos.extend((name, params) for params in space)
+    return combos
+
+
+def combo_key(name, params):
+    return f"{name}:{json.dumps(params, sort_keys=True)}"
+
+
+def checkpoint_header(ohlcv, initial_krw):
+    """
+    체크포인트 첫 줄에 기록할 실행 조건 (데이터셋 식별 정보 + 시작 잔액)
+    같은 조합 키라도 데이터나 잔액이 다르면 결과가 달라지므로 이어서 실행할 때 비교
+    :param ohlcv: (N, 6) float64 OHLCV 배열
+    :param initial_krw: 시작 KRW 잔액
+    :return: 헤더 dict
+    """
+    return {
+        "rows": len(ohlcv),
+        "first_ts": float(ohlcv[0, 0]) if len(ohlcv) else None,
+        "last_ts": float(ohlcv[-1, 0]) if len(ohlcv) else None,
+        "blake2b": hashlib.blake2b(np.ascontiguousarray(ohlcv), digest_size=16).hexdigest(),
+        "initial_krw": float(initial_krw),
+    }
+
+
+def load_checkpoint(path, header=None):
+    """
+    체크포인트 파일(JSON Lines)에서 완료된 결과 로드
+    :param header: checkpoint_header() 결과 - 파일 헤더와 다르면 이어서 실행하지 않음
+    :return: (파일 헤더, 조합 키별 결과 dict) - 파일이 없거나 비어 있으면 (None, {})
+    :raises ValueError: 다른 데이터셋/시작 잔액으로 만든 체크포인트 (또는 헤더 없는 체크포인트)
+    """
+    saved = None
+    done = {}
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 중단 시 잘린 마지막 줄
+                if "header" in record:
+                    saved = record["header"]
+                else:
+                    done[record["key"]] = record
+    if header is not None and (saved or done) and saved != header:
+        raise ValueError(f"체크포인트 {path}의 실행 조건이 다릅니다 "
+                         f"(저장: {saved}, 현재: {header}) - 다른 체크포인트 파일을 지정하세요")
+    return saved, done
+
+
+def optimize(ohlcv, combos, initial_krw=1_000_000, workers=None, checkpoint=None):
+    """
+    파라미터 조합을 프로세스 풀로 병렬 백테스트
+    OHLCV 배열은 공유 메모리로 한 번만 전달하고, 완료된 조합은 체크포인트에 즉시 기록
+    :param ohlcv: (N, 6) OHLCV 배열
+    :param combos: combinations() 결과
+    :param initial_krw: 시작 KRW 잔액
+    :param workers: 프로세스 수 (기본: CPU 코어 수)
+    :param checkpoint: 체크포인트 파일 경로 (같은 데이터셋/시작 잔액으로 만든 파일이면 이어서 실행)
+    :return: 결과 레코드 리스트
+    :raises ValueError: 체크포인트의 데이터셋/시작 잔액이 현재 실행과 다름
+    """
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    header = checkpoint_header(ohlcv, initial_krw) if checkpoint else None
+    saved, done = load_checkpoint(checkpoint, header)
+    pending = [(name, params) for name, params in combos if combo_key(name, params) not in done]
+    results = [done[combo_key(name, params)] for name, params in combos if combo_key(name, params) in done]
+    if not pending:
+        return results
+
+    shm = shared_memory.SharedMemory(create=True, size=ohlcv.nbytes)
+    out = open(checkpoint, "a", encoding="utf-8") if checkpoint else None
+    try:
+        if out and saved is None:
+            out.write(json.dumps({"header": header}) + "\n")
+            out.flush()
+        np.ndarray(ohlcv.shape, dtype=np.float64, buffer=shm.buf)[:] = ohlcv
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, len(ohlcv))) as pool:
+            futures = {pool.submit(_evaluate, name, params, initial_krw): (name, params)
+                       for name, params in pending}
+            for future in as_completed(futures):
+                name, params = futures[future]
+                record = {"key": combo_key(name, params), "strategy": name, "params": params,
+                          **future.result()}
+                results.append(record)
+                if out:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+    finally:
+        if out:
+            out.close()
+        shm.close()
+        shm.unlink()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전략 파라미터 최적화")
+    parser.add_argument("path", help="OHLCV 파일 (.npy, .bin 또는 .csv)")
+    parser.add_argument("--strategy", action="append", choices=list(STRATEGIES),
+                        help="탐색할 전략 (기본: 전체)")
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=50, help="random 모드에서 전략별 조합 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--krw", type=float, default=1_000_000, help="시작 KRW 잔액")
+    parser.add_argument("--checkpoint", default=None, help="결과 체크포인트 파일 (JSON Lines)")
+    parser.add_argument("--top", type=int, default=10, help="전략별 출력할 상위 조합 수")
+    args = parser.parse_args()
+
+    names = args.strategy or list(STRATEGIES)
+    combos = combinations(names, args.mode, args.samples, args.seed)
+    ohlcv = load_ohlcv(args.path)
+
+    started = time.perf_counter()
+    try:
+        results = optimize(ohlcv, combos, args.krw, args.workers, args.checkpoint)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    elapsed = time.perf_counter() - started
+    print(f"📊 조합 {len(combos)}개 탐색 완료 ({elapsed:.2f}초)")
+
+    for name in names:
+        ranked = sorted((r for r in results if r["strategy"] == name),
+                        key=lambda r: r["총 수익 (KRW)"], reverse=True)
+        print(f"\n📌 전략: {name}")
+        for r in ranked[:args.top]:
+            print(f"   └ {r['params']} | 수익 {r['총 수익 (KRW)']:,.0f}원 | "
+                  f"승률 {r['승률 (%)']:.1f}% | 거래 {r['총 거래 횟수']}건 | "
+                  f"최대 낙폭 {r['최대 낙폭 (%)']:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
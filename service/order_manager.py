@@ -0,0 +1,350 @@
+import math
+import threading
+import time
+import uuid
+from utils import metrics
+from utils.logger import DEBUG, WARNING, ERROR, log
+
+ORDER_URL = "https://api.upbit.com/v1/order"
+ORDERS_URL = "https://api.upbit.com/v1/orders"
+
+FINAL_STATES = ("done", "cancel", "rejected", "failed")
+MAX_ATTEMPTS = 5  # 주문 전송 최대 시도 횟수
+RETRY_BASE = 0.5  # 전송 재시도 대기(초) - 시도마다 2배
+RETRY_MAX = 8.0
+POLL_BASE = 0.2  # 체결 조회 간격(초) - 조회마다 2배
+POLL_MAX = 5.0
+ORDER_TIMEOUT = 60  # 이 시간(초) 안에 끝나지 않은 주문은 취소 요청
+
+
+class Order:
+    """
+    주문 하나의 진행 상태
+    state: new(전송 전/재시도 대기) → wait(접수, 체결 대기) → done/cancel(거래소 종료)
+           또는 rejected(거래소 거부), failed(재시도 횟수 초과)
+    """
+
+    def __init__(self, ticker, side, amount, strategy=None, signal_at=None, identifier=None):
+        """
+        :param side: "bid"(amount = KRW 금액) 또는 "ask"(amount = 코인 수량)
+        :param strategy: 주문을 낸 전략 이름
+        :param signal_at: 신호 확정 시각 (신호→체결 지연 측정용)
+        :param identifier: 멱등 키 (기본: 새로 생성)
+        """
+        self.ticker = ticker
+        self.side = side
+        self.amount = amount
+        self.strategy = strategy
+        self.signal_at = signal_at
+        self.identifier = identifier or uuid.uuid4().hex  # 멱등 키 (재전송해도 거래소에서 주문이 하나만 생김)
+        self.uuid = None
+        self.state = "new"
+        self.executed_volume = 0.0
+        self.funds = 0.0
+        self.avg_price = None  # 응답에 평균 체결가가 있으면 (체결 내역이 없을 때 사용)
+        self.paid_fee = 0.0
+        self.attempts = 0
+        self.polls = 0
+        self.next_check = 0.0
+        self.placed_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.resend = True  # 접수 여부 확인 후 거래소에 없으면 다시 보낼지 (재시작 후 복구한 주문은 False)
+        self.error = None
+        self.response = None
+        self.synced_at = None  # 주문 시점의 잔고 스냅샷 시각
+
+    @property
+    def final(self):
+        return self.state in FINAL_STATES
+
+    @property
+    def price(self):
+        """
+        평균 체결가 (체결 전이면 None)
+        체결 내역(trades)을 받지 못했으면 응답의 avg_price, 그것도 없으면 NaN (체결가 모름 - 0으로 계산하지 않음)
+        """
+        if not self.executed_volume:
+            return None
+        if self.funds:
+            return self.funds / self.executed_volume
+        return self.avg_price or math.nan
+
+
+class OrderManager:
+    """
+    주문 전송과 체결 추적
+    - submit()은 주문을 등록만 하고 바로 반환, 전송/조회는 poll()에서 진행
+    - 전송 결과를 모르는 실패(네트워크, 5xx)는 같은 identifier로 접수 여부를 먼저 조회한 뒤 재전송
+    - 접수된 주문은 get_order를 간격을 늘려 가며 조회해 부분 체결과 종료를 반영
+    - 종료된 주문의 실제 체결 내역으로 잔고 스냅샷을 갱신
+    start()로 추적 스레드를 띄우면 poll()이 백그라운드에서 돌고,
+    띄우지 않으면 submit()과 호출자(Trader 틱)의 poll()에서 진행 (모의 거래에서 결과 재현 가능)
+    """
+
+    def __init__(self, upbit, account=None, clock=None, timeout=ORDER_TIMEOUT):
+        """
+        :param upbit: pyupbit.Upbit 호환 클라이언트 (RateLimitedClient, PaperUpbit 가능)
+        :param account: AccountState - 체결 결과를 반영할 잔고 스냅샷
+        :param clock: time()/sleep() 제공자 (모의 거래 시 가상 시계)
+        :param timeout: 주문 후 이 시간(초)이 지나도 끝나지 않으면 취소 요청
+        """
+        self.upbit = upbit
+        self.account = account
+        self.clock = clock or time
+        self.timeout = timeout
+        self.orders = {}  # identifier -> 진행 중인 Order
+        self.lock = threading.Lock()
+        self.polling = threading.Lock()  # poll()이 동시에 두 번 돌지 않도록
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    # ---- 거래소 요청 (pyupbit.Upbit은 identifier를 지원하지 않아 REST API를 직접 호출) ----
+
+    def _request(self, method, url, data):
+        from pyupbit import request_api  # 실거래 주문 때만 필요 (모의 거래는 로드하지 않음)
+        send = getattr(request_api, f"_send_{method}_request")
+        headers = self.upbit._request_headers(data)
+        return send(url, headers=headers, data=data)[0]
+
+    def _post(self, order):
+        data = {"market": order.ticker, "side": order.side, "identifier": order.identifier}
+        if order.side == "bid":
+            data.update(ord_type="price", price=str(order.amount))
+        else:
+            data.update(ord_type="market", volume=str(order.amount))
+        metrics.inc("api_calls_total", api="place_order")
+        with metrics.timer("stage_seconds", stage="order"):
+            if hasattr(self.upbit, "place_order"):  # PaperUpbit
+                return self.upbit.place_order(**data)
+            return self._request("post", ORDERS_URL, data)
+
+    def _lookup(self, **query):
+        """
+        :param query: uuid= 또는 identifier=
+        """
+        metrics.inc("api_calls_total", api="get_order")
+        if hasattr(self.upbit, "place_order"):
+            return self.upbit.get_individual_order(**query)
+        return self._request("get", ORDER_URL, query)
+
+    def _cancel(self, order):
+        metrics.inc("api_calls_total", api="cancel_order")
+        if hasattr(self.upbit, "place_order"):
+            return self.upbit.cancel_order(order.uuid)
+        return self._request("delete", ORDER_URL, {"uuid": order.uuid})
+
+    # ---- 주문 진행 ----
+
+    def submit(self, ticker, side, amount, strategy=None, signal_at=None, identifier=None):
+        """
+        주문 등록 (전송 결과를 기다리지 않음)
+        :param side: "bid" 또는 "ask"
+        :param amount: 매수 금액(KRW) 또는 매도 수량
+        :param identifier: 멱등 키 (미리 저장해 두려면 호출자가 생성해서 전달)
+        :return: Order - final이 될 때까지 poll()에서 갱신
+        """
+        order = Order(ticker, side, amount, strategy, signal_at, identifier)
+        order.next_check = self.clock.time()
+        if self.account is not None:
+            order.synced_at = self.account.synced_at
+        with self.lock:
+            self.orders[order.identifier] = order
+        log(f"📨 [{ticker}] {'매수' if side == 'bid' else '매도'} 주문 등록 ({order.identifier[:8]})", DEBUG)
+        if self.thread is None:
+            self.poll()
+        else:
+            self.wakeup.set()
+        return order
+
+    def recover(self, ticker, side, amount, identifier, strategy=None):
+        """
+        재시작 전에 진행 중이던 주문을 identifier로 다시 추적
+        거래소에 접수되어 있으면 체결까지 추적하고, 없으면 다시 보내지 않고 failed로 끝냄
+        (재시작 사이에 신호가 바뀌었을 수 있으므로)
+        :return: Order
+        """
+        order = Order(ticker, side, amount, strategy, identifier=identifier)
+        order.attempts = 1  # 다음 poll()에서 접수 여부부터 조회
+        order.resend = False
+        order.next_check = self.clock.time()
+        with self.lock:
+            self.orders[identifier] = order
+        log(f"🔁 [{ticker}] 재시작 전 주문 추적 재개 ({identifier[:8]})")
+        self.poll()
+        return order
+
+    def poll(self):
+        """
+        처리할 때가 된 주문을 한 단계씩 진행 (전송/재시도, 체결 조회, 취소 요청)
+        :return: 진행 중인 주문 수
+        """
+        if not self.polling.acquire(blocking=False):
+            return len(self.orders)
+        try:
+            now = self.clock.time()
+            with self.lock:
+                due = [o for o in self.orders.values() if o.next_check <= now]
+            for order in due:
+                try:
+                    if order.uuid is None:
+                        self._place(order)
+                    else:
+                        self._check(order)
+                except Exception as e:
+                    log(f"⚠️ [{order.ticker}] 주문 처리 오류: {e}", WARNING)
+                    self._retry_later(order, str(e))
+                if order.final:
+                    with self.lock:
+                        self.orders.pop(order.identifier, None)
+                    self._finish(order)
+            return len(self.orders)
+        finally:
+            self.polling.release()
+
+    def _place(self, order):
+        order.attempts += 1
+        if order.attempts > 1:
+            # 이전 전송이 접수됐는지 모르므로 같은 identifier 주문이 있는지 먼저 확인
+            try:
+                res = self._lookup(identifier=order.identifier)
+            except Exception as e:
+                if getattr(e, "name", None) != "order_not_found":
+                    return self._retry_later(order, f"접수 여부 확인 실패: {e}")
+                res = None
+            if isinstance(res, dict) and res.get("uuid"):
+                log(f"🔁 [{order.ticker}] 이전 전송이 접수되어 있음 ({order.identifier[:8]})")
+                return self._update(order, res)
+            if not order.resend:
+                order.state, order.error = "failed", "거래소에 접수되지 않은 주문 (다시 보내지 않음)"
+                return
+
+        try:
+            res = self._post(order)
+        except Exception as e:
+            if getattr(e, "code", None) in (400, 401):  # pyupbit 잔고 부족/인증 오류 등 - 다시 보내도 같은 결과
+                order.state, order.error = "rejected", f"{e.name}: {e}"
+                return
+            # 네트워크 오류, 요청 수 초과, 5xx - 접수 여부를 모름
+            return self._retry_later(order, str(e) or type(e).__name__)
+
+        if isinstance(res, dict) and res.get("uuid"):
+            order.placed_at = self.clock.time()
+            self._update(order, res)
+            if order.final and order.executed_volume and not res.get("trades"):
+                self._check(order)  # 접수 응답에는 체결 내역이 없음 - 체결가/잔고 계산을 위해 한 번 조회
+            return
+        error = res.get("error") if isinstance(res, dict) else None
+        if error and "too_many" not in str(error.get("name")):
+            order.state, order.error = "rejected", f"{error.get('name')}: {error.get('message')}"
+            return
+        self._retry_later(order, f"주문 응답 오류: {res}")
+
+    def _retry_later(self, order, error):
+        order.error = error
+        if order.uuid is not None:  # 접수된 주문 조회 실패 - 조회 간격만 늘림
+            order.polls += 1
+            order.next_check = self.clock.time() + min(POLL_BASE * 2 ** order.polls, POLL_MAX)
+            return
+        if order.attempts >= MAX_ATTEMPTS:
+            order.state = "failed"
+            return
+        delay = min(RETRY_BASE * 2 ** (order.attempts - 1), RETRY_MAX)
+        metrics.inc("retries_total", stage="order")
+        metrics.inc("retry_sleep_seconds_total", delay, stage="order")
+        log(f"❌ [{order.ticker}] 주문 전송 실패 ({order.attempts}/{MAX_ATTEMPTS}) - {delay:.1f}초 후 재시도: {error}",
+            ERROR)
+        order.next_check = self.clock.time() + delay
+
+    def _check(self, order):
+        res = self._lookup(uuid=order.uuid)
+        if not (isinstance(res, dict) and res.get("uuid")):
+            return self._retry_later(order, f"주문 조회 응답 오류: {res}")
+        self._update(order, res)
+        if order.final:
+            return
+        if not order.cancel_requested and self.clock.time() - order.placed_at > self.timeout:
+            log(f"⏱️ [{order.ticker}] 주문이 {self.timeout}초 안에 끝나지 않아 취소 요청 ({order.uuid})", WARNING)
+            order.cancel_requested = True
+            self._cancel(order)
+        order.polls += 1
+        order.next_check = self.clock.time() + min(POLL_BASE * 2 ** order.polls, POLL_MAX)
+
+    def _update(self, order, res):
+        """
+        주문 응답(접수/조회)을 Order에 반영 (trades는 조회 응답에만 있음)
+        """
+        order.uuid = res["uuid"]
+        order.response = res
+        if order.placed_at is None:
+            order.placed_at = self.clock.time()
+        executed = float(res.get("executed_volume") or 0)
+        trades = res.get("trades")
+        if trades:
+            order.funds = sum(float(t["funds"]) for t in trades)
+        if res.get("avg_price"):
+            order.avg_price = float(res["avg_price"])
+        order.paid_fee = float(res.get("paid_fee") or 0)
+        order.state = res.get("state") or order.state
+        if executed > order.executed_volume:
+            metrics.inc("order_fills_total", side=order.side)
+            if not order.final:
+                log(f"🧩 [{order.ticker}] 부분 체결 {executed:.8f} ({order.uuid})")
+        order.executed_volume = executed
+        if order.state == "new":  # 응답에 state가 없으면 접수된 것으로 간주
+            order.state = "wait"
+        if not order.final:
+            order.next_check = self.clock.time() + POLL_BASE
+
+    def _finish(self, order):
+        order.finished_at = self.clock.time()
+        side = "buy" if order.side == "bid" else "sell"
+        if order.executed_volume > 0:
+            metrics.inc("orders_total", side=side, result="filled" if order.state == "done" else "partial")
+            if math.isnan(order.price):
+                log(f"⚠️ [{order.ticker}] 체결 내역 없는 종료 응답 - 체결가를 알 수 없음 ({order.uuid})", WARNING)
+            if order.signal_at is not None:
+                metrics.observe("signal_to_fill_seconds", order.finished_at - order.signal_at, side=side)
+            log(f"✅ [{order.ticker}] 주문 종료({order.state}): {order.executed_volume:.8f} @ {order.price:,.4f}",
+                DEBUG)
+        else:
+            metrics.inc("orders_total", side=side, result=order.state)
+            log(f"❌ [{order.ticker}] 주문 미체결 종료({order.state}): {order.error}", ERROR)
+
+        if self.account is None or order.state == "rejected":
+            return  # 거부된 주문은 잔고 변화 없음
+        if order.response is not None and order.state == "done" and order.funds \
+                and self.account.synced_at == order.synced_at:
+            self.account.apply_order(order.ticker, order.response)  # 주문 후 동기화가 없었으면 로컬 계산
+        else:
+            self.account.invalidate()
+
+    # ---- 추적 스레드 ----
+
+    def start(self, idle=1.0):
+        """
+        백그라운드 추적 스레드 시작 (실거래용, 가상 시계에서는 호출하지 않음)
+        :param idle: 진행 중인 주문이 없을 때 대기 간격(초)
+        """
+        if self.thread is not None:
+            return
+
+        def loop():
+            while True:
+                self.poll()
+                with self.lock:
+                    pending = [o.next_check for o in self.orders.values()]
+                wait = min(pending) - self.clock.time() if pending else idle
+                self.wakeup.wait(max(0.01, min(wait, idle)))
+                self.wakeup.clear()
+
+        self.thread = threading.Thread(target=loop, name="order-manager", daemon=True)
+        self.thread.start()
+
+    def pending(self, ticker=None):
+        """
+        진행 중인 주문 목록
+        :param ticker: 지정하면 해당 마켓 주문만
+        """
+        with self.lock:
+            return [o for o in self.orders.values() if ticker is None or o.ticker == ticker]
@@ -0,0 +1,499 @@
+import argparse
+import bisect
+import datetime
+import json
+import threading
+import time
+import uuid
+import numpy as np
+from service.candle_store import INTERVAL_SECONDS
+from service.market_data import KST_OFFSET
+from strategy.candle_series import CLOSE, CandleSeries
+from utils.logger import WARNING
+
+FEE_RATE = 0.0005  # 업비트 KRW 마켓 수수료
+MIN_ORDER_KRW = 5000  # 최소 주문 금액
+
+
+class SimClock:
+    """
+    모의 거래용 가상 시계 (time 모듈 대신 Trader/PaperUpbit에 주입)
+    - speed가 있으면 실제 시간의 speed 배로 흐르는 시계 (처리 지연도 가상 시간에 반영)
+    - speed가 None이면 sleep() 할 때만 시간이 흐르는 이산 시계 (최대 속도, 결과 재현 가능)
+    """
+
+    def __init__(self, start, speed=None):
+        """
+        :param start: 시작 시각 (UTC epoch 초, time.time()과 같은 기준)
+        :param speed: 배속 (예: 1000)
+        """
+        self.start = start
+        self.speed = speed
+        self.now = start
+        self.real_start = time.monotonic()
+        self.lock = threading.Lock()
+
+    def time(self):
+        if self.speed:
+            return self.start + (time.monotonic() - self.real_start) * self.speed
+        return self.now
+
+    def monotonic(self):
+        return self.time()
+
+    def sleep(self, seconds):
+        if self.speed:
+            time.sleep(seconds / self.speed)
+        else:
+            with self.lock:
+                self.now += seconds
+
+
+class ReplayMarketData:
+    """
+    기록된 캔들을 가상 시계에 맞춰 내주는 MarketData 대역
+    진행 중인 캔들은 시가 → 저가 → 고가 → 종가 (음봉이면 시가 → 고가 → 저가 → 종가) 경로를
+    따라 움직인다고 가정 (미래 종가를 미리 보지 않음)
+    """
+
+    def __init__(self, ohlcv, ticker, interval="minute5", count=25, clock=None):
+        """
+        :param ohlcv: (N, 6) 캔들 배열 (KST 기준 epoch 초, CandleStore/backtest.load_ohlcv 형식)
+        :param clock: SimClock
+        """
+        self.ohlcv = np.asarray(ohlcv, dtype=np.float64)
+        self.ticker = ticker
+        self.interval = interval
+        self.step = INTERVAL_SECONDS[interval]
+        self.count = count
+        self.clock = clock or SimClock(self.ohlcv[count - 1, 0] - KST_OFFSET)
+        self.timestamps = []
+        self.forming = None
+        self.ticks = 0  # get_prices 호출 수
+
+    def _forming_at(self, now):
+        i = int(np.searchsorted(self.ohlcv[:, 0], now, side="right")) - 1
+        candle = self.ohlcv[max(i, 0)]
+        progress = min(max((now - candle[0]) / self.step, 0.0), 1.0)
+        _, open_, high, low, close, volume = candle
+        path = [open_, high, low, close] if close < open_ else [open_, low, high, close]
+        position = progress * 3
+        leg = min(int(position), 2)
+        price = path[leg] + (path[leg + 1] - path[leg]) * (position - leg)
+        seen = path[:leg + 1] + [price]
+        return i, np.array([candle[0], open_, max(seen), min(seen), price, volume * progress])
+
+    def current_price(self):
+        """가상 시계 기준 현재가 (PaperUpbit 체결가 계산용)"""
+        return float(self._forming_at(self.clock.time() + KST_OFFSET)[1][CLOSE])
+
+    def finished(self):
+        """기록된 캔들을 모두 재생했으면 True"""
+        return self.clock.time() + KST_OFFSET >= self.ohlcv[-1, 0] + self.step
+
+    def get_prices(self, retry=5):
+        """
+        MarketData.get_prices와 같은 형식의 CandleSeries (마지막 캔들이 진행 중인 캔들)
+        """
+        self.ticks += 1
+        i, self.forming = self._forming_at(self.clock.time() + KST_OFFSET)
+        series = CandleSeries(np.vstack([self.ohlcv[max(i - self.count + 1, 0):max(i, 0)], self.forming]))
+        self.timestamps = series.timestamp
+        return series
+
+
+class OrderBookTape:
+    """
+    웹소켓으로 녹화한 호가(orderbook) 메시지 재생용 저장소
+    record(..., types=["trade", "orderbook"])로 만든 JSON Lines 파일을 읽음
+    """
+
+    def __init__(self, path):
+        self.books = {}  # 티커별 (시각 ms 리스트, 호가 리스트)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                data = json.loads(line)
+                if data.get("type") != "orderbook":
+                    continue
+                times, units = self.books.setdefault(data["code"], ([], []))
+                times.append(data["timestamp"])
+                units.append(data["orderbook_units"])
+
+    def at(self, ticker, timestamp):
+        """
+        :param timestamp: UTC epoch 초
+        :return: 그 시각 직전의 호가 단위 리스트 (없으면 None)
+        """
+        if ticker not in self.books:
+            return None
+        times, units = self.books[ticker]
+        i = bisect.bisect_right(times, timestamp * 1000) - 1
+        return units[i] if i >= 0 else None
+
+
+class PaperUpbit:
+    """
+    pyupbit.Upbit 대신 쓰는 모의 거래소 (잔고, 시장가 주문, 수수료, 슬리피지, 지연)
+    응답은 업비트 API와 같은 형식이라 Trader/AccountState/OrderManager를 그대로 사용할 수 있음
+    fill_delay가 있으면 주문은 wait 상태로 접수되고, 주문 조회 시점까지 지난 시간만큼
+    fill_parts 조각으로 나눠 체결됨 (부분 체결, 체결 추적 재현용)
+    """
+
+    def __init__(self, balances, feeds, clock=None, fee=FEE_RATE, slippage=0.0, latency=0.0, orderbooks=None,
+                 fill_delay=0.0, fill_parts=1):
+        """
+        :param balances: 시작 잔고 (예: {"KRW": 1_000_000})
+        :param feeds: 티커별 현재가 제공자 (current_price()가 있는 ReplayMarketData 등)
+        :param clock: 가상 시계 (기본: time 모듈)
+        :param fee: 수수료율
+        :param slippage: 호가 기록이 없을 때 적용할 슬리피지 비율 (예: 0.001 = 0.1%)
+        :param latency: 주문 요청 왕복 지연(초, 가상 시간)
+        :param orderbooks: OrderBookTape - 있으면 시장가 주문이 호가를 따라 체결
+        :param fill_delay: 접수부터 전량 체결까지 걸리는 시간(초, 가상 시간, 0이면 접수 즉시 체결)
+        :param fill_parts: 체결을 나눌 조각 수
+        """
+        self.balances = {currency: float(amount) for currency, amount in balances.items()}
+        self.locked = {}  # 미체결 주문에 묶인 잔고
+        self.avg_prices = {}
+        self.feeds = feeds
+        self.clock = clock or time
+        self.fee = fee
+        self.slippage = slippage
+        self.latency = latency
+        self.orderbooks = orderbooks
+        self.fill_delay = fill_delay
+        self.fill_parts = fill_parts
+        self.orders = {}
+        self.identifiers = {}  # identifier -> uuid
+        self.pending = {}  # 미체결 주문 uuid -> [주문 수량, 체결된 조각 수, 접수 시각]
+        self.lock = threading.Lock()
+
+    def _now(self):
+        kst = datetime.timezone(datetime.timedelta(seconds=KST_OFFSET))
+        return datetime.datetime.fromtimestamp(self.clock.time(), kst).isoformat(timespec="seconds")
+
+    def _error(self, name, message):
+        return {"error": {"name": name, "message": message}}
+
+    def _fills(self, ticker, side, amount):
+        """
+        체결 내역 계산
+        :param side: "bid"(amount = KRW 금액) 또는 "ask"(amount = 코인 수량)
+        :return: [(가격, 수량), ...]
+        """
+        units = self.orderbooks.at(ticker, self.clock.time()) if self.orderbooks else None
+        if not units:
+            price = self.feeds[ticker].current_price()
+            price *= 1 + self.slippage if side == "bid" else 1 - self.slippage
+            return [(price, amount / price if side == "bid" else amount)]
+
+        fills = []
+        remaining = amount
+        for unit in units:
+            price = unit["ask_price"] if side == "bid" else unit["bid_price"]
+            size = unit["ask_size"] if side == "bid" else unit["bid_size"]
+            volume = min(size, remaining / price) if side == "bid" else min(size, remaining)
+            fills.append((price, volume))
+            remaining -= volume * price if side == "bid" else volume
+            if remaining <= 1e-12:
+                return fills
+        fills.append((price, remaining / price if side == "bid" else remaining))  # 호가 밖은 마지막 호가로 체결
+        return fills
+
+    def _move(self, currency, amount):
+        """잔고 amount 만큼을 묶음 (음수면 묶인 잔고를 풀어 줌)"""
+        self.balances[currency] = self.balances.get(currency, 0) - amount
+        self.locked[currency] = self.locked.get(currency, 0) + amount
+
+    def _order(self, ticker, side, amount, identifier=None):
+        if self.latency:
+            self.clock.sleep(self.latency)
+        quote, coin = ticker.split("-")
+        with self.lock:
+            if identifier is not None and identifier in self.identifiers:
+                return self._error("validation_error", "identifier 값이 중복되었습니다.")
+            if side == "bid":
+                if amount < MIN_ORDER_KRW:
+                    return self._error("under_min_total_bid", f"최소주문금액 이상으로 주문해주세요 ({MIN_ORDER_KRW} KRW)")
+                reserved = amount * self.fee
+                if amount + reserved > self.balances.get(quote, 0) + 1e-9:
+                    return self._error("insufficient_funds_bid", "주문가능한 금액(KRW)이 부족합니다.")
+                self._move(quote, amount + reserved)
+            else:
+                reserved = 0.0
+                if amount * self.feeds[ticker].current_price() < MIN_ORDER_KRW:
+                    return self._error("under_min_total_ask", f"최소주문금액 이상으로 주문해주세요 ({MIN_ORDER_KRW} KRW)")
+                if amount > self.balances.get(coin, 0) + 1e-12:
+                    return self._error("insufficient_funds_ask", "주문가능한 금액(코인)이 부족합니다.")
+                self._move(coin, amount)
+
+            order_uuid = str(uuid.uuid4())
+            order = {
+                "uuid": order_uuid,
+                "side": side,
+                "ord_type": "price" if side == "bid" else "market",
+                "price": str(amount) if side == "bid" else None,
+                "state": "wait",
+                "market": ticker,
+                "created_at": self._now(),
+                "volume": None if side == "bid" else str(amount),
+                "remaining_volume": None if side == "bid" else str(amount),
+                "reserved_fee": str(reserved),
+                "remaining_fee": str(reserved),
+                "paid_fee": "0",
+                "locked": str(amount + reserved),
+                "executed_volume": "0",
+                "trades_count": 0,
+                "trades": [],
+            }
+            if identifier is not None:
+                order["identifier"] = identifier
+                self.identifiers[identifier] = order_uuid
+            self.orders[order_uuid] = order
+            self.pending[order_uuid] = [amount, 0, self.clock.time()]
+            self._settle(order)
+            return self._snapshot(order)
+
+    def _settle(self, order):
+        """
+        접수 후 지난 시간만큼 체결 조각을 실행
+        """
+        pending = self.pending.get(order["uuid"])
+        if pending is None:
+            return
+        amount, done, placed_at = pending
+        due = self.fill_parts
+        if self.fill_delay:
+            due = min(self.fill_parts, int((self.clock.time() - placed_at) / self.fill_delay * self.fill_parts))
+        for _ in range(done, due):
+            self._execute(order, amount / self.fill_parts)
+        pending[1] = max(done, due)
+        if pending[1] >= self.fill_parts:
+            del self.pending[order["uuid"]]
+            self._release(order)
+            order["state"] = "done"
+
+    def _execute(self, order, chunk):
+        """
+        체결 조각 하나 (chunk = KRW 금액 또는 코인 수량)
+        """
+        ticker, side = order["market"], order["side"]
+        quote, coin = ticker.split("-")
+        fills = self._fills(ticker, side, chunk)
+        funds = sum(price * volume for price, volume in fills)
+        volume = sum(v for _, v in fills)
+        paid_fee = funds * self.fee
+        if side == "bid":
+            self.locked[quote] -= chunk + chunk * self.fee
+            self.balances[quote] += chunk + chunk * self.fee - funds - paid_fee
+            held = self.balances.get(coin, 0)
+            self.avg_prices[coin] = (self.avg_prices.get(coin, 0) * held + funds) / (held + volume)
+            self.balances[coin] = held + volume
+            order["remaining_fee"] = str(float(order["remaining_fee"]) - chunk * self.fee)
+            order["locked"] = str(float(order["locked"]) - chunk - chunk * self.fee)
+        else:
+            self.locked[coin] -= chunk
+            self.balances[quote] = self.balances.get(quote, 0) + funds - paid_fee
+            order["remaining_volume"] = str(float(order["remaining_volume"]) - chunk)
+            order["locked"] = order["remaining_volume"]
+
+        created_at = self._now()
+        order["paid_fee"] = str(float(order["paid_fee"]) + paid_fee)
+        order["executed_volume"] = str(float(order["executed_volume"]) + volume)
+        order["trades"].extend(
+            {"market": ticker, "uuid": str(uuid.uuid4()), "price": str(p), "volume": str(v),
+             "funds": str(p * v), "side": side, "created_at": created_at}
+            for p, v in fills
+        )
+        order["trades_count"] = len(order["trades"])
+
+    def _release(self, order):
+        """
+        종료된 주문에 남아 있는 묶인 잔고를 돌려줌
+        """
+        quote, coin = order["market"].split("-")
+        currency = quote if order["side"] == "bid" else coin
+        left = float(order["locked"])
+        if left > 0:
+            self._move(currency, -left)
+        order["locked"] = "0"
+        order["remaining_fee"] = "0"
+
+    def _snapshot(self, order):
+        return dict(order, trades=list(order["trades"]))
+
+    def _find(self, uuid=None, identifier=None):
+        order = self.orders.get(uuid if uuid is not None else self.identifiers.get(identifier))
+        if order is None:
+            return None
+        self._settle(order)
+        return order
+
+    def buy_market_order(self, ticker, price, contain_req=False):
+        """
+        시장가 매수
+        :param price: 매수 금액 (KRW, 수수료 별도)
+        """
+        return self._order(ticker, "bid", float(price))
+
+    def sell_market_order(self, ticker, volume, contain_req=False):
+        """
+        시장가 매도
+        :param volume: 매도 수량
+        """
+        return self._order(ticker, "ask", float(volume))
+
+    def place_order(self, market, side, ord_type, price=None, volume=None, identifier=None):
+        """
+        주문 API(POST /v1/orders)와 같은 인자 - identifier로 중복 주문 방지
+        """
+        return self._order(market, side, float(price if side == "bid" else volume), identifier)
+
+    def get_individual_order(self, uuid=None, identifier=None, contain_req=False):
+        """
+        개별 주문 조회 (GET /v1/order) - 조회 시점까지의 체결을 반영
+        """
+        if self.latency:
+            self.clock.sleep(self.latency)
+        with self.lock:
+            order = self._find(uuid, identifier)
+            if order is None:
+                return self._error("order_not_found", "주문을 찾지 못했습니다.")
+            return self._snapshot(order)
+
+    def cancel_order(self, uuid, contain_req=False):
+        """
+        미체결 주문 취소 - 이미 체결된 조각은 그대로 두고 남은 잔고를 돌려줌
+        """
+        if self.latency:
+            self.clock.sleep(self.latency)
+        with self.lock:
+            order = self._find(uuid)
+            if order is None:
+                return self._error("order_not_found", "주문을 찾지 못했습니다.")
+            if order["state"] != "wait":
+                return self._error("validation_error", "취소할 수 없는 주문입니다.")
+            del self.pending[uuid]
+            self._release(order)
+            order["state"] = "cancel"
+            return self._snapshot(order)
+
+    def get_balances(self, contain_req=False):
+        if self.latency:
+            self.clock.sleep(self.latency)
+        with self.lock:
+            for order_uuid in list(self.pending):
+                self._settle(self.orders[order_uuid])
+            return [
+                {"currency": currency, "balance": str(balance), "locked": str(self.locked.get(currency, 0.0)),
+                 "avg_buy_price": str(self.avg_prices.get(currency, 0)), "avg_buy_price_modified": False,
+                 "unit_currency": "KRW"}
+                for currency, balance in self.balances.items()
+                if balance > 0 or self.locked.get(currency, 0) > 0 or currency == "KRW"
+            ]
+
+    def get_balance(self, ticker="KRW", verbose=False, contain_req=False):
+        currency = ticker.split("-")[-1]
+        with self.lock:
+            return self.balances.get(currency, 0.0)
+
+    def get_order(self, ticker_or_uuid, state="wait", page=1, limit=100, contain_req=False):
+        with self.lock:
+            if ticker_or_uuid in self.orders:
+                return self._snapshot(self._find(ticker_or_uuid))
+            for order_uuid in list(self.pending):
+                self._settle(self.orders[order_uuid])
+            return [self._snapshot(o) for o in self.orders.values()
+                    if o["market"] == ticker_or_uuid and o["state"] == state]
+
+    def equity(self):
+        """
+        현재가 기준 총 평가 금액 (KRW, 미체결 주문에 묶인 잔고 포함)
+        """
+        with self.lock:
+            total = self.balances.get("KRW", 0.0) + self.locked.get("KRW", 0.0)
+            for ticker, feed in self.feeds.items():
+                coin = ticker.split("-")[1]
+                total += (self.balances.get(coin, 0.0) + self.locked.get(coin, 0.0)) * feed.current_price()
+            return total
+
+
+def run_paper(ohlcv, ticker, interval="minute5", krw=1_000_000, speed=1000, latency=0.0, slippage=0.0,
+              orderbooks=None, count=25, fill_delay=0.0, fill_parts=1):
+    """
+    기록된 캔들로 Trader.run 루프 전체를 가상 시계 위에서 실행
+    :param ohlcv: (N, 6) 캔들 배열
+    :param speed: 배속 (None이면 대기 없이 최대 속도)
+    :param fill_delay: 주문 접수부터 전량 체결까지 걸리는 시간(초, 가상 시간)
+    :param fill_parts: 체결을 나눌 조각 수 (부분 체결)
+    :return: 결과 요약 dict
+    """
+    from service.trader import Trader
+    from strategy.moving_average import default_strategies
+
+    step = INTERVAL_SECONDS[interval]
+    clock = SimClock(ohlcv[count - 1, 0] - KST_OFFSET, speed)  # 첫 count 개 캔들은 지표 준비용
+    feed = ReplayMarketData(ohlcv, ticker, interval, count, clock)
+    upbit = PaperUpbit({"KRW": krw}, {ticker: feed}, clock, slippage=slippage, latency=latency,
+                       orderbooks=orderbooks, fill_delay=fill_delay, fill_parts=fill_parts)
+    trader = Trader(default_strategies(), feed, ticker, upbit=upbit, clock=clock)
+
+    started = time.monotonic()
+    virtual_start = clock.time()
+    trader.run(until=feed.finished)
+    elapsed = time.monotonic() - started
+    virtual = clock.time() - virtual_start
+    return {
+        "틱 수": feed.ticks,
+        "주문 수": len(upbit.orders),
+        "실행 시간 (초)": elapsed,
+        "가상 시간 (시간)": virtual / 3600,
+        "실효 배속": virtual / elapsed if elapsed else float("inf"),
+        "틱당 처리 시간 (ms)": elapsed / max(feed.ticks, 1) * 1000,
+        "캔들 수": int(virtual // step),
+        "최종 평가 금액 (KRW)": upbit.equity(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모의 거래소로 Trader 루프 재생")
+    parser.add_argument("path", help="OHLCV 파일 (.npy, .bin 또는 .csv)")
+    parser.add_argument("--ticker", default="KRW-BTC")
+    parser.add_argument("--interval", default="minute5", choices=list(INTERVAL_SECONDS))
+    parser.add_argument("--bars", type=int, default=None, help="마지막 N개 캔들만 재생")
+    parser.add_argument("--krw", type=float, default=1_000_000, help="시작 KRW 잔액")
+    parser.add_argument("--speed", type=float, default=1000, help="배속 (0이면 대기 없이 최대 속도)")
+    parser.add_argument("--latency", type=float, default=0.0, help="주문/잔고 요청 지연(초)")
+    parser.add_argument("--slippage", type=float, default=0.0, help="호가 기록이 없을 때 슬리피지 비율")
+    parser.add_argument("--fill-delay", type=float, default=0.0, help="주문 접수부터 전량 체결까지 걸리는 시간(초)")
+    parser.add_argument("--fill-parts", type=int, default=1, help="체결을 나눌 조각 수 (부분 체결)")
+    parser.add_argument("--orderbook", help="녹화한 호가 JSON Lines 파일")
+    parser.add_argument("--trade-log", default="logs/paper_trade_history.csv", help="모의 거래 기록 CSV")
+    parser.add_argument("--verbose", action="store_true", help="틱마다 INFO 로그 출력")
+    parser.add_argument("--metrics", metavar="PATH", help="성능 지표를 수집해 이 파일에 저장 (실행 중에는 /metrics로도 조회)")
+    args = parser.parse_args()
+
+    from service.backtest import load_ohlcv
+    from utils import logger, logger_trade, metrics
+    logger_trade.TRADE_LOG_FILE = args.trade_log  # 실거래 기록과 분리
+    if not args.verbose:
+        logger.threshold = WARNING
+    if args.metrics:
+        metrics.enabled = True
+        metrics.start(path=args.metrics)
+
+    ohlcv = load_ohlcv(args.path)
+    if args.bars:
+        ohlcv = ohlcv[-args.bars:]
+    orderbooks = OrderBookTape(args.orderbook) if args.orderbook else None
+    summary = run_paper(ohlcv, args.ticker, args.interval, args.krw, args.speed or None,
+                        args.latency, args.slippage, orderbooks, fill_delay=args.fill_delay,
+                        fill_parts=args.fill_parts)
+
+    print("\n📊 **모의 거래 결과**")
+    for k, v in summary.items():
+        print(f"{k}: {v:,.2f}" if isinstance(v, float) else f"{k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
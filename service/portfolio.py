@@ -0,0 +1,240 @@
+import math
+import threading
+import numpy as np
+from config.config import (MAX_EXPOSURE, POSITION_SIZE, STOP_LOSS, STRATEGY_ALLOCATION, TAKE_PROFIT,
+                           TICKER_ALLOCATION)
+
+FEE_FACTOR = 0.9995  # 수수료를 남겨 두고 쓸 수 있는 KRW 비율
+MIN_ORDER_KRW = 5000  # 최소 매수 금액
+MIN_SELL_VOLUME = 0.0001  # 최소 매도 수량 (이보다 적게 남은 포지션은 정리)
+
+
+class Portfolio:
+    """
+    여러 전략/마켓이 자금을 나눠 쓰는 포지션 장부와 위험 관리
+    - 포지션은 (마켓, 전략) 단위 - 같은 마켓에서도 전략마다 따로 진입/청산
+    - 매수 금액은 포지션 크기, 전략별/마켓별 비중 상한, 전체 노출 상한, 사용 가능 KRW 중 가장 작은 값
+    - 포지션 수량/진입가/현재가는 NumPy 배열로 보관해 노출 합계와 손절/익절 판단을 전체 포지션에 한 번에 계산
+    여러 Trader(티커)가 하나의 인스턴스를 공유 (AccountState와 같은 계좌)
+    """
+
+    def __init__(self, account, strategies=(), position_size=POSITION_SIZE, max_exposure=MAX_EXPOSURE,
+                 strategy_allocation=None, ticker_allocation=TICKER_ALLOCATION, stop_loss=STOP_LOSS,
+                 take_profit=TAKE_PROFIT, capacity=64):
+        """
+        :param account: AccountState (KRW 잔고 조회)
+        :param strategies: 전략 이름 목록 (비중을 지정하지 않은 전략은 균등 분배)
+        :param position_size: 새 포지션 하나의 비중
+        :param max_exposure: 전체 포지션 비중 상한
+        :param strategy_allocation: 전략별 비중 상한 dict (기본: config.STRATEGY_ALLOCATION)
+        :param ticker_allocation: 마켓별 비중 상한 (float이면 모든 마켓 같은 값, dict면 마켓별)
+        :param stop_loss: 손절 기준 하락률 (None이면 사용 안 함)
+        :param take_profit: 익절 기준 상승률 (None이면 사용 안 함)
+        :param capacity: 초기 포지션 배열 크기 (부족하면 두 배로 늘림)
+        """
+        self.account = account
+        self.strategies = list(strategies)
+        self.position_size = position_size
+        self.max_exposure = max_exposure
+        self.strategy_allocation = dict(STRATEGY_ALLOCATION if strategy_allocation is None else strategy_allocation)
+        self.ticker_allocation = ticker_allocation
+        self.stop_loss = -math.inf if stop_loss is None else -stop_loss
+        self.take_profit = math.inf if take_profit is None else take_profit
+        self.lock = threading.RLock()
+        self.slots = {}  # (마켓, 전략) -> 배열 위치
+        self.keys = [None] * capacity  # 배열 위치 -> (마켓, 전략)
+        self.ticker_ids = {}  # 마켓 -> 정수 id
+        self.strategy_ids = {}  # 전략 -> 정수 id
+        self.ticker = np.full(capacity, -1, dtype=np.int64)
+        self.strategy = np.full(capacity, -1, dtype=np.int64)
+        self.volume = np.zeros(capacity)
+        self.entry = np.zeros(capacity)  # 평균 진입가 (모르면 NaN - 손절/익절 제외)
+        self.price = np.zeros(capacity)  # 마지막 현재가
+        self.active = np.zeros(capacity, dtype=bool)
+
+    # ---- 장부 ----
+
+    def _id(self, ids, key):
+        if key not in ids:
+            ids[key] = len(ids)
+        return ids[key]
+
+    def _grow(self):
+        size = len(self.active)
+        for name in ("ticker", "strategy"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.full(size, -1, dtype=np.int64)]))
+        for name in ("volume", "entry", "price"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(size)]))
+        self.active = np.concatenate([self.active, np.zeros(size, dtype=bool)])
+        self.keys.extend([None] * size)
+
+    def _slot(self, ticker, strategy):
+        slot = self.slots.get((ticker, strategy))
+        if slot is None:
+            free = np.flatnonzero(~self.active)
+            if not len(free):
+                self._grow()
+                free = np.flatnonzero(~self.active)
+            slot = int(free[0])
+            self.slots[(ticker, strategy)] = slot
+            self.keys[slot] = (ticker, strategy)
+            self.ticker[slot] = self._id(self.ticker_ids, ticker)
+            self.strategy[slot] = self._id(self.strategy_ids, strategy)
+            self.volume[slot] = self.entry[slot] = 0.0
+            self.active[slot] = True
+        return slot
+
+    def _close(self, slot):
+        del self.slots[self.keys[slot]]
+        self.keys[slot] = None
+        self.active[slot] = False
+        self.volume[slot] = 0.0
+
+    def open(self, ticker, strategy, volume, price):
+        """
+        매수 체결 반영 (이미 있는 포지션이면 평균 진입가로 합침)
+        :param volume: 체결 수량
+        :param price: 평균 체결가 (모르면 NaN)
+        """
+        with self.lock:
+            slot = self._slot(ticker, strategy)
+            held = self.volume[slot]
+            self.entry[slot] = price if held <= 0 else (self.entry[slot] * held + price * volume) / (held + volume)
+            self.volume[slot] = held + volume
+            self.price[slot] = price if not math.isnan(price) else self.price[slot]
+
+    def reduce(self, ticker, strategy, volume):
+        """
+        매도 체결 반영 (남은 수량이 최소 매도 수량보다 적으면 포지션 정리)
+        :return: 남은 수량
+        """
+        with self.lock:
+            slot = self.slots.get((ticker, strategy))
+            if slot is None:
+                return 0.0
+            self.volume[slot] = max(self.volume[slot] - volume, 0.0)
+            if self.volume[slot] < MIN_SELL_VOLUME:
+                self._close(slot)
+                return 0.0
+            return float(self.volume[slot])
+
+    def scale(self, ticker, factor):
+        """
+        마켓의 모든 포지션 수량에 factor를 곱함 (거래소 잔고가 장부보다 적을 때 맞춤, 0이면 모두 정리)
+        """
+        with self.lock:
+            for strategy in self.holders(ticker):
+                slot = self.slots[(ticker, strategy)]
+                self.volume[slot] *= factor
+                if self.volume[slot] < MIN_SELL_VOLUME:
+                    self._close(slot)
+
+    def position(self, ticker, strategy):
+        """
+        :return: 전략의 보유 수량 (없으면 0)
+        """
+        slot = self.slots.get((ticker, strategy))
+        return 0.0 if slot is None else float(self.volume[slot])
+
+    def holders(self, ticker):
+        """
+        :return: 마켓에 포지션이 있는 전략 이름 리스트
+        """
+        with self.lock:
+            return [strategy for (t, strategy) in self.slots if t == ticker]
+
+    def volume_of(self, ticker):
+        """마켓의 장부상 총 보유 수량"""
+        with self.lock:
+            return float(self.volume[self.active & (self.ticker == self.ticker_ids.get(ticker, -2))].sum())
+
+    # ---- 위험 관리 ----
+
+    def mark(self, ticker, price):
+        """마켓 현재가 갱신"""
+        with self.lock:
+            self.price[self.active & (self.ticker == self.ticker_ids.get(ticker, -2))] = price
+
+    def exits(self, ticker, price):
+        """
+        현재가를 반영하고 손절/익절 조건에 걸린 포지션 찾기
+        (수익률은 전체 포지션에 대해 한 번에 계산 - 다른 마켓은 마지막 현재가 기준)
+        :return: [(전략, "stop_loss" 또는 "take_profit", 수익률), ...] - 이 마켓의 포지션만
+        """
+        with self.lock:
+            self.mark(ticker, price)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = self.price / self.entry - 1
+            stop = self.active & (returns <= self.stop_loss)
+            take = self.active & (returns >= self.take_profit)
+            mine = self.ticker == self.ticker_ids.get(ticker, -2)
+            return [(self.keys[slot][1], "stop_loss" if stop[slot] else "take_profit", float(returns[slot]))
+                    for slot in np.flatnonzero((stop | take) & mine)]
+
+    def exposure(self):
+        """
+        :return: (전체 포지션 평가 금액, 마켓 id별 평가 금액 배열, 전략 id별 평가 금액 배열)
+        """
+        with self.lock:
+            value = np.where(self.active, self.volume * self.price, 0.0)
+            by_ticker = np.bincount(self.ticker[self.active], value[self.active], minlength=len(self.ticker_ids))
+            by_strategy = np.bincount(self.strategy[self.active], value[self.active],
+                                      minlength=len(self.strategy_ids))
+            return float(value.sum()), by_ticker, by_strategy
+
+    def _allocation(self, strategy):
+        if strategy in self.strategy_allocation:
+            return self.strategy_allocation[strategy]
+        return 1.0 / len(self.strategies) if self.strategies else 1.0
+
+    def _ticker_allocation(self, ticker):
+        if isinstance(self.ticker_allocation, dict):
+            return self.ticker_allocation.get(ticker, 1.0)
+        return self.ticker_allocation
+
+    def size(self, ticker, strategy, krw=None):
+        """
+        새 포지션 매수 금액
+        min(포지션 크기, 전략 한도 잔여, 마켓 한도 잔여, 전체 노출 한도 잔여, 사용 가능 KRW)
+        :param krw: KRW 잔고 (None이면 계좌에서 조회)
+        :return: 매수 금액(KRW) - 최소 주문 금액보다 작으면 0
+        """
+        krw = self.account.get("KRW") if krw is None else krw
+        with self.lock:
+            total, by_ticker, by_strategy = self.exposure()
+            equity = krw + total
+            ticker_id = self.ticker_ids.get(ticker)
+            strategy_id = self.strategy_ids.get(strategy)
+            amount = min(
+                self.position_size * equity,
+                self._allocation(strategy) * equity - (by_strategy[strategy_id] if strategy_id is not None else 0.0),
+                self._ticker_allocation(ticker) * equity - (by_ticker[ticker_id] if ticker_id is not None else 0.0),
+                self.max_exposure * equity - total,
+                krw * FEE_FACTOR,
+            )
+        return amount if amount >= MIN_ORDER_KRW else 0.0
+
+    # ---- 상태 저장 ----
+
+    def snapshot(self, ticker):
+        """
+        :return: {전략: {"volume", "entry"}} (StateStore 기록용, 진입가를 모르면 None)
+        """
+        with self.lock:
+            result = {}
+            for strategy in self.holders(ticker):
+                slot = self.slots[(ticker, strategy)]
+                entry = float(self.entry[slot])
+                result[strategy] = {"volume": float(self.volume[slot]), "entry": None if math.isnan(entry) else entry}
+            return result
+
+    def restore(self, ticker, positions):
+        """
+        snapshot() 결과로 마켓 포지션 복원
+        """
+        with self.lock:
+            for strategy in self.holders(ticker):
+                self._close(self.slots[(ticker, strategy)])
+            for strategy, position in positions.items():
+                entry = position.get("entry")
+                self.open(ticker, strategy, position["volume"], math.nan if entry is None else entry)
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+from utils import metrics
+
+# 업비트 요청 수 제한 (IP/계정 단위로 모든 티커가 공유)
+QUOTATION_RATE = 10  # 시세 조회 API: 초당 10회
+EXCHANGE_RATE = 8  # 주문/잔고 API: 주문 기준 초당 8회로 보수적으로 제한
+
+
+class RateLimiter:
+    """
+    초당 요청 수 제한기 (GCRA 방식, burst 만큼은 연속 허용)
+    스레드와 asyncio 태스크에서 같은 인스턴스를 공유할 수 있음
+    """
+
+    def __init__(self, rate, burst=None, name="api"):
+        """
+        :param rate: 초당 허용 요청 수
+        :param burst: 연속으로 허용할 요청 수 (기본: rate)
+        :param name: 지표 레이블 (예: "quotation", "exchange")
+        """
+        self.name = name
+        self.interval = 1 / rate
+        self.tau = ((burst or rate) - 1) * self.interval
+        self.tat = 0.0  # 이론상 다음 도착 시각
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            tat = max(self.tat, now)
+            delay = max(0.0, tat - now - self.tau)
+            self.tat = tat + self.interval
+        if delay:
+            metrics.inc("rate_limit_waits_total", limiter=self.name)
+            metrics.observe("rate_limit_wait_seconds", delay, limiter=self.name)
+        return delay
+
+    def wait(self):
+        """요청 한 건 허용될 때까지 대기 (동기)"""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire(self):
+        """요청 한 건 허용될 때까지 대기 (비동기)"""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class RateLimitedClient:
+    """
+    pyupbit.Upbit 같은 클라이언트의 모든 메서드 호출 앞에 제한기를 거치게 하는 래퍼
+    """
+
+    def __init__(self, client, limiter):
+        self._client = client
+        self._limiter = limiter
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._limiter.wait()
+            return attr(*args, **kwargs)
+        return call
@@ -0,0 +1,468 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import numpy as np
+from config.config import ACCESS_KEY, SECRET_KEY, TICKER
+from service import upbit_api
+from service.account import AccountState
+from service.candle_store import CandleStore
+from service.order_manager import ORDER_TIMEOUT, OrderManager
+from service.paper_exchange import SimClock
+from service.timeframes import build_market_data
+from strategy.candle_series import OHLCV_COLUMNS
+from utils.logger import WARNING, ERROR, log
+
+# 저널 기록 한 건: 종류(1바이트), 시각(UTC epoch 초, float64), 내용 길이(uint32) 뒤에 내용
+RECORD = struct.Struct("<BdI")
+
+# 기록 종류
+HEADER = 0  # 실행 정보 (JSON)
+SEED = 1  # 시작 시점의 로컬 캔들 저장소 창 (간격 + float64 캔들)
+CANDLES = 2  # 캔들 조회 응답 (간격 + float64 캔들) - 틱 경계
+CANDLES_FAILED = 3  # 캔들 조회 실패 (간격 + 오류 메시지)
+BALANCES = 4  # 잔고 조회 응답 (JSON)
+ORDER = 5  # 주문 전송/조회/취소 요청과 응답 (JSON)
+
+
+def _pack_interval(interval):
+    name = interval.encode()
+    return bytes([len(name)]) + name
+
+
+def _unpack_interval(payload):
+    size = payload[0]
+    return payload[1:1 + size].decode(), 1 + size
+
+
+def _error_info(e):
+    return {"name": getattr(e, "name", type(e).__name__), "code": getattr(e, "code", None), "message": str(e)}
+
+
+class RecordedError(Exception):
+    """
+    기록 당시 발생한 예외를 재생에서 다시 발생시킬 때 쓰는 예외 (name, code 속성 유지 - 거부 판단 등이 같게 동작)
+    """
+
+    def __init__(self, message, name=None, code=None):
+        super().__init__(message)
+        self.name = name
+        self.code = code
+
+
+def read_journal(path):
+    """
+    저널 파일의 기록을 차례로 읽음 (기록 도중 중단되어 잘린 마지막 기록은 버림)
+    :return: (종류, 시각, 내용 bytes) 제너레이터
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + RECORD.size <= len(data):
+        kind, at, size = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if offset + size > len(data):
+            break
+        yield kind, at, data[offset:offset + size]
+        offset += size
+
+
+class JournalWriter:
+    """
+    거래 루프의 외부 입력(캔들/잔고/주문 응답)을 바이너리 저널에 차례로 기록
+    - 캔들은 float64 배열 그대로, 잔고/주문 응답은 JSON으로 저장 (틱당 수백 바이트)
+    - 캔들 응답(틱 경계)마다 flush - 중단되어도 그 직전 틱까지는 재생 가능
+    """
+
+    def __init__(self, path, clock=None):
+        """
+        :param path: 저널 파일
+        :param clock: 기록 시각 제공자 (기본: time 모듈, 모의 거래를 기록할 때는 가상 시계)
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.clock = clock or time
+        self.file = open(path, "wb")
+        self.lock = threading.Lock()
+        self.records = 0
+
+    def write(self, kind, payload, at=None):
+        with self.lock:
+            self.file.write(RECORD.pack(kind, self.clock.time() if at is None else at, len(payload)))
+            self.file.write(payload)
+            self.records += 1
+            if kind in (CANDLES, CANDLES_FAILED):
+                self.file.flush()
+
+    def write_json(self, kind, value, at=None):
+        self.write(kind, json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode(), at)
+
+    def write_candles(self, kind, interval, rows, at=None):
+        rows = np.ascontiguousarray(rows, dtype=np.float64)
+        self.write(kind, _pack_interval(interval) + rows.tobytes(), at)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+# ---- 기록 ----
+
+class RecordingSource:
+    """
+    캔들 조회 함수(upbit_api.get_candles)를 감싸 응답을 저널에 기록 (MarketData source로 사용)
+    """
+
+    def __init__(self, writer, source=None):
+        self.writer = writer
+        self.source = source or upbit_api.get_candles
+
+    def __call__(self, ticker, interval="minute5", count=200, limiter=None):
+        at = self.writer.clock.time()
+        try:
+            rows = self.source(ticker, interval=interval, count=count, limiter=limiter)
+        except Exception as e:
+            self.writer.write(CANDLES_FAILED, _pack_interval(interval) + str(e).encode(), at)
+            raise
+        self.writer.write_candles(CANDLES, interval, rows, at)
+        return rows
+
+
+class RecordingUpbit:
+    """
+    주문/잔고 클라이언트를 감싸 잔고 조회 응답을 저널에 기록 (나머지 속성은 그대로 전달)
+    """
+
+    def __init__(self, upbit, writer):
+        self.upbit = upbit
+        self.writer = writer
+
+    def get_balances(self, contain_req=False):
+        try:
+            res = self.upbit.get_balances()
+        except Exception as e:
+            self.writer.write_json(BALANCES, {"error": _error_info(e)})
+            raise
+        self.writer.write_json(BALANCES, {"response": res})
+        return res
+
+    def __getattr__(self, name):
+        return getattr(self.upbit, name)
+
+
+def _order_request(order):
+    return {"market": order.ticker, "side": order.side, "amount": order.amount, "strategy": order.strategy}
+
+
+class RecordingOrderManager(OrderManager):
+    """
+    거래소 요청(전송/조회/취소)의 요청 내용과 응답을 저널에 기록하는 OrderManager
+    """
+
+    def __init__(self, writer, upbit, account=None, clock=None, timeout=ORDER_TIMEOUT):
+        super().__init__(upbit, account, clock, timeout)
+        self.writer = writer
+
+    def _exchange(self, op, request, call, *args, **kwargs):
+        try:
+            res = call(*args, **kwargs)
+        except Exception as e:
+            self.writer.write_json(ORDER, {"op": op, "request": request, "error": _error_info(e)})
+            raise
+        self.writer.write_json(ORDER, {"op": op, "request": request, "response": res})
+        return res
+
+    def _post(self, order):
+        return self._exchange("post", _order_request(order), super()._post, order)
+
+    def _lookup(self, **query):
+        return self._exchange("lookup", query, super()._lookup, **query)
+
+    def _cancel(self, order):
+        return self._exchange("cancel", {"uuid": order.uuid}, super()._cancel, order)
+
+
+def record(path, ticker=TICKER, interval="minute5"):
+    """
+    실거래 Trader 루프를 실행하면서 외부 입력을 저널에 기록 (실제 주문이 나감)
+    - 시작 시점의 로컬 캔들 저장소 창도 함께 남겨 재생이 같은 캔들 시계열에서 시작하도록 함
+    - 재생을 결정적으로 만들기 위해 주문 추적 스레드 없이 틱 안에서 poll() (run_paper와 같음)
+    """
+    from service.trader import Trader
+    from strategy.moving_average import default_strategies
+
+    writer = JournalWriter(path)
+    strategies = default_strategies()
+    store = CandleStore()
+    upbit = RecordingUpbit(upbit_api.LazyUpbit(ACCESS_KEY, SECRET_KEY), writer)
+    account = AccountState(upbit)
+    market_data = build_market_data(ticker, strategies, interval, store=store, source=RecordingSource(writer))
+    base = getattr(market_data, "base", market_data)  # MultiTimeframeData면 실제로 조회하는 기준 간격
+    writer.write_json(HEADER, {"ticker": ticker, "interval": interval,
+                               "strategies": [s.__class__.__name__ for s in strategies]})
+    writer.write_candles(SEED, base.interval, store.window(ticker, base.interval, base.count))
+    orders = RecordingOrderManager(writer, upbit, account)
+    trader = Trader(strategies, market_data, ticker, upbit=upbit, account=account, orders=orders)
+    log(f"⏺️ [{ticker}] 거래 루프 기록 시작: {path}")
+    try:
+        trader.run()
+    finally:
+        writer.close()
+
+
+# ---- 재생 ----
+
+class JournalReplay:
+    """
+    저널의 응답을 기록 당시 순서대로 돌려주는 재생기 (캔들 조회 함수, 잔고 클라이언트 역할)
+    - 캔들 응답 사이 구간(틱)마다 그 구간에 기록된 잔고/주문 응답만 사용
+      (재생 쪽 요청 수가 기록과 달라도 그 틱의 마지막 응답을 재사용 - 캐시 만료 시점 차이 등)
+    - 가상 시계는 캔들 응답의 기록 시각으로 맞춤 (주문 시간 초과, 잔고 캐시 만료가 기록과 같은 틱에서 판단)
+    - 주문 전송 요청(마켓, 방향, 금액/수량, 전략)이 기록과 다르거나 기록에 없는 주문이 나오면 불일치로 보고 재생 중단
+    """
+
+    def __init__(self, path, clock=None):
+        """
+        :param path: 저널 파일
+        :param clock: SimClock (기본: 첫 기록 시각에서 시작하는 이산 시계)
+        """
+        self.header = {}
+        self.seeds = []  # [(간격, 캔들 배열)]
+        self.candles = []  # [(시각, 간격, 캔들 배열 또는 오류 메시지)]
+        self.segments = [self._segment()]  # 캔들 응답 사이 구간별 잔고/주문 응답 (0번은 첫 캔들 조회 전)
+        start = None
+        for kind, at, payload in read_journal(path):
+            start = at if start is None else start
+            if kind == HEADER:
+                self.header = json.loads(payload)
+            elif kind in (SEED, CANDLES, CANDLES_FAILED):
+                interval, offset = _unpack_interval(payload)
+                if kind == CANDLES_FAILED:
+                    value = payload[offset:].decode()
+                else:
+                    value = np.frombuffer(payload[offset:], dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS)).copy()
+                if kind == SEED:
+                    self.seeds.append((interval, value))
+                else:
+                    self.candles.append((at, interval, value))
+                    self.segments.append(self._segment())
+            elif kind == BALANCES:
+                self.segments[-1]["balances"].append(json.loads(payload))
+            elif kind == ORDER:
+                record = json.loads(payload)
+                self.segments[-1][record["op"]].append(record)
+        self.clock = clock or SimClock(start or time.time())
+        self.index = 0  # 다음 캔들 응답 위치 (= 현재 구간 번호)
+        self.cursors = dict.fromkeys(self._segment(), 0)
+        self.last = {}  # 종류별 마지막으로 돌려준 기록
+        self.orders = []  # 재생에서 나온 주문 전송 [(시각, 요청 dict)]
+        self.divergences = []  # 기록과 다른 판단
+
+    @staticmethod
+    def _segment():
+        return {"balances": [], "post": [], "lookup": [], "cancel": []}
+
+    @property
+    def start(self):
+        return self.candles[0][0] if self.candles else self.clock.time()
+
+    @property
+    def end(self):
+        return self.candles[-1][0] if self.candles else self.start
+
+    def finished(self):
+        """모든 캔들 응답을 재생했거나 불일치가 나왔으면 True (Trader.run 종료 조건)"""
+        return self.index >= len(self.candles) or bool(self.divergences)
+
+    def diverge(self, message):
+        at = self.candles[self.index - 1][0] if self.index else self.start
+        message = f"틱 {self.index} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(at))}): {message}"
+        self.divergences.append(message)
+        log(f"❌ 재생 불일치 - {message}", ERROR)
+
+    def _next(self, kind):
+        """현재 구간의 다음 기록 (없으면 마지막으로 돌려준 기록)"""
+        records = self.segments[self.index][kind]
+        if self.cursors[kind] < len(records):
+            self.last[kind] = records[self.cursors[kind]]
+            self.cursors[kind] += 1
+        return self.last.get(kind)
+
+    def _close_segment(self):
+        posts = self.segments[self.index]["post"]
+        for record in posts[self.cursors["post"]:]:
+            self.diverge(f"기록된 주문이 재생에서 나오지 않음 {record['request']}")
+        self.cursors = dict.fromkeys(self.cursors, 0)
+
+    def source(self, ticker, interval="minute5", count=200, limiter=None):
+        """
+        캔들 조회 함수 대역 (MarketData source)
+        :return: 기록된 캔들 배열 (기록 당시 실패였으면 같은 메시지로 예외)
+        """
+        if self.index >= len(self.candles):
+            raise RecordedError("저널의 캔들 응답을 모두 재생했습니다")
+        at, recorded, value = self.candles[self.index]
+        self._close_segment()
+        self.index += 1
+        with self.clock.lock:
+            self.clock.now = max(self.clock.now, at)
+        if recorded != interval:
+            self.diverge(f"캔들 간격 {interval} 요청 (기록: {recorded})")
+        if isinstance(value, str):
+            raise RecordedError(value)
+        return value
+
+    def get_balances(self, contain_req=False):
+        """잔고 조회 대역 (AccountState가 호출)"""
+        record = self._next("balances")
+        if record is None:
+            raise RecordedError("저널에 잔고 응답이 없습니다")
+        if "error" in record:
+            raise RecordedError(record["error"]["message"], record["error"]["name"], record["error"]["code"])
+        return record["response"]
+
+    def order(self, op, request):
+        """
+        주문 요청 대역 (ReplayOrderManager가 호출)
+        :param op: "post", "lookup" 또는 "cancel"
+        :return: 기록된 응답
+        """
+        if op == "post":
+            self.orders.append((self.clock.time(), request))
+            records = self.segments[self.index]["post"]
+            if self.cursors["post"] >= len(records):
+                self.diverge(f"기록에 없는 주문 {request}")
+                return {"error": {"name": "replay_diverged", "message": "기록에 없는 주문"}}
+            recorded = records[self.cursors["post"]]["request"]
+            if not self._same_order(request, recorded):
+                self.diverge(f"주문 {request} (기록: {recorded})")
+        record = self._next(op)
+        if record is None:
+            return {"error": {"name": "order_not_found", "message": "저널에 주문 응답이 없습니다."}}
+        if "error" in record:
+            raise RecordedError(record["error"]["message"], record["error"]["name"], record["error"]["code"])
+        return record["response"]
+
+    @staticmethod
+    def _same_order(request, recorded):
+        return (request["market"] == recorded["market"] and request["side"] == recorded["side"]
+                and request["strategy"] == recorded["strategy"]
+                and math.isclose(request["amount"], recorded["amount"], rel_tol=1e-9))
+
+
+class ReplayOrderManager(OrderManager):
+    """
+    거래소 요청 대신 저널의 응답을 쓰는 OrderManager (나머지 주문 진행 로직은 그대로)
+    """
+
+    def __init__(self, replay, account=None, clock=None, timeout=ORDER_TIMEOUT):
+        super().__init__(replay, account, clock or replay.clock, timeout)
+        self.replay = replay
+
+    def _post(self, order):
+        return self.replay.order("post", _order_request(order))
+
+    def _lookup(self, **query):
+        return self.replay.order("lookup", query)
+
+    def _cancel(self, order):
+        return self.replay.order("cancel", {"uuid": order.uuid})
+
+
+def replay(path):
+    """
+    저널로 Trader 루프를 최대 속도로 다시 실행 (기록할 때와 같은 MarketData/Trader/OrderManager 경로)
+    캔들 저장소는 임시 디렉터리에 저널의 시작 창으로 채워 사용 (실제 data/candles는 건드리지 않음)
+    :return: 결과 요약 dict (불일치 목록은 "불일치" 키)
+    """
+    from service.trader import Trader
+    from strategy.moving_average import default_strategies
+
+    journal = JournalReplay(path)
+    ticker = journal.header.get("ticker", TICKER)
+    interval = journal.header.get("interval", "minute5")
+    strategies = default_strategies()
+    names = [s.__class__.__name__ for s in strategies]
+    if journal.header.get("strategies", names) != names:
+        log(f"⚠️ 기록 당시 전략 구성이 다름: {journal.header['strategies']} -> {names}", WARNING)
+
+    root = tempfile.mkdtemp(prefix="replay-candles-")
+    try:
+        store = CandleStore(root)
+        for seed_interval, rows in journal.seeds:
+            store.append(ticker, seed_interval, rows)
+        clock = journal.clock
+        account = AccountState(journal, clock=clock)
+        market_data = build_market_data(ticker, strategies, interval, store=store, source=journal.source,
+                                        clock=clock)
+        orders = ReplayOrderManager(journal, account, clock)
+        trader = Trader(strategies, market_data, ticker, upbit=journal, account=account, clock=clock,
+                        orders=orders)
+        started = time.monotonic()
+        trader.run(until=journal.finished)
+        elapsed = time.monotonic() - started
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    if not journal.divergences:
+        journal._close_segment()  # 마지막 틱에 기록된 주문까지 확인
+    recorded = journal.end - journal.start
+    return {
+        "틱 수": journal.index,
+        "주문 수": len(journal.orders),
+        "불일치 수": len(journal.divergences),
+        "실행 시간 (초)": elapsed,
+        "기록 시간 (시간)": recorded / 3600,
+        "실효 배속": recorded / elapsed if elapsed else float("inf"),
+        "틱당 처리 시간 (ms)": elapsed / max(journal.index, 1) * 1000,
+        "불일치": journal.divergences,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="거래 루프 기록/재생")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="실거래 루프를 실행하며 외부 입력을 저널에 기록")
+    rec.add_argument("path", help="저널 파일 (예: logs/journal/20240101.bin)")
+    rec.add_argument("--ticker", default=TICKER)
+    rec.add_argument("--interval", default="minute5", help="캔들 간격")
+    play = commands.add_parser("replay", help="저널로 거래 루프를 최대 속도로 재생하고 판단이 같은지 확인")
+    play.add_argument("path", help="저널 파일")
+    play.add_argument("--trade-log", default="logs/replay_trade_history.csv", help="재생 거래 기록 CSV")
+    play.add_argument("--verbose", action="store_true", help="틱마다 INFO 로그 출력")
+    play.add_argument("--profile", type=int, default=0, metavar="N", help="cProfile로 누적 시간 상위 N개 함수 출력")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        from utils import metrics
+        metrics.start()  # METRICS=1 일 때만 /metrics 엔드포인트 시작
+        record(args.path, args.ticker, args.interval)
+        return
+
+    from utils import logger, logger_trade
+    logger_trade.TRADE_LOG_FILE = args.trade_log  # 실거래 기록과 분리
+    if not args.verbose:
+        logger.threshold = WARNING
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        summary = profiler.runcall(replay, args.path)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.profile)
+    else:
+        summary = replay(args.path)
+    divergences = summary.pop("불일치")
+    for key, value in summary.items():
+        print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+    for message in divergences:
+        print(f"❌ {message}")
+    if divergences:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
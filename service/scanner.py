@@ -0,0 +1,167 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from service import upbit_api
+from service.candle_store import CandleStore, INTERVAL_SECONDS
+from service.market_data import KST_OFFSET, MarketData
+from service.rate_limiter import QUOTATION_RATE, RateLimiter
+from strategy.moving_average import default_strategies
+from utils.logger import DEBUG, WARNING, log
+
+TICKER_BATCH = 200  # 현재가 API 한 번에 조회할 마켓 수
+
+
+class MarketScanner:
+    """
+    KRW 마켓 전체에서 전략 신호가 켜진 마켓을 찾는 스캐너
+    - 확정 캔들은 CandleStore에 쌓아 두고, 새 캔들이 시작된 마켓만 캔들 API를 다시 요청
+    - 나머지 마켓의 진행 중인 캔들은 현재가 API 한 번(200개 단위)으로 갱신
+    - 전략 신호는 전체 마켓을 (마켓 수, N, 6) 배열로 쌓아 전략별로 한 번에 계산
+    """
+
+    def __init__(self, tickers=None, interval="minute5", count=25, strategies=None,
+                 store=None, limiter=None, workers=16):
+        """
+        :param tickers: 스캔할 마켓 목록 (None이면 KRW 마켓 전체)
+        :param interval: 캔들 간격
+        :param count: 전략에 넘길 캔들 수 (Trader와 같은 값이어야 같은 판단)
+        :param strategies: 전략 리스트 (기본: 5개 전략 전체)
+        :param limiter: 시세 API 요청 제한기 (다른 런타임과 공유 가능)
+        :param workers: 캔들 요청용 스레드 수
+        """
+        self.interval = interval
+        self.count = count
+        self.strategies = strategies or default_strategies()
+        self.store = store or CandleStore()
+        self.limiter = limiter or RateLimiter(QUOTATION_RATE, name="quotation")
+        self.workers = workers
+        self.tickers = tickers
+        self.markets = {}  # 티커별 MarketData
+        self.turnover = {}  # 티커별 24시간 누적 거래대금 (순위 동점 처리용)
+
+    def universe(self):
+        """
+        스캔 대상 마켓 목록 (KRW 마켓 전체는 처음 한 번만 조회)
+        """
+        if self.tickers is None:
+            self.limiter.wait()
+            self.tickers = upbit_api.get_tickers(fiat="KRW")
+        for ticker in self.tickers:
+            if ticker not in self.markets:
+                self.markets[ticker] = MarketData(ticker, interval=self.interval, count=self.count,
+                                                  store=self.store, limiter=self.limiter)
+        return self.tickers
+
+    def _fetch(self, market_data):
+        try:
+            return market_data.fetch()[1] is not None
+        except Exception as e:
+            log(f"⚠️ [{market_data.ticker}] 캔들 조회 실패: {str(e)}", WARNING)
+            return False
+
+    def _update_prices(self):
+        """
+        현재가 API로 진행 중인 캔들의 종가/고가/저가를 갱신
+        """
+        tickers = [t for t in self.universe() if self.markets[t].forming is not None]
+        for i in range(0, len(tickers), TICKER_BATCH):
+            self.limiter.wait()
+            for item in upbit_api.get_current_price(tickers[i:i + TICKER_BATCH]):
+                self.turnover[item["market"]] = item.get("acc_trade_price_24h", 0.0)
+                self.markets[item["market"]].tick(float(item["trade_price"]))
+
+    def refresh(self):
+        """
+        전체 마켓 시세 갱신
+        - 진행 중인 캔들이 현재 구간이 아닌 마켓(처음 스캔, 새 캔들 시작)만 캔들 API 요청
+        - 첫 스캔은 마켓 수 / 초당 요청 수만큼 걸리고, 이후에는 대부분 현재가 API만 사용
+        :return: 캔들 API를 요청한 마켓 수
+        """
+        step = INTERVAL_SECONDS.get(self.interval)
+        now = time.time() + KST_OFFSET
+        bucket = now - now % step if step else None
+        stale = [self.markets[t] for t in self.universe()
+                 if self.markets[t].forming is None or bucket is None or self.markets[t].forming[0] < bucket]
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(self._fetch, stale))
+        self._update_prices()
+        return len(stale)
+
+    def scan(self):
+        """
+        전체 마켓을 한 번 훑어 매수/매도 신호가 켜진 마켓을 순위대로 반환
+        순위: 매수 신호 수 많은 순 → 매도 신호 수 적은 순 → 24시간 거래대금 많은 순
+        :return: [{"ticker", "price", "buy": [전략명], "sell": [전략명], "turnover"}, ...]
+        """
+        started = time.monotonic()
+        fetched = self.refresh()
+
+        tickers = []
+        candles = []
+        for ticker in self.universe():
+            market_data = self.markets[ticker]
+            if market_data.forming is None:
+                continue
+            rows = market_data.candles()
+            if len(rows) == self.count:  # 신규 상장 등 캔들이 모자란 마켓은 제외
+                tickers.append(ticker)
+                candles.append(rows)
+        if not tickers:
+            return []
+        batch = np.stack(candles)
+
+        buy_names = [[] for _ in tickers]
+        sell_names = [[] for _ in tickers]
+        for strategy in self.strategies:
+            buy, sell = strategy.signals(batch)
+            name = strategy.__class__.__name__
+            for i in np.flatnonzero(buy[:, -1]):
+                buy_names[i].append(name)
+            for i in np.flatnonzero(sell[:, -1]):
+                sell_names[i].append(name)
+
+        results = [
+            {"ticker": ticker, "price": float(batch[i, -1, 4]), "buy": buy_names[i], "sell": sell_names[i],
+             "turnover": self.turnover.get(ticker, 0.0)}
+            for i, ticker in enumerate(tickers) if buy_names[i] or sell_names[i]
+        ]
+        results.sort(key=lambda r: (-len(r["buy"]), len(r["sell"]), -r["turnover"]))
+        log(f"🔎 마켓 스캔 완료: {len(tickers)}개 마켓, 신호 {len(results)}개, 캔들 요청 {fetched}건 "
+            f"({time.monotonic() - started:.2f}초)", DEBUG)
+        return results
+
+    def select(self, top=5):
+        """
+        매수 신호가 켜진 상위 마켓 (티커 자동 선택용)
+        :param top: 최대 마켓 수
+        :return: 티커 리스트
+        """
+        return [r["ticker"] for r in self.scan() if r["buy"] and not r["sell"]][:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KRW 마켓 전략 신호 스캐너")
+    parser.add_argument("--tickers", nargs="+", default=None, help="스캔할 마켓 (기본: KRW 마켓 전체)")
+    parser.add_argument("--interval", default="minute5", choices=list(INTERVAL_SECONDS))
+    parser.add_argument("--count", type=int, default=25, help="전략에 넘길 캔들 수")
+    parser.add_argument("--top", type=int, default=20, help="출력할 마켓 수")
+    parser.add_argument("--watch", type=float, default=None, help="이 간격(초)으로 반복 스캔")
+    args = parser.parse_args()
+
+    scanner = MarketScanner(args.tickers, interval=args.interval, count=args.count)
+    while True:
+        started = time.monotonic()
+        results = scanner.scan()
+        print(f"\n🔎 {len(scanner.tickers)}개 마켓 스캔 ({time.monotonic() - started:.2f}초), 신호 {len(results)}개")
+        for r in results[:args.top]:
+            signals = " ".join([f"🟢{name}" for name in r["buy"]] + [f"🔴{name}" for name in r["sell"]])
+            print(f"{r['ticker']:<14} {r['price']:>16,.4f}  {signals}")
+        if args.watch is None:
+            break
+        time.sleep(max(0.0, args.watch - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
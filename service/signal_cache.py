@@ -0,0 +1,85 @@
+import threading
+from utils import metrics
+
+
+class SignalCache:
+    """
+    틱별 전략 판단/지표 값 캐시 (마켓별)
+    - 키: 마켓, 마지막 캔들 행(캔들 시각 + 진행 중인 캔들의 시가/고가/저가/종가/거래량), 전략 클래스와 파라미터
+    - 마지막 캔들이 바뀌면(새 캔들 또는 진행 중인 캔들의 가격 변화) 그 마켓의 이전 틱 결과를 버림
+      → 같은 캔들 데이터로는 전략마다 한 번만 계산하고, 거래가 없어 시세가 그대로인 틱은 평가를 건너뜀
+    - 주문 판단(StrategyExecutor), 출력/리포트(main.py), 대시보드가 같은 인스턴스를 읽음
+    여러 Trader(티커)가 하나의 인스턴스를 공유
+    """
+
+    def __init__(self):
+        self.ticks = {}  # 마켓 -> [틱 키, {전략 키: 판단}, 지표 값]
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def tick_key(prices):
+        """
+        :param prices: CandleSeries
+        :return: 틱 키 (캔들 수, 마지막 캔들 행 bytes) - 캔들 배열이 아니면 None (캐시하지 않음)
+        """
+        data = getattr(prices, "data", None)
+        if data is None or not len(data):
+            return None
+        return len(data), data[-1].tobytes()
+
+    @staticmethod
+    def strategy_key(strategy):
+        """
+        :return: (전략 클래스 이름, 파라미터) - 같은 전략이라도 파라미터가 다르면 따로 캐시
+        """
+        params = tuple(sorted((name, value) for name, value in vars(strategy).items()
+                              if not name.startswith("_") and isinstance(value, (bool, int, float, str))))
+        return strategy.__class__.__name__, params
+
+    def _entry(self, ticker, tick):
+        entry = self.ticks.get(ticker)
+        if entry is None or entry[0] != tick:
+            entry = self.ticks[ticker] = [tick, {}, None]  # 새 틱 - 이전 결과 버림
+        return entry
+
+    def decisions(self, ticker, prices):
+        """
+        이번 틱의 판단 저장소 (마지막 캔들이 바뀌었으면 비운 새 저장소)
+        오류/시간 초과 결과는 넣지 않음 - 다음 틱에 다시 평가
+        :return: {전략 키: 판단} dict (캐시할 수 없는 입력이면 None)
+        """
+        tick = self.tick_key(prices)
+        if tick is None:
+            return None
+        with self.lock:
+            return self._entry(ticker, tick)[1]
+
+    def indicators(self, ticker, prices, engine, timestamps=None):
+        """
+        이번 틱의 지표 값 (처음 요청할 때만 engine.sync로 계산)
+        :param engine: IndicatorEngine
+        :param timestamps: engine.sync에 넘길 캔들 시각
+        :return: 지표 이름별 값 dict
+        """
+        tick = self.tick_key(prices)
+        if tick is None:
+            return engine.sync(prices, timestamps)
+        with self.lock:
+            entry = self._entry(ticker, tick)
+            if entry[2] is None:
+                entry[2] = engine.sync(prices, timestamps)
+            return entry[2]
+
+    def latest(self, ticker):
+        """
+        대시보드/리포트용 마지막 틱 결과
+        :return: {"signals": {"전략 이름(파라미터)": 판단}, "indicators": 지표 값} (없으면 None)
+        """
+        with self.lock:
+            entry = self.ticks.get(ticker)
+            if entry is None:
+                return None
+            signals = {f"{name}({', '.join(f'{k}={v}' for k, v in params)})": decision
+                       for (name, params), decision in entry[1].items()}
+            return {"signals": signals,
+                    "indicators": entry[2]}
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+from config.config import STATE_DIR
+from utils.logger import WARNING, log
+
+SNAPSHOT_EVERY = 500  # 저널 기록이 이만큼 쌓이면 스냅샷으로 압축
+
+
+class StateStore:
+    """
+    티커별 거래 상태(포지션, 진행 중인 주문, 지표 상태)를 디스크에 남기는 저장소
+    - 변경은 저널(journal.jsonl)에 한 줄씩 추가하고 fsync (기록 단위가 작아 틱 지연이 거의 없음)
+    - 저널이 snapshot_every 줄을 넘으면 전체 상태를 스냅샷(snapshot.json)으로 교체 저장한 뒤 저널을 비움
+    - 시작 시 스냅샷 + 그 이후 저널만 읽으므로 복원은 수 ms
+    - 기록 도중 중단되어 잘린 마지막 줄은 버림 (그 직전까지의 상태로 복원)
+    여러 Trader(티커)가 하나의 인스턴스를 공유
+    """
+
+    def __init__(self, root=STATE_DIR, snapshot_every=SNAPSHOT_EVERY, fsync=True):
+        """
+        :param root: 저장 디렉터리
+        :param snapshot_every: 스냅샷 주기 (저널 줄 수)
+        :param fsync: 기록마다 디스크까지 동기화 (끄면 빠르지만 OS 장애 시 마지막 기록 유실 가능)
+        """
+        self.root = root
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.journal_path = os.path.join(root, "journal.jsonl")
+        self.snapshot_path = os.path.join(root, "snapshot.json")
+        self.state = {}  # 티커 -> {종류: 값}
+        self.seq = 0  # 마지막 기록 번호
+        self.pending = 0  # 스냅샷 이후 저널 줄 수
+        self.lock = threading.Lock()
+        self.journal = None
+        self.load()
+
+    def load(self):
+        """
+        스냅샷과 저널로 상태 복원
+        :return: 티커별 상태 dict
+        """
+        started = time.perf_counter()
+        self.state = {}
+        self.seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.state = snapshot["state"]
+            self.seq = snapshot["seq"]
+
+        self.pending = 0
+        valid = 0  # 온전한 줄까지의 바이트 수
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        log(f"⚠️ 상태 저널의 잘린 기록 무시 ({self.journal_path})", WARNING)
+                        break
+                    valid += len(line)
+                    self.pending += 1
+                    if record["seq"] <= self.seq:
+                        continue  # 스냅샷에 이미 반영된 기록 (저널 정리 전에 중단된 경우)
+                    self.state.setdefault(record["ticker"], {})[record["kind"]] = record["data"]
+                    self.seq = record["seq"]
+            if valid != os.path.getsize(self.journal_path):
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid)
+        log(f"💾 거래 상태 복원: {len(self.state)}개 마켓, 기록 {self.seq}건 "
+            f"({(time.perf_counter() - started) * 1000:.1f}ms)")
+        return self.state
+
+    def get(self, ticker):
+        """
+        :return: 티커의 상태 dict (예: {"position": ..., "order": ..., "indicators": ...})
+        """
+        with self.lock:
+            return dict(self.state.get(ticker, {}))
+
+    def record(self, ticker, kind, data):
+        """
+        상태 한 항목 변경을 저널에 기록
+        :param kind: 항목 종류 (예: "position", "order", "indicators")
+        :param data: JSON으로 저장 가능한 값 (None이면 항목 비움)
+        """
+        with self.lock:
+            self.seq += 1
+            line = json.dumps({"seq": self.seq, "ticker": ticker, "kind": kind, "data": data},
+                              ensure_ascii=False, separators=(",", ":"))
+            if self.journal is None:
+                os.makedirs(self.root, exist_ok=True)
+                self.journal = open(self.journal_path, "a", encoding="utf-8")
+            self.journal.write(line + "\n")
+            self.journal.flush()
+            if self.fsync:
+                os.fsync(self.journal.fileno())
+            self.state.setdefault(ticker, {})[kind] = data
+            self.pending += 1
+            if self.pending >= self.snapshot_every:
+                self._snapshot()
+
+    def snapshot(self):
+        """전체 상태를 스냅샷으로 저장하고 저널 비우기"""
+        with self.lock:
+            self._snapshot()
+
+    def _snapshot(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": self.seq, "state": self.state}, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)  # 교체 전에 중단되면 이전 스냅샷 + 저널로 복원
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = open(self.journal_path, "w", encoding="utf-8")
+        self.pending = 0
+
+    def close(self):
+        """스냅샷 저장 후 저널 닫기 (정상 종료 시)"""
+        with self.lock:
+            self._snapshot()
+            self.journal.close()
+            self.journal = None
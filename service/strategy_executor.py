@@ -0,0 +1,164 @@
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from utils import metrics
+from utils.logger import DEBUG, WARNING, ERROR, is_enabled, log
+
+DEFAULT_BUDGET = 1.0  # 전략 한 번 평가에 허용하는 시간(초)
+
+# 워커 프로세스 전역 상태 (풀 생성 시 한 번만 받은 전략 인스턴스)
+_strategies = None
+
+
+def _init_worker(payload):
+    global _strategies
+    _strategies = pickle.loads(payload)
+
+
+def _evaluate(index, prices):
+    strategy = _strategies[index]
+    started = time.perf_counter()
+    buy = bool(strategy.should_buy(prices))
+    sell = bool(strategy.should_sell(prices))
+    return buy, sell, time.perf_counter() - started
+
+
+class StrategyExecutor:
+    """
+    틱마다 전략들의 매수/매도 조건을 평가하는 실행기
+    - heavy = True 전략은 프로세스 풀에서, 나머지는 호출 스레드에서 평가
+    - 프로세스 풀 전략을 먼저 제출하고 가벼운 전략을 평가하는 동안 함께 계산
+    - 전략마다 budget(초) 안에 끝나지 않은 평가는 결과를 버리고 이번 틱은 신호 없음으로 처리
+    - 한 전략의 예외/지연이 다른 전략의 판단을 막지 않음
+    """
+
+    def __init__(self, strategies, budget=DEFAULT_BUDGET, workers=None, cache=None, ticker=None):
+        """
+        :param strategies: 전략 리스트 (Trader와 같은 순서)
+        :param budget: 전략별 budget 속성이 없을 때 쓸 기본 시간 제한(초)
+        :param workers: 프로세스 풀 크기 (기본: heavy 전략 수)
+        :param cache: SignalCache - 있으면 같은 틱(캔들 데이터)에서 이미 나온 판단을 재사용하고 새 판단을 저장
+        :param ticker: 캐시 키로 쓸 마켓
+        """
+        self.strategies = strategies
+        self.cache = cache
+        self.ticker = ticker
+        # 전략별 캐시 키 (전략 파라미터는 생성 후 바뀌지 않음 - 최적화기도 조합마다 새 인스턴스 생성)
+        self.keys = [cache.strategy_key(s) for s in strategies] if cache is not None else None
+        self.budget = budget
+        self.heavy = [i for i, s in enumerate(strategies) if s.heavy]
+        self.workers = workers or len(self.heavy)
+        self.pool = None
+        self.running = {}  # 전략 인덱스별 아직 끝나지 않은 future (시간 초과 후에도 워커에서 실행 중)
+
+    def _budget(self, strategy):
+        return strategy.budget if strategy.budget is not None else self.budget
+
+    def _get_pool(self):
+        if self.pool is None:
+            payload = pickle.dumps(self.strategies)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(payload,))
+        return self.pool
+
+    def _result(self, buy=False, sell=False, elapsed=0.0, error=None):
+        if error:
+            buy = sell = False
+        return {"buy": buy, "sell": sell, "elapsed": elapsed, "error": error}
+
+    def evaluate(self, prices):
+        """
+        모든 전략의 현재 틱 매수/매도 조건 평가
+        :param prices: 가격 리스트 (마지막 값이 현재가)
+        캐시가 있으면 같은 틱에 이미 평가한 전략은 다시 계산하지 않음
+        :return: 전략 순서대로 {"buy", "sell", "elapsed", "error"} dict 리스트
+                 error는 예외 메시지 또는 "timeout"/"busy" (이때 buy/sell은 False)
+        """
+        started = time.monotonic()
+        results = [None] * len(self.strategies)
+        decided = self.cache.decisions(self.ticker, prices) if self.cache is not None else None
+        cached = set()
+        if decided is not None:
+            for i, key in enumerate(self.keys):
+                if results[i] is None and key in decided:
+                    results[i] = decided[key]
+                    cached.add(i)
+            metrics.inc("signal_cache_total", len(cached), result="hit")
+            metrics.inc("signal_cache_total", len(self.strategies) - len(cached), result="miss")
+
+        # 1) 무거운 전략은 프로세스 풀에 먼저 제출
+        futures = {}
+        for i in self.heavy:
+            if results[i] is not None:
+                continue
+            previous = self.running.get(i)
+            if previous is not None and not previous.done():
+                results[i] = self._result(error="busy")
+                continue
+            try:
+                futures[i] = self.running[i] = self._get_pool().submit(_evaluate, i, prices)
+            except BrokenProcessPool as e:
+                self.close()
+                results[i] = self._result(error=str(e) or "broken pool")
+
+        # 2) 가벼운 전략은 그동안 호출 스레드에서 평가
+        for i, strategy in enumerate(self.strategies):
+            if strategy.heavy or results[i] is not None:
+                continue
+            begin = time.perf_counter()
+            try:
+                buy = bool(strategy.should_buy(prices))
+                sell = bool(strategy.should_sell(prices))
+                elapsed = time.perf_counter() - begin
+                over = elapsed > self._budget(strategy)
+                results[i] = self._result(buy, sell, elapsed, "timeout" if over else None)
+            except Exception as e:
+                results[i] = self._result(elapsed=time.perf_counter() - begin, error=str(e) or type(e).__name__)
+
+        # 3) 프로세스 풀 결과를 전략별 시간 제한까지만 대기
+        for i, future in futures.items():
+            strategy = self.strategies[i]
+            remaining = started + self._budget(strategy) - time.monotonic()
+            try:
+                buy, sell, elapsed = future.result(timeout=max(0.0, remaining))
+                results[i] = self._result(buy, sell, elapsed)
+            except FutureTimeoutError:
+                future.cancel()
+                results[i] = self._result(elapsed=time.monotonic() - started, error="timeout")
+            except BrokenProcessPool as e:
+                self.close()
+                results[i] = self._result(error=str(e) or "broken pool")
+            except Exception as e:
+                results[i] = self._result(error=str(e) or type(e).__name__)
+
+        for i, (strategy, result) in enumerate(zip(self.strategies, results)):
+            name = strategy.__class__.__name__
+            if i in cached:
+                continue  # 이번 틱에 이미 평가한 결과
+            if decided is not None and not result["error"]:
+                decided[self.keys[i]] = result
+            if result["error"]:
+                metrics.inc("strategy_errors_total", strategy=name,
+                            kind=result["error"] if result["error"] in ("timeout", "busy") else "exception")
+            else:
+                metrics.observe("strategy_seconds", result["elapsed"], strategy=name)
+            if result["error"] == "timeout":
+                log(f"⏱️ [{name}] 시간 제한 {self._budget(strategy)}초 초과 - 이번 틱 신호 무시", WARNING)
+            elif result["error"] == "busy":
+                log(f"⏱️ [{name}] 이전 평가가 아직 진행 중 - 이번 틱 신호 무시", WARNING)
+            elif result["error"]:
+                log(f"❗ [{name}] 전략 평가 오류: {result['error']}", ERROR)
+            elif is_enabled(DEBUG):
+                log(f"⏱️ [{name}] 평가 {result['elapsed'] * 1000:.2f}ms", DEBUG)
+        return results
+
+    def close(self):
+        """
+        프로세스 풀 종료 (다시 evaluate 하면 새로 생성)
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = None
+        self.running = {}
@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import websockets
+from config.config import TICKERS
+from service.candle_store import INTERVAL_SECONDS
+from service.market_data import KST_OFFSET
+from utils import metrics
+from utils.logger import DEBUG, ERROR, log
+
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+
+
+class CandleAggregator:
+    """
+    체결 데이터를 캔들로 묶는 집계기
+    확정된 캔들은 drain() 할 때까지 보관하므로 이벤트를 건너뛰어도 캔들은 잃지 않음
+    """
+
+    def __init__(self, step):
+        """
+        :param step: 캔들 간격(초)
+        """
+        self.step = step
+        self.closed = []
+        self.forming = None  # [timestamp, open, high, low, close, volume]
+
+    def seed(self, row):
+        """
+        REST로 받은 진행 중 캔들로 시가/고가/저가 보정 (스트림 연결 전 체결 반영)
+        :param row: (timestamp, open, high, low, close, volume)
+        """
+        row = [float(v) for v in row]
+        if self.forming is None:
+            self.forming = row
+        elif self.forming[0] == row[0]:
+            self.forming[1] = row[1]
+            self.forming[2] = max(self.forming[2], row[2])
+            self.forming[3] = min(self.forming[3], row[3])
+            self.forming[5] = max(self.forming[5], row[5])
+
+    def add_trade(self, timestamp, price, volume):
+        """
+        체결 한 건 반영
+        :param timestamp: 체결 시각 (KST 기준 epoch 초)
+        :param price: 체결가
+        :param volume: 체결량
+        :return: 이번 체결로 이전 캔들이 확정되었으면 True
+        """
+        bucket = timestamp - timestamp % self.step
+        if self.forming is None:
+            self.forming = [bucket, price, price, price, price, volume]
+            return False
+        if bucket < self.forming[0]:
+            return False  # 이미 확정된 캔들의 늦은 체결은 무시
+        if bucket > self.forming[0]:
+            self.closed.append(self.forming)
+            self.forming = [bucket, price, price, price, price, volume]
+            return True
+        candle = self.forming
+        candle[2] = max(candle[2], price)
+        candle[3] = min(candle[3], price)
+        candle[4] = price
+        candle[5] += volume
+        return False
+
+    def drain(self):
+        """
+        :return: 마지막 drain 이후 확정된 캔들 + 진행 중인 캔들 (N, 6) 배열
+        """
+        rows = np.array(self.closed + [self.forming], dtype=np.float64)
+        self.closed = []
+        return rows
+
+
+class StreamFeed:
+    """
+    업비트 체결(trade) 웹소켓 피드
+    체결마다 티커별 집계기를 갱신하고 구독자에게 (ticker, closed) 이벤트를 전달
+    """
+
+    def __init__(self, tickers, interval="minute1", url=UPBIT_WS_URL):
+        self.tickers = list(tickers)
+        self.url = url
+        self.aggregators = {t: CandleAggregator(INTERVAL_SECONDS[interval]) for t in self.tickers}
+        self.handlers = []
+
+    def subscribe(self, handler):
+        """
+        이벤트 구독
+        :param handler: handler(ticker, closed) - closed는 캔들 확정 여부
+        """
+        self.handlers.append(handler)
+
+    def handle(self, message):
+        data = json.loads(message)
+        if data.get("type") != "trade":
+            return
+        ticker = data["code"]
+        aggregator = self.aggregators.get(ticker)
+        if aggregator is None:
+            return
+        timestamp = data["trade_timestamp"] / 1000 + KST_OFFSET
+        closed = aggregator.add_trade(timestamp, float(data["trade_price"]), float(data["trade_volume"]))
+        for handler in self.handlers:
+            handler(ticker, closed)
+
+    async def run(self, retry_delay=1, max_delay=30):
+        """
+        웹소켓 수신 루프 (끊기면 지수 백오프로 재연결)
+        """
+        delay = retry_delay
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=60) as ws:
+                    await ws.send(json.dumps([
+                        {"ticket": str(uuid.uuid4())},
+                        {"type": "trade", "codes": self.tickers},
+                    ]))
+                    log(f"🔌 웹소켓 연결됨: {self.url} ({len(self.tickers)}개 마켓)")
+                    delay = retry_delay
+                    async for message in ws:
+                        self.handle(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log(f"❌ 웹소켓 오류 - {str(e)} - {delay}초 후 재연결", ERROR)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+def base_interval(market_data):
+    """
+    스트림으로 집계할 캔들 간격 (MultiTimeframeData면 기준 간격, 아니면 market_data.interval)
+    """
+    return getattr(market_data, "base", market_data).interval
+
+
+async def run_stream(traders, feed, workers=None):
+    """
+    스트림 이벤트마다 전략을 평가하는 런타임
+    - 시작 시 REST로 한 번 이력을 채운 뒤 이후에는 스트림만 사용
+    - 티커별 평가가 진행 중이면 새 체결 이벤트는 합쳐서 다음 평가에 반영
+    :param traders: 티커별 Trader 리스트 (market_data의 기준 간격은 feed와 같아야 함 - base_interval())
+    :param feed: StreamFeed
+    """
+    loop = asyncio.get_running_loop()
+    events = {trader.ticker: asyncio.Event() for trader in traders}
+    feed.subscribe(lambda ticker, closed: events[ticker].set())
+
+    def process(trader, rows):
+        prices = trader.market_data.apply(rows)
+        if len(prices) >= 20:
+            trader.step(prices)
+
+    async def worker(trader, executor):
+        aggregator = feed.aggregators[trader.ticker]
+        await loop.run_in_executor(executor, trader.market_data.get_prices)
+        aggregator.seed(trader.market_data.forming)
+        while True:
+            await events[trader.ticker].wait()
+            events[trader.ticker].clear()
+            started = time.monotonic()
+            try:
+                await loop.run_in_executor(executor, process, trader, aggregator.drain())
+                log(f"⏱️ [{trader.ticker}] 스트림 이벤트 처리 {(time.monotonic() - started) * 1000:.1f}ms", DEBUG)
+            except Exception as e:
+                log(f"❗ [{trader.ticker}] 스트림 처리 오류: {str(e)}", ERROR)
+
+    with ThreadPoolExecutor(max_workers=workers or min(len(traders), 32)) as executor:
+        await asyncio.gather(feed.run(), *(worker(trader, executor) for trader in traders))
+
+
+async def record(tickers, path, url=UPBIT_WS_URL, duration=None, types=("trade",)):
+    """
+    웹소켓 체결 메시지를 JSON Lines 파일로 녹화 (replay 서버 입력용)
+    :param types: 녹화할 메시지 종류 ("orderbook"을 넣으면 모의 거래소 슬리피지 계산용 호가도 녹화)
+    """
+    started = time.monotonic()
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps([{"ticket": str(uuid.uuid4())}]
+                                 + [{"type": kind, "codes": list(tickers)} for kind in types]))
+        with open(path, "a", encoding="utf-8") as f:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    message = message.decode("utf-8")
+                f.write(message.strip() + "\n")
+                if duration and time.monotonic() - started > duration:
+                    break
+
+
+async def serve_replay(path, host="127.0.0.1", port=8765, speed=None):
+    """
+    녹화된 메시지를 재생하는 로컬 웹소켓 서버 (업비트 서버 대역)
+    :param path: record()로 만든 JSON Lines 파일
+    :param speed: 재생 배속 (None이면 대기 없이 최대 속도)
+    """
+    with open(path, encoding="utf-8") as f:
+        messages = [line.strip() for line in f if line.strip()]
+
+    async def handler(ws):
+        request = json.loads(await ws.recv())
+        codes = set(next(r["codes"] for r in request if r.get("type") == "trade"))
+        previous = None
+        for message in messages:
+            data = json.loads(message)
+            if data.get("code") not in codes:
+                continue
+            if speed and previous is not None:
+                await asyncio.sleep(max(0.0, (data["trade_timestamp"] - previous) / 1000 / speed))
+            previous = data["trade_timestamp"]
+            await ws.send(message.encode("utf-8"))  # 업비트와 같이 바이너리 프레임으로 전송
+
+    async with websockets.serve(handler, host, port):
+        log(f"🎞️ 재생 서버 시작: ws://{host}:{port} ({len(messages)}개 메시지)")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웹소켓 스트리밍 자동매매")
+    parser.add_argument("--tickers", nargs="+", default=TICKERS)
+    parser.add_argument("--interval", default="minute1", choices=list(INTERVAL_SECONDS))
+    parser.add_argument("--url", default=UPBIT_WS_URL, help="웹소켓 주소 (재생 서버 사용 시 ws://127.0.0.1:8765)")
+    parser.add_argument("--record", help="거래 대신 체결 메시지를 이 파일에 녹화")
+    parser.add_argument("--serve", help="이 녹화 파일을 재생하는 로컬 웹소켓 서버 실행")
+    parser.add_argument("--speed", type=float, default=None, help="재생 배속 (기본: 최대 속도)")
+    parser.add_argument("--orderbook", action="store_true", help="녹화 시 호가(orderbook) 메시지도 함께 녹화")
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve_replay(args.serve, speed=args.speed))
+    elif args.record:
+        types = ("trade", "orderbook") if args.orderbook else ("trade",)
+        asyncio.run(record(args.tickers, args.record, args.url, types=types))
+    else:
+        from service.async_runtime import build_traders
+        metrics.start()
+        traders = build_traders(args.tickers, interval=args.interval)
+        interval = base_interval(traders[0].market_data)
+        asyncio.run(run_stream(traders, StreamFeed(args.tickers, interval, args.url)))
+
+
+if __name__ == "__main__":
+    main()
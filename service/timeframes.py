@@ -0,0 +1,196 @@
+import numpy as np
+from service.candle_buffer import CandleBuffer
+from service.candle_store import INTERVAL_SECONDS
+from service.market_data import KST_OFFSET, MarketData
+from strategy.candle_series import CLOSE, HIGH, LOW, OHLCV_COLUMNS, OPEN, VOLUME, CandleSeries
+from utils.logger import WARNING, log
+
+# 업비트 캔들 구간은 UTC 기준으로 나뉨 (일봉은 09:00 KST 시작, 주봉은 월요일 시작 - epoch은 목요일)
+BUCKET_ORIGIN = {"week": 4 * 86400}
+
+
+def bucket_start(timestamps, interval):
+    """
+    캔들 시각이 속하는 interval 캔들의 시작 시각
+    :param timestamps: KST 기준 epoch 초 (스칼라 또는 배열)
+    """
+    step = INTERVAL_SECONDS[interval]
+    shift = KST_OFFSET + BUCKET_ORIGIN.get(interval, 0)
+    return (timestamps - shift) // step * step + shift
+
+
+def resample(ohlcv, interval):
+    """
+    작은 간격 캔들을 interval 캔들로 합침 (시가는 첫 캔들, 종가는 마지막 캔들, 고가/저가는 최대/최소, 거래량은 합)
+    :param ohlcv: (N, 6) 배열 (시각 오름차순)
+    :return: (M, 6) 배열 - 거래가 있었던 구간만 (업비트 캔들 API와 같음)
+    """
+    data = np.asarray(ohlcv, dtype=np.float64)
+    if not len(data):
+        return np.empty((0, len(OHLCV_COLUMNS)))
+    buckets = bucket_start(data[:, 0], interval)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.append(starts[1:], len(data)) - 1
+    out = np.empty((len(starts), len(OHLCV_COLUMNS)))
+    out[:, 0] = buckets[starts]
+    out[:, OPEN] = data[starts, OPEN]
+    out[:, HIGH] = np.maximum.reduceat(data[:, HIGH], starts)
+    out[:, LOW] = np.minimum.reduceat(data[:, LOW], starts)
+    out[:, CLOSE] = data[ends, CLOSE]
+    out[:, VOLUME] = np.add.reduceat(data[:, VOLUME], starts)
+    return out
+
+
+def check_intervals(intervals):
+    """
+    프로세스 안에서 합칠 수 있는 간격인지 확인
+    월봉은 구간 길이가 달라 고정 간격으로 합칠 수 없음 (주 간격으로만 사용 가능)
+    :raises ValueError: INTERVAL_SECONDS에 없는 간격
+    """
+    unsupported = sorted(set(intervals) - set(INTERVAL_SECONDS))
+    if unsupported:
+        raise ValueError(f"다중 시간대에서 지원하지 않는 캔들 간격: {', '.join(unsupported)} "
+                         f"(지원: {', '.join(INTERVAL_SECONDS)})")
+
+
+def strategy_timeframes(strategies):
+    """
+    :return: 전략들이 선언한 추가 캔들 간격 집합
+    """
+    return {interval for strategy in strategies for interval in strategy.timeframes}
+
+
+class MultiTimeframeData:
+    """
+    가장 작은 간격 하나만 요청하고 큰 간격 캔들은 프로세스 안에서 만들어 주는 시세 데이터 (MarketData와 같은 인터페이스)
+    - 틱마다 기준 간격 캔들 API 한 번만 요청 - 사용하는 간격 수와 관계없이 요청 수 일정
+    - 큰 간격은 바뀐 구간(직전 틱의 진행 중 캔들이 속한 구간부터)만 다시 합쳐 링 버퍼에 반영
+    - get_prices() / fetch() / apply()는 주 간격 CandleSeries를 돌려주고, 다른 간격은 prices.frame(interval)로 조회
+      (모든 간격이 같은 시점까지 맞춰져 있고, 틱마다 한 번 만든 view를 모든 전략이 공유)
+    - 기준 간격 창보다 오래된 큰 간격 캔들은 시작할 때 history로 한 번만 받음
+    """
+
+    def __init__(self, base, intervals, interval=None, count=25, history=None):
+        """
+        :param base: 기준(가장 작은) 간격 MarketData - count는 base_count() 이상
+        :param intervals: 전략이 쓰는 간격들 (기준 간격의 배수)
+        :param interval: 주 간격 (get_prices()가 돌려주는 간격, 기본: 기준 간격)
+        :param count: 간격별로 전략에 넘길 캔들 수
+        :param history: (ticker, interval, count, limiter=) -> (N, 6) 배열 - 큰 간격 과거 캔들 조회 (upbit_api.get_candles와 같은 인자,
+                        None이면 기준 간격 창에서만 만듦)
+        """
+        self.base = base
+        self.ticker = base.ticker
+        self.interval = interval or base.interval
+        self.count = count
+        self.history = history
+        check_intervals(set(intervals) | {self.interval, base.interval})
+        step = INTERVAL_SECONDS[base.interval]
+        self.frames = {}  # 간격별 링 버퍼 (기준 간격 제외)
+        for name in set(intervals) | {self.interval}:
+            if name == base.interval:
+                continue
+            if INTERVAL_SECONDS[name] % step:
+                raise ValueError(f"{name}은 기준 간격 {base.interval}의 배수가 아닙니다")
+            self.frames[name] = CandleBuffer(count)
+        self.synced = None  # 마지막으로 반영한 기준 간격 진행 중 캔들 시각
+        self.timestamps = []
+
+    @staticmethod
+    def base_count(base_interval, intervals, interval, count=25):
+        """
+        기준 간격 MarketData에 필요한 캔들 수
+        (주 간격 count 개 + 가장 큰 간격의 진행 중 캔들 전체를 항상 창 안에 둠)
+        """
+        step = INTERVAL_SECONDS[base_interval]
+        ratios = [INTERVAL_SECONDS[name] // step for name in set(intervals) | {interval}]
+        return max(count * INTERVAL_SECONDS[interval] // step, max(ratios) + 1)
+
+    def _seed(self, name, buffer, before):
+        rows = self.history(self.ticker, name, self.count, limiter=getattr(self.base, "limiter", None))
+        buffer.extend(rows[rows[:, 0] < before])
+
+    def _update(self, series):
+        """
+        기준 간격 캔들 창으로 큰 간격 캔들 갱신
+        - 창의 첫 구간은 일부만 들어 있을 수 있으므로 그다음 구간부터 계산
+        """
+        data = series.data
+        timestamps = data[:, 0]
+        for name, buffer in self.frames.items():
+            complete = bucket_start(timestamps[0], name) + INTERVAL_SECONDS[name]  # 창 안에 온전히 있는 첫 구간
+            if not len(buffer) and self.history is not None:
+                try:
+                    self._seed(name, buffer, complete)
+                except Exception as e:
+                    log(f"⚠️ [{self.ticker}] {name} 과거 캔들 조회 실패 - 기준 캔들로만 계산: {e}", WARNING)
+            changed = complete if self.synced is None else max(complete, bucket_start(self.synced, name))
+            buffer.rewind(changed)
+            buffer.extend(resample(data[np.searchsorted(timestamps, changed):], name))
+        self.synced = timestamps[-1]
+
+    def series(self, base_series):
+        """
+        간격별 최근 count 개 캔들을 묶은 주 간격 CandleSeries
+        """
+        frames = {name: buffer.window() for name, buffer in self.frames.items()}
+        frames[self.base.interval] = base_series[-self.count:]
+        primary = frames[self.interval]
+        self.timestamps = primary.timestamp
+        return CandleSeries(primary.data, frames)
+
+    def _combine(self, base_series):
+        self._update(base_series)
+        return self.series(base_series)
+
+    @property
+    def forming(self):
+        """기준 간격의 진행 중인 캔들 (스트림 집계기 시작값)"""
+        return self.base.forming
+
+    def apply(self, rows):
+        """
+        기준 간격 캔들을 반영하고 모든 간격을 갱신 (스트림 피드용, MarketData.apply와 같음)
+        :param rows: 기준 간격 (N, 6) 캔들 배열 (마지막 행은 진행 중인 캔들)
+        :return: 주 간격 CandleSeries
+        """
+        return self._combine(self.base.apply(rows))
+
+    def fetch(self):
+        """
+        기준 간격 캔들 한 번 요청 (재시도 없음)
+        :return: (응답 캔들 배열, 주 간격 CandleSeries) - 응답이 비었으면 CandleSeries는 None
+        """
+        rows, base_series = self.base.fetch()
+        if base_series is None:
+            return rows, None
+        return rows, self._combine(base_series)
+
+    def get_prices(self, retry=5):
+        """
+        기준 간격 캔들을 받아 모든 간격을 갱신
+        :return: 주 간격 CandleSeries (prices.frame(interval)로 다른 간격 조회)
+        """
+        return self._combine(self.base.get_prices(retry))
+
+
+def build_market_data(ticker, strategies, interval="minute5", count=25, store=None, limiter=None, source=None,
+                      clock=None):
+    """
+    전략이 선언한 간격에 맞는 시세 데이터 생성
+    - 추가 간격이 없으면 MarketData
+    - 있으면 가장 작은 간격 하나만 요청하는 MultiTimeframeData (스트림 피드는 기준 간격 market_data.base.interval로 집계)
+    :param interval: 주 간격 (Trader가 지표를 계산하는 간격)
+    :param source: 캔들 조회 함수 (기본: upbit_api.get_candles, 기록/재생 시 교체)
+    :param clock: time()/sleep() 제공자
+    """
+    intervals = strategy_timeframes(strategies)
+    if not intervals - {interval}:
+        return MarketData(ticker, interval=interval, count=count, store=store, limiter=limiter, source=source,
+                          clock=clock)
+    check_intervals(intervals | {interval})
+    base = min(intervals | {interval}, key=INTERVAL_SECONDS.get)
+    base_count = MultiTimeframeData.base_count(base, intervals, interval, count)
+    base_data = MarketData(ticker, interval=base, count=base_count, store=store, limiter=limiter, source=source,
+                           clock=clock)
+    return MultiTimeframeData(base_data, intervals, interval, count, history=base_data.source)
@@ -1,5 +1,6 @@
-import pyupbit
+import math
 import time
+import uuid
 from config.config import ACCESS_KEY, SECRET_KEY, TICKER
 from strategy.moving_average import (
     MovingAverageRSIStrategy,
@@ -8,113 +9,267 @@ from strategy.moving_average import (
     MACDStrategy,
     BollingerBandStrategy
 )
-from utils.logger import log
+from service.account import AccountState
+from service.order_manager import OrderManager
+from service.portfolio import MIN_SELL_VOLUME, Portfolio
+from service.signal_cache import SignalCache
+from service.strategy_executor import StrategyExecutor
+from service.upbit_api import LazyUpbit
+from strategy.indicators import IndicatorEngine
+from utils import metrics
+from utils.logger import DEBUG, WARNING, ERROR, is_enabled, log
 from utils.logger_trade import init_trade_log, log_trade
 
 class Trader:
-    def __init__(self, strategies, market_data):
+    def __init__(self, strategies, market_data, ticker=TICKER, upbit=None, account=None, clock=None,
+                 executor=None, orders=None, state=None, portfolio=None, signals=None):
         self.strategies = strategies  # 전략 리스트
         self.market_data = market_data  # 시세 데이터
-        self.upbit = pyupbit.Upbit(ACCESS_KEY, SECRET_KEY)
-        self.current_position = None  # 현재 매수한 전략을 추적
+        self.ticker = ticker  # 거래 대상 마켓
+        self.upbit = upbit or LazyUpbit(ACCESS_KEY, SECRET_KEY)  # 여러 Trader가 공유 가능
+        self.clock = clock or time  # sleep()/time() 제공자 (모의 거래 시 가상 시계)
+        self.account = account or AccountState(self.upbit, clock=self.clock)  # 잔고 캐시 (같은 계좌면 공유)
+        self.pending = None  # 체결을 기다리는 주문 (끝날 때까지 새 주문 금지)
+        self.engine = IndicatorEngine()  # 모든 전략이 공유하는 지표 엔진
+        for strategy in self.strategies:
+            strategy.bind(self.engine)
+        self.signals = signals or SignalCache()  # 틱별 전략 판단/지표 값 캐시 (출력/대시보드와 공유)
+        # 전략 평가 (시간 제한, 프로세스 풀, 같은 틱 판단은 캐시 재사용)
+        self.executor = executor or StrategyExecutor(self.strategies, cache=self.signals, ticker=ticker)
+        self.orders = orders or OrderManager(self.upbit, self.account, self.clock)  # 주문 전송/체결 추적
+        self.portfolio = portfolio or Portfolio(self.account, [s.__class__.__name__ for s in strategies])  # 전략별 포지션/자금 배분
+        self.state = state  # StateStore - 있으면 포지션/주문/지표 상태를 남기고 재시작 시 복원
+        self.saved_timestamp = None  # 마지막으로 저장한 지표 상태의 캔들 시각
         init_trade_log()
+        if self.state is not None:
+            self.restore()
         log("🚀 자동매매 시작됨")
 
+    def restore(self):
+        """
+        저장된 상태로 재시작 (지표 상태, 전략별 포지션, 진행 중이던 주문) 후 거래소 잔고와 맞춤
+        - 진행 중이던 주문은 identifier로 다시 찾아 체결까지 추적 (거래소에 없으면 다시 보내지 않음)
+        - 장부상 수량보다 코인이 적으면(재시작 사이 수동 매도 등) 포지션 수량을 비율대로 줄이고, 없으면 해제
+        - 포지션이 없는데 코인이 있으면 어느 전략의 것인지 알 수 없으므로 경고만 남김
+        """
+        saved = self.state.get(self.ticker)
+        if saved.get("indicators") and self.engine.restore(saved["indicators"]):
+            self.saved_timestamp = self.engine.last_timestamp
+        names = {s.__class__.__name__ for s in self.strategies}
+        positions = saved.get("positions") or {}
+        legacy = saved.get("position")  # 이전 형식: 전략 이름 하나 (수량은 코인 잔고 전체)
+        for name in [name for name in positions if name not in names] + ([legacy] if legacy not in names else []):
+            if name is not None:
+                log(f"⚠️ [{self.ticker}] 저장된 포지션의 전략({name})이 없어 해제", WARNING)
+        self.portfolio.restore(self.ticker, {k: v for k, v in positions.items() if k in names})
+        order = saved.get("order")
+        if order:
+            self.pending = self.orders.recover(self.ticker, order["side"], order["amount"], order["identifier"],
+                                               order["strategy"])
+            self.settle()
+        if self.pending is None:
+            coin = self.ticker.split("-")[1]
+            held = self.get_balance(coin)
+            booked = self.portfolio.volume_of(self.ticker)
+            if legacy in names and not booked and held > MIN_SELL_VOLUME:
+                self.portfolio.open(self.ticker, legacy, held, float("nan"))  # 진입가를 모르므로 손절/익절 제외
+                self.record_positions()
+            elif booked and held <= MIN_SELL_VOLUME:
+                log(f"⚠️ [{self.ticker}] 포지션이 있지만 {coin} 잔고가 없어 해제", WARNING)
+                self.portfolio.scale(self.ticker, 0.0)
+                self.record_positions()
+            elif booked > held * 1.000001:
+                log(f"⚠️ [{self.ticker}] {coin} 잔고({held:.8f})가 장부({booked:.8f})보다 적어 포지션 수량 조정", WARNING)
+                self.portfolio.scale(self.ticker, held / booked)
+                self.record_positions()
+            elif not booked and held > MIN_SELL_VOLUME:
+                log(f"⚠️ [{self.ticker}] 포지션 기록 없이 {coin} {held:.8f} 보유 중 - 자동 매도하지 않음", WARNING)
+        if legacy is not None and self.pending is None:
+            self.state.record(self.ticker, "position", None)  # 이전 형식은 positions로 옮겼으므로 비움
+        log(f"💾 [{self.ticker}] 상태 복원: 포지션 {', '.join(self.portfolio.holders(self.ticker)) or '없음'}, "
+            f"진행 중 주문 {'있음' if self.pending else '없음'}")
+
+    def record_positions(self):
+        """이 마켓의 전략별 포지션을 상태 저장소에 기록"""
+        if self.state is not None:
+            self.state.record(self.ticker, "positions", self.portfolio.snapshot(self.ticker))
+
     def get_balance(self, currency):
         try:
-            balances = self.upbit.get_balances()
-            for b in balances:
-                if b['currency'] == currency:
-                    return float(b['balance'])
+            with metrics.timer("stage_seconds", stage="balance"):
+                return self.account.get(currency)
         except Exception as e:
-            log(f"❌ 잔고 조회 실패: {e}")
+            log(f"❌ 잔고 조회 실패: {e}", ERROR)
         return 0
 
-    def place_order_with_retry(self, order_function, ticker, amount, retries=3):
-        for _ in range(retries):
+    def settle(self):
+        """
+        끝난 주문의 실제 체결 결과로 포지션 갱신
+        - 매수: 체결 수량만큼 그 전략의 포지션 (평균 진입가)
+        - 매도: 체결 수량만큼 그 전략의 포지션 감소, 남은 수량은 다음 매도 신호에서 처리
+        - 미체결로 끝난 주문(거부, 재시도 초과, 취소)은 포지션을 바꾸지 않음
+        - 체결가를 알 수 없는 매수(체결 내역 없는 응답)는 포지션을 열지 않음
+        """
+        order = self.pending
+        if order is None or not order.final:
+            return
+        self.pending = None
+        if self.state is not None:
+            self.state.record(self.ticker, "order", None)
+        strategy_name = order.strategy
+        buy = order.side == "bid"
+        if order.executed_volume <= 0:
+            log(f"❌ [{strategy_name}] {'매수' if buy else '매도'} 주문 실패 ({order.state}): {order.error}", ERROR)
+            return
+
+        if buy and math.isnan(order.price):
+            # 진입가 0으로 열면 손절/익절 수익률이 무한대가 되므로 포지션을 열지 않음 (잔고는 다음 동기화 때 확인)
+            log(f"❌ [{strategy_name}] 매수 체결가를 알 수 없어 포지션을 열지 않음: {order.executed_volume:.8f} "
+                f"({order.uuid})", ERROR)
+            return
+
+        log_trade("buy" if buy else "sell", order.price, order.executed_volume, self.ticker, strategy_name,
+                  order.finished_at)
+        if buy:
+            self.portfolio.open(self.ticker, strategy_name, order.executed_volume, order.price)
+            log(f"✅ [{strategy_name}] 매수 체결: {order.executed_volume:.8f} @ {order.price:,.4f}")
+        else:
+            left = self.portfolio.reduce(self.ticker, strategy_name, order.executed_volume)
+            if left:
+                log(f"🧩 [{strategy_name}] 일부만 매도 체결 ({order.executed_volume:.8f}/{order.amount:.8f}) "
+                    f"- 남은 포지션 {left:.8f}", WARNING)
+            else:
+                log(f"✅ [{strategy_name}] 매도 체결: {order.executed_volume:.8f} @ {order.price:,.4f}")
+        self.record_positions()
+
+    def submit(self, side, amount, strategy_name, signal_at):
+        """
+        주문 등록 (체결을 기다리지 않음, 체결 결과는 settle()에서 반영)
+        """
+        identifier = uuid.uuid4().hex
+        if self.state is not None:
+            # 전송 전에 기록해 두면 전송 직후 중단되어도 재시작 시 identifier로 찾을 수 있음
+            self.state.record(self.ticker, "order", {"identifier": identifier, "side": side, "amount": amount,
+                                                     "strategy": strategy_name})
+        self.pending = self.orders.submit(self.ticker, side, amount, strategy_name, signal_at, identifier)
+        self.settle()  # 접수 즉시 끝난 주문(모의 거래 등)은 바로 반영
+
+    def step(self, prices):
+        """
+        한 틱 분량의 전략 평가 및 주문
+        :param prices: 가격 리스트 (마지막 값이 현재가)
+        """
+        with metrics.timer("stage_seconds", stage="step"):
+            self._step(prices)
+
+    def _step(self, prices):
+        current_price = prices[-1]
+        self.orders.poll()
+        self.settle()
+        with metrics.timer("stage_seconds", stage="indicators"):
+            # 틱당 지표 1회 계산 (시세가 그대로인 틱은 캐시된 값)
+            self.signals.indicators(self.ticker, prices, self.engine, self.market_data.timestamps)
+        if self.state is not None and self.engine.last_timestamp != self.saved_timestamp:
+            self.state.record(self.ticker, "indicators", self.engine.state())  # 캔들 확정 시에만 기록
+            self.saved_timestamp = self.engine.last_timestamp
+        if self.pending:
+            log(f"⏳ [{self.ticker}] 주문 체결 대기 중 ({self.pending.state}) - 이번 틱 주문 생략")
+            return
+        # 손절/익절 조건에 걸린 포지션을 전략 신호보다 먼저 청산 (청산한 전략은 이번 틱에 다시 매수하지 않음)
+        exited = set()
+        for strategy_name, reason, ret in self.portfolio.exits(self.ticker, current_price):
+            exited.add(strategy_name)
+            if reason == "stop_loss":
+                log(f"🛑 [{strategy_name}] 손절 조건 충족 (수익률 {ret:+.2%})")
+            else:
+                log(f"🎯 [{strategy_name}] 익절 조건 충족 (수익률 {ret:+.2%})")
+            self.sell(strategy_name, self.clock.time())
+            if self.pending:
+                return
+
+        log(f"📊 [{self.ticker}] 현재가: {current_price}, 전략 평가 시작")
+        # 전략마다 자기 포지션을 따로 가지므로 모든 전략을 평가 (느린 전략이 있어도 시간 제한까지만 대기)
+        with metrics.timer("stage_seconds", stage="evaluate"):
+            decisions = self.executor.evaluate(prices)
+        signal_at = self.clock.time()  # 신호 확정 시각 (신호→체결 지연 측정용)
+        holders = set(self.portfolio.holders(self.ticker))
+        log(f"💡 현재 포지션: {', '.join(sorted(holders)) or '없음'}")
+
+        debug = is_enabled(DEBUG)  # 전략별 DEBUG 메시지는 기록할 때만 만듦
+        for strategy, decision in zip(self.strategies, decisions):
+            strategy_name = strategy.__class__.__name__
+            if debug:
+                log(f"🔍 평가 중 전략: {strategy_name}", DEBUG)
+
+            try:
+                if self.pending:
+                    break  # 이번 틱에 낸 주문이 아직 진행 중
+
+                # 매도 조건 평가 (그 전략의 포지션만 매도)
+                if strategy_name in holders:
+                    if decision["sell"]:
+                        log(f"🔴 [{strategy_name}] 매도 조건 충족")
+                        self.sell(strategy_name, signal_at)
+                    elif debug:
+                        log(f"⛔ [{strategy_name}] 보유 중 – 매도 조건 불충족", DEBUG)
+
+                # 매수 조건 평가 (금액은 Portfolio의 배분 한도 안에서)
+                elif decision["buy"] and strategy_name not in exited:
+                    log(f"🟢 [{strategy_name}] 매수 조건 충족")
+                    krw = self.get_balance("KRW")
+                    amount = self.portfolio.size(self.ticker, strategy_name, krw)
+                    log(f"💰 현재 KRW 잔액: {krw:,.0f}원, 배분 금액: {amount:,.0f}원")
+
+                    if amount:
+                        try:
+                            self.submit("bid", amount, strategy_name, signal_at)
+                        except Exception as e:
+                            log(f"❌ 매수 실패: {e}", ERROR)
+                    else:
+                        log("🚫 배분 한도 또는 잔액 부족. 주문 생략됨.")
+                elif debug:
+                    log(f"⛔ [{strategy_name}] 조건 불충족 – 거래 없음", DEBUG)
+
+            except Exception as e:
+                log(f"❗ 전략 평가 오류: {e}", ERROR)
+
+    def sell(self, strategy_name, signal_at):
+        """
+        전략의 포지션 전량 매도 (코인 잔고가 장부보다 적으면 잔고만큼)
+        """
+        coin = self.ticker.split("-")[1]
+        position = self.portfolio.position(self.ticker, strategy_name)
+        held = self.get_balance(coin)
+        amount = min(position, held)
+        log(f"📦 [{strategy_name}] 포지션 {position:.8f}, 현재 {coin} 잔액: {held:.8f}")
+
+        if amount > MIN_SELL_VOLUME:
             try:
-                return order_function(ticker, amount)
+                self.submit("ask", amount, strategy_name, signal_at)
             except Exception as e:
-                log(f"❌ 주문 실패: {e}")
-                time.sleep(3)
-        return None
+                log(f"❌ 매도 실패: {e}", ERROR)
+        else:
+            log(f"🚫 보유 코인 부족. 매도 생략하고 [{strategy_name}] 포지션 정리.", WARNING)
+            self.portfolio.reduce(self.ticker, strategy_name, position)
+            self.record_positions()
 
-    def run(self):
-        while True:
+    def run(self, until=None):
+        """
+        거래 루프
+        :param until: 종료 조건 함수 (None이면 무한 반복, 모의 거래 재생 종료 등에 사용)
+        """
+        while until is None or not until():
             try:
                 prices = self.market_data.get_prices()
                 if not prices or len(prices) < 20:
-                    log("⚠️ 가격 데이터 부족 - 건너뜀")
-                    time.sleep(5)
+                    log("⚠️ 가격 데이터 부족 - 건너뜀", WARNING)
+                    metrics.inc("retries_total", stage="prices")
+                    self.clock.sleep(5)
                     continue
 
-                current_price = prices[-1]
-                log(f"📊 현재가: {current_price}, 전략 평가 시작")
-
-                # 매수 중인 전략이 있다면, 해당 전략 외에는 매수, 매도 금지
-                if self.current_position:
-                    log(f"💡 현재 매수 중인 전략: {self.current_position}")
-                else:
-                    log("❗ 현재 매수 중인 전략이 없습니다.")
-
-                for strategy in self.strategies:
-                    strategy_name = strategy.__class__.__name__
-                    log(f"🔍 평가 중 전략: {strategy_name}")
-
-                    try:
-                        # 매수 중인 전략이 있으면, 매수는 그 전략에서만
-                        if self.current_position and self.current_position != strategy_name:
-                            log(f"⛔ [{strategy_name}] 현재 다른 전략이 매수 중이므로 거래 불가")
-                            continue  # 다른 전략이 매수 중이면, 해당 전략은 매수할 수 없음
-
-                        # 매수 조건 평가
-                        if strategy.should_buy(prices) and not self.current_position:
-                            log(f"🟢 [{strategy_name}] 매수 조건 충족")
-                            krw = self.get_balance("KRW")
-                            log(f"💰 현재 KRW 잔액: {krw:,.0f}원")
-
-                            if krw > 5000:  # 최소 매수 금액 5000 KRW 이상
-                                try:
-                                    order_amount = krw * 0.9995  # 잔액의 99.95% 매수
-                                    res = self.place_order_with_retry(self.upbit.buy_market_order, TICKER, order_amount)
-                                    if res:
-                                        self.current_position = strategy_name  # 매수한 전략 기록
-                                        log(f"✅ [{strategy_name}] 매수 주문 성공")
-                                        log_trade("buy", current_price, order_amount)
-                                    else:
-                                        log(f"❌ [{strategy_name}] 매수 주문 실패")
-                                except Exception as e:
-                                    log(f"❌ 매수 실패: {e}")
-                            else:
-                                log("🚫 매수 금액 부족. 주문 생략됨.")
-
-                        # 매도 조건 평가 (현재 매수한 전략에서만 매도)
-                        elif strategy.should_sell(prices) and self.current_position == strategy_name:
-                            log(f"🔴 [{strategy_name}] 매도 조건 충족")
-                            coin = TICKER.split("-")[1]
-                            amount = self.get_balance(coin)
-                            log(f"📦 현재 {coin} 잔액: {amount:.8f}")
-
-                            if amount > 0.0001:  # 최소 매도 수량 0.0001 이상
-                                try:
-                                    res = self.place_order_with_retry(self.upbit.sell_market_order, TICKER, amount)
-                                    if res:
-                                        self.current_position = None  # 매도 후 전략 해제
-                                        log(f"✅ [{strategy_name}] 매도 주문 성공")
-                                        log_trade("sell", current_price, amount)
-                                    else:
-                                        log(f"❌ [{strategy_name}] 매도 주문 실패")
-                                except Exception as e:
-                                    log(f"❌ 매도 실패: {e}")
-                            else:
-                                log("🚫 보유 코인 부족. 매도 생략됨.")
-                        else:
-                            log(f"⛔ [{strategy_name}] 조건 불충족 – 거래 없음")
-
-                    except Exception as e:
-                        log(f"❗ 전략 평가 오류: {e}")
+                self.step(prices)
 
             except Exception as e:
-                log(f"❗ 루프 오류 발생: {str(e)}")
+                log(f"❗ 루프 오류 발생: {str(e)}", ERROR)
 
-            time.sleep(5)  # 5초 대기 후 재시도
+            self.clock.sleep(5)  # 5초 대기 후 재시도
@@ -0,0 +1,152 @@
+# 업비트 시세 API 경량 클라이언트와 지연 로딩 주문 클라이언트
+# pyupbit는 import만으로 pandas/requests를 불러와 0.5초 이상 걸리므로
+# 거래 프로세스의 시세 조회는 이 모듈로 하고(응답을 바로 numpy 배열로 변환), pyupbit는 주문/잔고에만 씀
+import threading
+import time
+import numpy as np
+from strategy.candle_series import OHLCV_COLUMNS
+
+API_URL = "https://api.upbit.com/v1"
+CANDLE_LIMIT = 200  # 캔들 API 한 번에 받을 수 있는 최대 개수
+TIMEOUT = 5  # 요청 제한 시간(초)
+PAGE_INTERVAL = 0.1  # 요청 제한기가 없을 때 페이지 사이 대기(초) - pyupbit.get_ohlcv와 같음
+
+# 캔들 간격 -> 캔들 API 경로
+CANDLE_PATHS = {
+    "minute1": "candles/minutes/1",
+    "minute3": "candles/minutes/3",
+    "minute5": "candles/minutes/5",
+    "minute10": "candles/minutes/10",
+    "minute15": "candles/minutes/15",
+    "minute30": "candles/minutes/30",
+    "minute60": "candles/minutes/60",
+    "minute240": "candles/minutes/240",
+    "day": "candles/days",
+    "week": "candles/weeks",
+    "month": "candles/months",
+}
+
+_local = threading.local()  # 스레드별 HTTP 세션 (연결 재사용)
+
+
+def _session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests  # 첫 요청 때 로드
+        session = _local.session = requests.Session()
+    return session
+
+
+def _get(path, base_url=API_URL, **params):
+    """
+    시세 API GET 요청
+    :param base_url: API 주소 (테스트용 로컬 서버로 바꿀 수 있음)
+    :return: JSON 응답
+    :raises requests.HTTPError: 4xx/5xx 응답 (요청 수 초과 포함)
+    """
+    resp = _session().get(f"{base_url}/{path}", params=params, timeout=TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def rows_from_candles(candles):
+    """
+    캔들 API 응답을 (N, 6) 배열로 변환 (시각 오름차순)
+    시각은 rows_from_df와 같이 KST 기준 naive datetime을 그대로 epoch 초로 저장
+    :param candles: 캔들 API 응답 (최신 캔들이 앞)
+    """
+    rows = np.empty((len(candles), len(OHLCV_COLUMNS)))
+    if not candles:
+        return rows
+    candles = candles[::-1]
+    rows[:, 0] = np.array([c["candle_date_time_kst"] for c in candles], dtype="datetime64[s]").astype("int64")
+    rows[:, 1:] = [(c["opening_price"], c["high_price"], c["low_price"], c["trade_price"],
+                    c["candle_acc_trade_volume"]) for c in candles]
+    return rows
+
+
+def get_candle_page(ticker, interval="minute5", count=CANDLE_LIMIT, to=None, base_url=API_URL):
+    """
+    캔들 API 한 번 요청
+    :param count: 캔들 수 (최대 CANDLE_LIMIT)
+    :param to: 이 시각(UTC, "YYYY-MM-DD HH:MM:SS") 이전에 시작한 캔들만 (None이면 최신부터)
+    :return: 캔들 API 응답 (최신 캔들이 앞)
+    """
+    params = {"market": ticker, "count": count}
+    if to is not None:
+        params["to"] = to
+    return _get(CANDLE_PATHS[interval], base_url, **params)
+
+
+def get_candles(ticker, interval="minute5", count=200, limiter=None):
+    """
+    최근 캔들 조회 (pyupbit.get_ohlcv 대체, DataFrame을 만들지 않음)
+    200개를 넘으면 더 이전 구간을 이어서 요청
+    :param ticker: 마켓 (예: "KRW-BTC")
+    :param interval: 캔들 간격 (CANDLE_PATHS 키)
+    :param count: 캔들 수
+    :param limiter: 시세 API 요청 제한기 - 페이지마다 wait() (없으면 페이지 사이 PAGE_INTERVAL초 대기)
+    :return: (N, 6) 캔들 배열 (시각 오름차순, 마지막 행은 진행 중인 캔들)
+    """
+    candles = []
+    to = None
+    while len(candles) < count:
+        size = min(count - len(candles), CANDLE_LIMIT)
+        if limiter is not None:
+            limiter.wait()
+        elif to is not None:
+            time.sleep(PAGE_INTERVAL)
+        page = get_candle_page(ticker, interval, size, to)
+        candles.extend(page)
+        if len(page) < size:
+            break  # 상장 이전 구간
+        to = page[-1]["candle_date_time_utc"].replace("T", " ")
+    return rows_from_candles(candles)
+
+
+def get_tickers(fiat="KRW"):
+    """
+    :param fiat: 기준 통화
+    :return: 마켓 목록 (예: ["KRW-BTC", ...])
+    """
+    return [m["market"] for m in _get("market/all") if m["market"].startswith(f"{fiat}-")]
+
+
+def get_current_price(tickers):
+    """
+    현재가 일괄 조회 (pyupbit.get_current_price(verbose=True) 대체)
+    :param tickers: 마켓 목록 (최대 200개 권장)
+    :return: 마켓별 시세 dict 리스트 ("market", "trade_price", "acc_trade_price_24h", ...)
+    """
+    return _get("ticker", markets=",".join(tickers))
+
+
+class LazyUpbit:
+    """
+    pyupbit.Upbit을 처음 쓸 때 불러오는 주문/잔고 클라이언트
+    - prewarm이면 생성 즉시 백그라운드 스레드에서 import를 시작해 첫 주문 전에 끝나 있도록 함
+    - 그 사이 시세 조회/전략 판단은 pyupbit 없이 진행
+    """
+
+    def __init__(self, access, secret, prewarm=True):
+        """
+        :param access: 업비트 access key
+        :param secret: 업비트 secret key
+        :param prewarm: 백그라운드 import 시작 여부
+        """
+        self._access = access
+        self._secret = secret
+        self._client = None
+        self._lock = threading.Lock()
+        if prewarm:
+            threading.Thread(target=self._load, name="upbit-import", daemon=True).start()
+
+    def _load(self):
+        with self._lock:
+            if self._client is None:
+                import pyupbit  # pandas까지 로드 (약 0.5초)
+                self._client = pyupbit.Upbit(self._access, self._secret)
+            return self._client
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
@@ -1,21 +1,81 @@
+import numpy as np
+from strategy.candle_series import CandleSeries
+from strategy.indicators import IndicatorEngine
+from strategy.vectorized import closes
+
+
 class BaseStrategy:
     """
     모든 전략의 기본 클래스
     상속받아서 매수 조건과 매도 조건을 구현해야 합니다.
     """
 
+    engine = None  # 지표 엔진 (bind 전에는 None)
+    heavy = False  # True면 StrategyExecutor가 프로세스 풀에서 평가 (ML 모델, 긴 기간 지표 등)
+    budget = None  # 한 번 평가에 허용하는 시간(초), None이면 실행기 기본값
+    timeframes = ()  # 주 간격 외에 쓰는 캔들 간격 (예: ("minute60", "day")) - prices.frame(interval)로 조회
+
+    def subscribe(self, engine):
+        """
+        전략이 사용하는 지표를 엔진에 등록하는 메서드
+        - engine: IndicatorEngine
+        """
+        pass
+
+    def bind(self, engine):
+        """
+        지표 엔진 연결 (여러 전략이 같은 엔진을 공유하면 지표를 한 번만 계산)
+        - engine: IndicatorEngine
+        """
+        self.engine = engine
+        self.subscribe(engine)
+
+    def indicators(self, prices):
+        """
+        prices 기준 지표 값 조회
+        - 엔진이 없으면 전략 전용 엔진을 만들어 사용
+        - return: 지표 이름별 값 dict
+        """
+        if self.engine is None:
+            self.bind(IndicatorEngine())
+        return self.engine.sync(prices)
+
+    def signals(self, ohlcv):
+        """
+        가격 배열 전체에 대한 매수/매도 신호를 한 번에 계산하는 메서드
+        - ohlcv: (N, 6) OHLCV 배열, CandleSeries 또는 종가 배열/리스트
+          NumPy로 재정의한 전략은 (마켓 수, N, 6) 배열도 받아 (마켓 수, N) 신호를 반환 (마켓 스캐너용)
+        - return: (매수 bool 배열, 매도 bool 배열) - i번째 값은 prices[:i + 1] 기준 판단
+        - 기본 구현은 캔들마다 should_buy/should_sell을 호출하므로 O(N^2), 전략별로 NumPy로 재정의
+        """
+        data = np.asarray(ohlcv, dtype=np.float64)
+        prices = CandleSeries(data) if data.ndim == 2 else closes(data).tolist()
+        buy = np.zeros(len(prices), dtype=bool)
+        sell = np.zeros(len(prices), dtype=bool)
+        for i in range(len(prices)):
+            buy[i] = bool(self.should_buy(prices[:i + 1]))
+            sell[i] = bool(self.should_sell(prices[:i + 1]))
+        return buy, sell
+
     def should_buy(self, prices) -> bool:
         """
         매수 조건을 정의하는 메서드
-        - prices: 가격 리스트 (예: [1, 2, 3, 4, 5])
+        - prices: CandleSeries (종가 리스트처럼 prices[-1]이 현재가, prices.high 등 OHLCV 컬럼 제공)
+          또는 종가 리스트 (예: [1, 2, 3, 4, 5])
         - return: 매수 조건이 충족되면 True, 아니면 False
+        - 기본 구현은 signals() 결과의 마지막 값 (signals만 구현한 전략용)
         """
-        pass
+        if type(self).signals is BaseStrategy.signals:
+            return False
+        return bool(self.signals(prices)[0][-1])
 
     def should_sell(self, prices) -> bool:
         """
         매도 조건을 정의하는 메서드
-        - prices: 가격 리스트 (예: [1, 2, 3, 4, 5])
+        - prices: CandleSeries 또는 종가 리스트 (should_buy와 같음)
         - return: 매도 조건이 충족되면 True, 아니면 False
+        - 기본 구현은 signals() 결과의 마지막 값 (signals만 구현한 전략용)
         """
-        pass
+        if type(self).signals is BaseStrategy.signals:
+            return False
+        return bool(self.signals(prices)[1][-1])
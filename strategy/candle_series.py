@@ -0,0 +1,79 @@
+# 캔들 한 행: timestamp(초), open, high, low, close, volume (float64)
+# 전략/서비스 계층이 함께 쓰는 기본 형식 - service 모듈에 의존하지 않도록 strategy 계층에 둠
+OHLCV_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+TIMESTAMP, OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(OHLCV_COLUMNS))
+
+
+class CandleSeries:
+    """
+    (N, 6) OHLCV 배열을 감싼 캔들 시계열 (캔들마다 파이썬 객체를 만들지 않음)
+    - len(), series[-1], for price in series는 종가 기준이라 기존 종가 리스트(prices)처럼 사용 가능
+    - series.open / high / low / close / volume / timestamp는 복사 없는 컬럼 view
+    - series[a:b]는 복사 없는 CandleSeries, np.asarray(series)는 (N, 6) 배열 (vectorized 함수에 그대로 전달)
+    - series.frame("minute60")은 같은 시점까지의 다른 간격 캔들 (MultiTimeframeData가 넘긴 경우만)
+    """
+
+    __slots__ = ("data", "frames")
+
+    def __init__(self, data, frames=None):
+        """
+        :param data: (N, 6) float64 배열 (OHLCV_COLUMNS 순서)
+        :param frames: 간격별 CandleSeries dict (다중 시간대, 없으면 None)
+        """
+        self.data = data
+        self.frames = frames
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleSeries(self.data[index])
+        return float(self.data[index, CLOSE])
+
+    def __iter__(self):
+        return iter(self.data[:, CLOSE].tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype, copy=False)
+
+    def __repr__(self):
+        return f"CandleSeries({len(self)} candles)"
+
+    def tolist(self):
+        """종가 리스트"""
+        return self.data[:, CLOSE].tolist()
+
+    def frame(self, interval):
+        """
+        다른 간격의 캔들 (마지막 캔들은 진행 중, 이 시계열과 같은 시점까지)
+        :param interval: 캔들 간격 (전략의 timeframes에 선언한 값)
+        :return: CandleSeries
+        """
+        if not self.frames or interval not in self.frames:
+            raise KeyError(f"{interval} 캔들이 없습니다 (전략의 timeframes에 선언 필요)")
+        return self.frames[interval]
+
+    @property
+    def timestamp(self):
+        return self.data[:, TIMESTAMP]
+
+    @property
+    def open(self):
+        return self.data[:, OPEN]
+
+    @property
+    def high(self):
+        return self.data[:, HIGH]
+
+    @property
+    def low(self):
+        return self.data[:, LOW]
+
+    @property
+    def close(self):
+        return self.data[:, CLOSE]
+
+    @property
+    def volume(self):
+        return self.data[:, VOLUME]
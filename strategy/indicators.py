@@ -0,0 +1,299 @@
+from collections import deque
+
+
+# ✅ 단순 이동평균 (SMA)
+class SMA:
+    def __init__(self, period):
+        """
+        단순 이동평균 초기화
+        :param period: 이동평균 기간
+        """
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.window = deque(maxlen=self.period)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, price):
+        """
+        확정된 캔들 종가 반영 (O(1))
+        :param price: 종가
+        """
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(price)
+        self.total += price
+        self.updates += 1
+        # 누적 합의 부동소수점 오차가 쌓이지 않도록 period 회마다 재합산 (분할상환 O(1))
+        if self.updates % self.period == 0:
+            self.total = sum(self.window)
+
+    def peek(self, price):
+        """
+        진행 중인 캔들 종가를 반영했을 때의 값 (상태는 변경하지 않음)
+        :param price: 진행 중인 캔들 종가
+        :return: 이동평균 값 (데이터 부족 시 None)
+        """
+        count = len(self.window) + 1
+        total = self.total + price
+        if count > self.period:
+            total -= self.window[0]
+            count = self.period
+        if count < self.period:
+            return None
+        return total / self.period
+
+
+# ✅ 지수 이동평균 (EMA)
+class EMA:
+    def __init__(self, period):
+        """
+        지수 이동평균 초기화 (첫 period 개 캔들의 SMA로 시작)
+        :param period: EMA 기간
+        """
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.value = None
+
+    def _next(self, price):
+        if self.count + 1 < self.period:
+            return None, self.total + price
+        if self.count + 1 == self.period:
+            return (self.total + price) / self.period, self.total + price
+        return self.value + self.alpha * (price - self.value), self.total
+
+    def update(self, price):
+        self.value, self.total = self._next(price)
+        self.count += 1
+
+    def peek(self, price):
+        return self._next(price)[0]
+
+
+# ✅ Wilder RSI
+class WilderRSI:
+    def __init__(self, period):
+        """
+        Wilder 방식 RSI 초기화
+        첫 period 개 변화량의 단순 평균으로 시작한 뒤 Wilder 평활을 적용
+        :param period: RSI 계산 기간
+        """
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.prev = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.sum_gain = 0.0
+        self.sum_loss = 0.0
+
+    def _next(self, price):
+        if self.prev is None:
+            return self.avg_gain, self.avg_loss, self.sum_gain, self.sum_loss
+        delta = price - self.prev
+        gain = delta if delta > 0 else 0
+        loss = -delta if delta < 0 else 0
+        if self.count < self.period:
+            sum_gain = self.sum_gain + gain
+            sum_loss = self.sum_loss + loss
+            return sum_gain / self.period, sum_loss / self.period, sum_gain, sum_loss
+        avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        return avg_gain, avg_loss, self.sum_gain, self.sum_loss
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        if avg_loss == 0:
+            return 100
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def update(self, price):
+        self.avg_gain, self.avg_loss, self.sum_gain, self.sum_loss = self._next(price)
+        if self.prev is not None:
+            self.count += 1
+        self.prev = price
+
+    def peek(self, price):
+        avg_gain, avg_loss, _, _ = self._next(price)
+        return self._rsi(avg_gain, avg_loss)
+
+
+# ✅ 이동 분산 (볼린저 밴드용, 모분산)
+class RollingVariance:
+    def __init__(self, period):
+        """
+        이동 평균/분산 초기화 (슬라이딩 Welford 방식)
+        :param period: 계산 기간
+        """
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.window = deque(maxlen=self.period)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def _next(self, price):
+        n = len(self.window)
+        if n < self.period:
+            mean = self.mean + (price - self.mean) / (n + 1)
+            m2 = self.m2 + (price - self.mean) * (price - mean)
+            return mean, m2
+        old = self.window[0]
+        mean = self.mean + (price - old) / self.period
+        m2 = self.m2 + (price - old) * (price - mean + old - self.mean)
+        return mean, max(m2, 0.0)
+
+    def update(self, price):
+        self.mean, self.m2 = self._next(price)
+        self.window.append(price)
+        self.updates += 1
+        # 슬라이딩 갱신 오차 보정 (period 회마다 재계산, 분할상환 O(1))
+        if self.updates % self.period == 0:
+            self.mean = sum(self.window) / len(self.window)
+            self.m2 = sum([(p - self.mean) ** 2 for p in self.window])
+
+    def peek(self, price):
+        """
+        :return: (평균, 분산) 튜플 (데이터 부족 시 None)
+        """
+        if len(self.window) + 1 < self.period:
+            return None
+        mean, m2 = self._next(price)
+        return mean, m2 / self.period
+
+
+INDICATORS = {
+    "sma": SMA,
+    "ema": EMA,
+    "rsi": WilderRSI,
+    "var": RollingVariance,
+}
+
+
+class IndicatorEngine:
+    """
+    여러 전략이 공유하는 상태 기반 지표 엔진
+    - 전략은 subscribe()로 필요한 지표를 이름으로 등록
+    - 매 틱마다 sync()를 한 번 호출하면 모든 전략이 같은 계산 결과를 공유
+    - 타임스탬프가 주어지면 새로 확정된 캔들만 반영하므로 틱당 O(1)
+    """
+
+    def __init__(self):
+        self.indicators = {}
+        self.values = {}
+        self.last_timestamp = None
+        self._prices = None
+        self._length = 0
+        self._last_price = None
+
+    def subscribe(self, kind, period):
+        """
+        지표 등록 (이미 같은 지표가 있으면 공유)
+        :param kind: 지표 종류 ("sma", "ema", "rsi", "var")
+        :param period: 지표 기간
+        :return: 지표 이름 (values 조회 키)
+        """
+        name = f"{kind}_{period}"
+        if name not in self.indicators:
+            self.indicators[name] = INDICATORS[kind](period)
+            # 새 지표는 과거 데이터가 없으므로 다음 sync에서 전체 재계산
+            self.last_timestamp = None
+            self._prices = None
+        return name
+
+    def reset(self):
+        for indicator in self.indicators.values():
+            indicator.reset()
+        self.last_timestamp = None
+
+    def state(self):
+        """
+        지표 상태 (JSON으로 저장 가능한 dict, 재시작 시 restore()로 복원)
+        """
+        return {
+            "last_timestamp": self.last_timestamp,
+            "indicators": {
+                name: {key: list(value) if isinstance(value, deque) else value
+                       for key, value in vars(indicator).items()}
+                for name, indicator in self.indicators.items()
+            },
+        }
+
+    def restore(self, state):
+        """
+        state()로 저장한 지표 상태 복원
+        저장된 지표가 현재 구독과 다르면 복원하지 않고 다음 sync에서 전체 재계산
+        :return: 복원 여부
+        """
+        saved = state.get("indicators", {})
+        if set(saved) != set(self.indicators) or state.get("last_timestamp") is None:
+            return False
+        for name, attrs in saved.items():
+            indicator = self.indicators[name]
+            for key, value in attrs.items():
+                if isinstance(getattr(indicator, key, None), deque):
+                    value = deque(value, maxlen=indicator.period)
+                setattr(indicator, key, value)
+        self.last_timestamp = state["last_timestamp"]
+        self._prices = None
+        return True
+
+    def update(self, price):
+        """
+        확정된 캔들 하나를 모든 지표에 반영
+        :param price: 종가
+        """
+        for indicator in self.indicators.values():
+            indicator.update(price)
+
+    def sync(self, prices, timestamps=None):
+        """
+        가격 리스트와 지표 상태를 맞춤 (마지막 캔들은 진행 중인 캔들로 취급)
+        :param prices: 종가 리스트 또는 CandleSeries
+        :param timestamps: 각 캔들의 시각 리스트 (없으면 CandleSeries의 시각, 그것도 없으면 prices 전체를 재계산)
+        :return: 지표 이름별 값 dict
+        """
+        if (prices is self._prices and len(prices) == self._length
+                and prices[-1] == self._last_price):
+            return self.values  # 같은 틱에서는 재계산하지 않음
+
+        if timestamps is None:
+            timestamps = getattr(prices, "timestamp", None)
+        if timestamps is None:
+            self.reset()
+            closed = prices[:-1]
+        else:
+            if self.last_timestamp is not None and timestamps[0] > self.last_timestamp:
+                self.reset()  # 데이터 공백 - 받은 구간으로 다시 시작
+            if self.last_timestamp is None:
+                start = 0
+            else:
+                # 뒤에서부터 새로 확정된 캔들만 찾음 (새 캔들 수에 비례)
+                start = len(prices) - 1
+                while start > 0 and timestamps[start - 1] > self.last_timestamp:
+                    start -= 1
+            closed = prices[start:-1]
+            if closed:
+                self.last_timestamp = timestamps[-2]
+
+        for price in closed:
+            self.update(price)
+
+        current = prices[-1]
+        self.values = {name: indicator.peek(current) for name, indicator in self.indicators.items()}
+        self._prices = prices
+        self._length = len(prices)
+        self._last_price = current
+        return self.values
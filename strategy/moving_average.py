@@ -1,5 +1,6 @@
+from strategy import vectorized
 from strategy.base_strategy import BaseStrategy
-from utils.logger import log
+from utils.logger import DEBUG, is_enabled, log
 
 # ✅ Moving Average + RSI 전략
 class MovingAverageRSIStrategy(BaseStrategy):
@@ -14,26 +15,31 @@ class MovingAverageRSIStrategy(BaseStrategy):
         self.rsi_buy_threshold = rsi_buy_threshold
         self.rsi_sell_threshold = rsi_sell_threshold  # 매도 기준 임계값 추가
 
+    def subscribe(self, engine):
+        """
+        사용 지표 등록 (MA5, MA20, RSI)
+        :param engine: 지표 엔진
+        """
+        self._ma5 = engine.subscribe("sma", 5)
+        self._ma20 = engine.subscribe("sma", 20)
+        self._rsi = engine.subscribe("rsi", self.rsi_period)
+
     def calculate_rsi(self, prices):
         """
-        RSI 계산 함수
+        RSI 계산 함수 (지표 엔진에서 조회)
         :param prices: 가격 리스트
         :return: 계산된 RSI 값
         """
-        deltas = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
-        gains = [d if d > 0 else 0 for d in deltas]
-        losses = [-d if d < 0 else 0 for d in deltas]
-        avg_gain = sum(gains[:self.rsi_period]) / self.rsi_period
-        avg_loss = sum(losses[:self.rsi_period]) / self.rsi_period
-        for i in range(self.rsi_period, len(deltas)):
-            gain = gains[i]
-            loss = losses[i]
-            avg_gain = (avg_gain * (self.rsi_period - 1) + gain) / self.rsi_period
-            avg_loss = (avg_loss * (self.rsi_period - 1) + loss) / self.rsi_period
-        if avg_loss == 0:
-            return 100
-        rs = avg_gain / avg_loss
-        return 100 - (100 / (1 + rs))
+        return self.indicators(prices)[self._rsi]
+
+    def signals(self, ohlcv):
+        """
+        가격 배열 전체의 매수/매도 신호 (NumPy)
+        :param ohlcv: OHLCV 배열 또는 종가 배열
+        :return: (매수 bool 배열, 매도 bool 배열)
+        """
+        return vectorized.ma_rsi_signals(vectorized.closes(ohlcv), self.rsi_period,
+                                         self.rsi_buy_threshold, self.rsi_sell_threshold)
 
     def should_buy(self, prices):
         """
@@ -42,10 +48,12 @@ class MovingAverageRSIStrategy(BaseStrategy):
         :return: 매수 조건 만족 여부 (True/False)
         """
         if len(prices) < 20: return False
-        ma5 = sum(prices[-5:]) / 5  # 5일 이동평균
-        ma20 = sum(prices[-20:]) / 20  # 20일 이동평균
-        rsi = self.calculate_rsi(prices)  # RSI 계산
-        log(f"[MA+RSI 매수] MA5: {ma5:.2f}, MA20: {ma20:.2f}, RSI: {rsi:.2f}")
+        values = self.indicators(prices)
+        ma5 = values[self._ma5]  # 5일 이동평균
+        ma20 = values[self._ma20]  # 20일 이동평균
+        rsi = values[self._rsi]  # RSI 계산
+        if is_enabled(DEBUG):  # 기록하지 않을 메시지는 문자열도 만들지 않음
+            log(f"[MA+RSI 매수] MA5: {ma5:.2f}, MA20: {ma20:.2f}, RSI: {rsi:.2f}", DEBUG)
         # MA5가 MA20보다 크고, RSI가 매수 임계값 미만일 경우 매수
         return ma5 > ma20 and rsi < self.rsi_buy_threshold
 
@@ -56,10 +64,12 @@ class MovingAverageRSIStrategy(BaseStrategy):
         :return: 매도 조건 만족 여부 (True/False)
         """
         if len(prices) < 20: return False
-        ma5 = sum(prices[-5:]) / 5  # 5일 이동평균
-        ma20 = sum(prices[-20:]) / 20  # 20일 이동평균
-        rsi = self.calculate_rsi(prices)  # RSI 계산
-        log(f"[MA+RSI 매도] MA5: {ma5:.2f}, MA20: {ma20:.2f}, RSI: {rsi:.2f}")
+        values = self.indicators(prices)
+        ma5 = values[self._ma5]  # 5일 이동평균
+        ma20 = values[self._ma20]  # 20일 이동평균
+        rsi = values[self._rsi]  # RSI 계산
+        if is_enabled(DEBUG):
+            log(f"[MA+RSI 매도] MA5: {ma5:.2f}, MA20: {ma20:.2f}, RSI: {rsi:.2f}", DEBUG)
         # MA5가 MA20보다 작거나, RSI가 매도 임계값을 초과할 경우 매도
         return ma5 < ma20 or rsi > self.rsi_sell_threshold
 
@@ -77,26 +87,29 @@ class RSIStrategy(BaseStrategy):
         self.buy_threshold = buy_threshold
         self.sell_threshold = sell_threshold
 
+    def subscribe(self, engine):
+        """
+        사용 지표 등록 (RSI)
+        :param engine: 지표 엔진
+        """
+        self._rsi = engine.subscribe("rsi", self.period)
+
     def calculate_rsi(self, prices):
         """
-        RSI 계산 함수
+        RSI 계산 함수 (지표 엔진에서 조회)
         :param prices: 가격 리스트
         :return: 계산된 RSI 값
         """
-        deltas = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
-        gains = [d if d > 0 else 0 for d in deltas]
-        losses = [-d if d < 0 else 0 for d in deltas]
-        avg_gain = sum(gains[:self.period]) / self.period
-        avg_loss = sum(losses[:self.period]) / self.period
-        for i in range(self.period, len(deltas)):
-            gain = gains[i]
-            loss = losses[i]
-            avg_gain = (avg_gain * (self.period - 1) + gain) / self.period
-            avg_loss = (avg_loss * (self.period - 1) + loss) / self.period
-        if avg_loss == 0:
-            return 100
-        rs = avg_gain / avg_loss
-        return 100 - (100 / (1 + rs))
+        return self.indicators(prices)[self._rsi]
+
+    def signals(self, ohlcv):
+        """
+        가격 배열 전체의 매수/매도 신호 (NumPy)
+        :param ohlcv: OHLCV 배열 또는 종가 배열
+        :return: (매수 bool 배열, 매도 bool 배열)
+        """
+        return vectorized.rsi_signals(vectorized.closes(ohlcv), self.period,
+                                      self.buy_threshold, self.sell_threshold)
 
     def should_buy(self, prices):
         """
@@ -106,7 +119,8 @@ class RSIStrategy(BaseStrategy):
         """
         if len(prices) < self.period: return False
         rsi = self.calculate_rsi(prices)
-        log(f"[RSI 매수] RSI: {rsi:.2f}")
+        if is_enabled(DEBUG):
+            log(f"[RSI 매수] RSI: {rsi:.2f}", DEBUG)
         return rsi < self.buy_threshold
 
     def should_sell(self, prices):
@@ -117,7 +131,8 @@ class RSIStrategy(BaseStrategy):
         """
         if len(prices) < self.period: return False
         rsi = self.calculate_rsi(prices)
-        log(f"[RSI 매도] RSI: {rsi:.2f}")
+        if is_enabled(DEBUG):
+            log(f"[RSI 매도] RSI: {rsi:.2f}", DEBUG)
         return rsi > self.sell_threshold
 
 
@@ -130,17 +145,34 @@ class VolatilityBreakoutStrategy(BaseStrategy):
         """
         self.k = k
 
+    def signals(self, ohlcv):
+        """
+        가격 배열 전체의 매수/매도 신호 (NumPy)
+        :param ohlcv: OHLCV 배열 또는 종가 배열
+        :return: (매수 bool 배열, 매도 bool 배열)
+        """
+        return vectorized.breakout_signals(ohlcv, self.k)
+
     def should_buy(self, prices):
         """
         매수 조건 체크 (변동성 돌파 전략)
-        :param prices: 가격 리스트
+        CandleSeries면 현재 캔들 시가 + 직전 캔들 변동폭(고가 - 저가) x k를 돌파할 때 매수
+        :param prices: CandleSeries 또는 가격 리스트 (종가만 있으면 직전 두 종가 차이를 변동폭으로 사용)
         :return: 매수 조건 만족 여부 (True/False)
         """
-        if len(prices) < 2: return False
+        if hasattr(prices, "high"):
+            if len(prices) < 2: return False
+            today = prices[-1]
+            target = prices.open[-1] + (prices.high[-2] - prices.low[-2]) * self.k
+            if is_enabled(DEBUG):
+                log(f"[돌파 매수] 현재가: {today}, 목표가: {target}", DEBUG)
+            return today > target
+        if len(prices) < 3: return False
         yesterday = prices[-2]
         today = prices[-1]
         target = yesterday + (abs(prices[-2] - prices[-3]) * self.k)
-        log(f"[돌파 매수] 현재가: {today}, 목표가: {target}")
+        if is_enabled(DEBUG):
+            log(f"[돌파 매수] 현재가: {today}, 목표가: {target}", DEBUG)
         return today > target
 
     def should_sell(self, prices):
@@ -165,6 +197,14 @@ class MACDStrategy(BaseStrategy):
         self.long = long
         self.signal = signal
 
+    def subscribe(self, engine):
+        """
+        사용 지표 등록 (단기/장기 이동평균)
+        :param engine: 지표 엔진
+        """
+        self._short = engine.subscribe("sma", self.short)
+        self._long = engine.subscribe("sma", self.long)
+
     def calculate_macd(self, prices):
         """
         MACD 및 신호선 계산 함수
@@ -172,12 +212,21 @@ class MACDStrategy(BaseStrategy):
         :return: MACD 및 신호선 값
         """
         if len(prices) < self.long + self.signal: return None, None
-        ema_short = sum(prices[-self.short:]) / self.short
-        ema_long = sum(prices[-self.long:]) / self.long
+        values = self.indicators(prices)
+        ema_short = values[self._short]
+        ema_long = values[self._long]
         macd = ema_short - ema_long
         signal_line = sum([macd] * self.signal) / self.signal
         return macd, signal_line
 
+    def signals(self, ohlcv):
+        """
+        가격 배열 전체의 매수/매도 신호 (NumPy)
+        :param ohlcv: OHLCV 배열 또는 종가 배열
+        :return: (매수 bool 배열, 매도 bool 배열)
+        """
+        return vectorized.macd_signals(vectorized.closes(ohlcv), self.short, self.long, self.signal)
+
     def should_buy(self, prices):
         """
         매수 조건 체크 (MACD 전략)
@@ -186,7 +235,8 @@ class MACDStrategy(BaseStrategy):
         """
         macd, signal = self.calculate_macd(prices)
         if macd is None: return False
-        log(f"[MACD 매수] MACD: {macd:.4f}, Signal: {signal:.4f}")
+        if is_enabled(DEBUG):
+            log(f"[MACD 매수] MACD: {macd:.4f}, Signal: {signal:.4f}", DEBUG)
         return macd > signal
 
     def should_sell(self, prices):
@@ -197,7 +247,8 @@ class MACDStrategy(BaseStrategy):
         """
         macd, signal = self.calculate_macd(prices)
         if macd is None: return False
-        log(f"[MACD 매도] MACD: {macd:.4f}, Signal: {signal:.4f}")
+        if is_enabled(DEBUG):
+            log(f"[MACD 매도] MACD: {macd:.4f}, Signal: {signal:.4f}", DEBUG)
         return macd < signal
 
 
@@ -212,6 +263,31 @@ class BollingerBandStrategy(BaseStrategy):
         self.window = window
         self.num_std_dev = num_std_dev
 
+    def subscribe(self, engine):
+        """
+        사용 지표 등록 (이동 평균/분산)
+        :param engine: 지표 엔진
+        """
+        self._var = engine.subscribe("var", self.window)
+
+    def calculate_bands(self, prices):
+        """
+        볼린저 밴드 계산 함수
+        :param prices: 가격 리스트
+        :return: (하단 밴드, 상단 밴드)
+        """
+        mean, variance = self.indicators(prices)[self._var]
+        std = variance ** 0.5
+        return mean - self.num_std_dev * std, mean + self.num_std_dev * std
+
+    def signals(self, ohlcv):
+        """
+        가격 배열 전체의 매수/매도 신호 (NumPy)
+        :param ohlcv: OHLCV 배열 또는 종가 배열
+        :return: (매수 bool 배열, 매도 bool 배열)
+        """
+        return vectorized.bollinger_signals(vectorized.closes(ohlcv), self.window, self.num_std_dev)
+
     def should_buy(self, prices):
         """
         매수 조건 체크 (볼린저 밴드 전략)
@@ -219,7 +295,34 @@ class BollingerBandStrategy(BaseStrategy):
         :return: 매수 조건 만족 여부 (True/False)
         """
         if len(prices) < self.window: return False
-        window_prices = prices[-self.window:]
-        mean = sum(window_prices) / self.window
-        std = (sum([(p - mean) ** 2 for p in window_prices]) / self.window) ** 0.5
-        lower_band = mean - self.num_std_dev
+        lower_band, upper_band = self.calculate_bands(prices)
+        if is_enabled(DEBUG):
+            log(f"[볼린저 매수] 현재가: {prices[-1]}, 하단: {lower_band:.2f}, 상단: {upper_band:.2f}", DEBUG)
+        # 현재가가 하단 밴드 아래로 내려가면 매수
+        return prices[-1] < lower_band
+
+    def should_sell(self, prices):
+        """
+        매도 조건 체크 (볼린저 밴드 전략)
+        :param prices: 가격 리스트
+        :return: 매도 조건 만족 여부 (True/False)
+        """
+        if len(prices) < self.window: return False
+        lower_band, upper_band = self.calculate_bands(prices)
+        if is_enabled(DEBUG):
+            log(f"[볼린저 매도] 현재가: {prices[-1]}, 하단: {lower_band:.2f}, 상단: {upper_band:.2f}", DEBUG)
+        # 현재가가 상단 밴드 위로 올라가면 매도
+        return prices[-1] > upper_band
+
+
+def default_strategies():
+    """
+    티커마다 독립된 전략 인스턴스 생성 (지표 상태를 티커끼리 공유하지 않음)
+    """
+    return [
+        MovingAverageRSIStrategy(),
+        RSIStrategy(),
+        VolatilityBreakoutStrategy(),
+        MACDStrategy(),
+        BollingerBandStrategy()
+    ]
@@ -0,0 +1,197 @@
+import numpy as np
+from strategy.candle_series import CLOSE, HIGH, LOW, OPEN
+
+# 전략 조건을 가격 배열 전체에 대해 한 번에 계산하는 NumPy 함수 모음
+# 각 함수의 i번째 값은 스칼라 구현에 prices[:i + 1]을 넘긴 결과와 같음
+# 모든 함수는 마지막 축을 시간 축으로 보므로 (마켓 수, N) 배열을 넘기면 여러 마켓을 한 번에 계산
+
+_BLOCK = 128  # 재귀 필터 블록 크기
+
+
+def closes(ohlcv):
+    """
+    OHLCV 배열이면 종가 컬럼, 1차원이면 그대로 float64 배열로 반환
+    :param ohlcv: (N, 6) 또는 (마켓 수, N, 6) OHLCV 배열, 종가 배열/리스트
+    """
+    data = np.asarray(ohlcv, dtype=np.float64)
+    return data[..., CLOSE] if data.ndim >= 2 else data
+
+
+def rolling_sum(values, period):
+    """
+    이동 합계 (앞에서부터 순서대로 더해 스칼라 sum()과 같은 반올림을 유지)
+    :param values: 1차원 배열
+    :param period: 기간
+    :return: 길이가 같은 배열 (기간 미달 구간은 NaN)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    count = values.shape[-1] - period + 1
+    if count <= 0:
+        return out
+    total = values[..., :count].copy()
+    for j in range(1, period):
+        total += values[..., j:j + count]
+    out[..., period - 1:] = total
+    return out
+
+
+def rolling_mean(values, period):
+    return rolling_sum(values, period) / period
+
+
+def rolling_var(values, period):
+    """
+    이동 모분산 (볼린저 밴드 계산식과 동일)
+    :return: (이동평균, 이동분산) 배열 튜플
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean = rolling_mean(values, period)
+    out = np.full(values.shape, np.nan)
+    count = values.shape[-1] - period + 1
+    if count <= 0:
+        return mean, out
+    window_mean = mean[..., period - 1:]
+    total = np.zeros(window_mean.shape)
+    for j in range(period):
+        total += (values[..., j:j + count] - window_mean) ** 2
+    out[..., period - 1:] = total / period
+    return mean, out
+
+
+def recursive_filter(values, decay, gain, initial):
+    """
+    y[k] = decay * y[k-1] + gain * x[k] 형태의 1차 재귀 필터를 블록 단위로 벡터화
+    :param values: 입력 배열 x
+    :param decay: 감쇠 계수
+    :param gain: 입력 계수
+    :param initial: y[-1] 초기값 (여러 마켓이면 마켓별 배열)
+    :return: 출력 배열 y
+    """
+    values = np.asarray(values, dtype=np.float64)
+    initial = np.asarray(initial, dtype=np.float64)[..., None]
+    batch = values.shape[:-1]
+    n = values.shape[-1]
+    out = np.empty(values.shape)
+    if n == 0:
+        return out
+    size = min(_BLOCK, n)
+    powers = decay ** np.arange(size + 1)
+    lags = np.arange(size)[:, None] - np.arange(size)[None, :]
+    weights = np.where(lags >= 0, gain * powers[np.clip(lags, 0, size)], 0.0)
+
+    full = n // size * size
+    if full:
+        blocks = values[..., :full].reshape(batch + (-1, size)) @ weights.T  # 블록 내부 기여분
+        carry = initial
+        for b in range(blocks.shape[-2]):
+            blocks[..., b, :] += carry * powers[1:]
+            carry = blocks[..., b, -1:]
+        out[..., :full] = blocks.reshape(batch + (full,))
+        initial = carry
+    rest = n - full
+    if rest:
+        out[..., full:] = values[..., full:] @ weights[:rest, :rest].T + initial * powers[1:rest + 1]
+    return out
+
+
+def wilder_rsi(prices, period):
+    """
+    Wilder RSI (각 시점까지의 전체 가격 이력 기준)
+    :param prices: 종가 배열
+    :param period: RSI 계산 기간
+    :return: RSI 배열
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+
+    avg_gain = np.zeros(prices.shape)
+    avg_loss = np.zeros(prices.shape)
+    # 초기 구간: 처음 period 개 변화량의 합 / period
+    head = min(period, deltas.shape[-1])
+    avg_gain[..., 1:head + 1] = np.cumsum(gains[..., :head], axis=-1) / period
+    avg_loss[..., 1:head + 1] = np.cumsum(losses[..., :head], axis=-1) / period
+    # 이후 구간: Wilder 평활
+    if deltas.shape[-1] > period:
+        decay = (period - 1) / period
+        avg_gain[..., period + 1:] = recursive_filter(gains[..., period:], decay, 1 / period, avg_gain[..., period])
+        avg_loss[..., period + 1:] = recursive_filter(losses[..., period:], decay, 1 / period, avg_loss[..., period])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi[avg_loss == 0] = 100
+    return rsi
+
+
+def _valid(mask, start):
+    mask[..., :start] = False
+    return mask
+
+
+def ma_rsi_signals(prices, rsi_period, buy_threshold, sell_threshold):
+    """
+    MovingAverageRSIStrategy 매수/매도 신호
+    :return: (매수 bool 배열, 매도 bool 배열)
+    """
+    ma5 = rolling_mean(prices, 5)
+    ma20 = rolling_mean(prices, 20)
+    rsi = wilder_rsi(prices, rsi_period)
+    buy = _valid((ma5 > ma20) & (rsi < buy_threshold), 19)
+    sell = _valid((ma5 < ma20) | (rsi > sell_threshold), 19)
+    return buy, sell
+
+
+def rsi_signals(prices, period, buy_threshold, sell_threshold):
+    """
+    RSIStrategy 매수/매도 신호
+    """
+    rsi = wilder_rsi(prices, period)
+    return _valid(rsi < buy_threshold, period - 1), _valid(rsi > sell_threshold, period - 1)
+
+
+def breakout_signals(prices, k):
+    """
+    VolatilityBreakoutStrategy 매수 신호 (매도 신호 없음)
+    OHLCV 배열이면 현재 캔들 시가 + 직전 캔들 (고가 - 저가) x k 돌파,
+    종가 배열이면 직전 종가 + 직전 두 종가 차이 x k 돌파
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim >= 2:
+        buy = np.zeros(prices.shape[:-1], dtype=bool)
+        if prices.shape[-2] > 1:
+            target = prices[..., 1:, OPEN] + (prices[..., :-1, HIGH] - prices[..., :-1, LOW]) * k
+            buy[..., 1:] = prices[..., 1:, CLOSE] > target
+        return buy, np.zeros(buy.shape, dtype=bool)
+    buy = np.zeros(prices.shape, dtype=bool)
+    if prices.shape[-1] > 2:
+        target = prices[..., 1:-1] + np.abs(prices[..., 1:-1] - prices[..., :-2]) * k
+        buy[..., 2:] = prices[..., 2:] > target
+    return buy, np.zeros(prices.shape, dtype=bool)
+
+
+def macd_signals(prices, short, long, signal):
+    """
+    MACDStrategy 매수/매도 신호
+    신호선은 스칼라 구현과 같이 MACD 값을 signal 번 더해 나눈 값
+    """
+    macd = rolling_mean(prices, short) - rolling_mean(prices, long)
+    signal_line = macd.copy()
+    for _ in range(signal - 1):
+        signal_line += macd
+    signal_line /= signal
+    start = long + signal - 1
+    return _valid(macd > signal_line, start), _valid(macd < signal_line, start)
+
+
+def bollinger_signals(prices, window, num_std_dev):
+    """
+    BollingerBandStrategy 매수/매도 신호
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    mean, var = rolling_var(prices, window)
+    std = np.sqrt(var)
+    lower = mean - num_std_dev * std
+    upper = mean + num_std_dev * std
+    return _valid(prices < lower, window - 1), _valid(prices > upper, window - 1)
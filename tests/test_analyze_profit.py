@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+from utils.analyze_profit import pair_trades
+
+
+def trade_log(rows):
+    df = pd.DataFrame(rows, columns=["datetime", "action", "price", "volume", "ticker", "strategy"])
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    return df
+
+
+def test_split_sell_closes_by_cumulative_volume():
+    df = trade_log([
+        ("2025-01-01 00:00:00", "buy", 100.0, 2.0, "KRW-BTC", "RSIStrategy"),
+        ("2025-01-01 00:01:00", "sell", 110.0, 0.5, "KRW-BTC", "RSIStrategy"),  # 부분 청산
+        ("2025-01-01 00:02:00", "sell", 120.0, 1.5, "KRW-BTC", "RSIStrategy"),  # 남은 수량 청산
+        ("2025-01-01 00:03:00", "sell", 130.0, 1.0, "KRW-BTC", "RSIStrategy"),  # 포지션 없음 - 무시
+    ])
+    trades, carry = pair_trades(df)
+    assert len(trades) == 1 and carry.empty
+    trade = trades.iloc[0]
+    assert trade["sell_time"] == pd.Timestamp("2025-01-01 00:02:00")
+    assert trade["sell_price"] == pytest.approx((110 * 0.5 + 120 * 1.5) / 2)
+    assert trade["profit"] == pytest.approx(110 * 0.5 + 120 * 1.5 - 100 * 2)
+
+
+def test_open_split_sell_carries_to_next_chunk():
+    rows = [
+        ("2025-01-01 00:00:00", "buy", 100.0, 2.0, "KRW-BTC", "RSIStrategy"),
+        ("2025-01-01 00:01:00", "sell", 110.0, 0.5, "KRW-BTC", "RSIStrategy"),
+        ("2025-01-01 00:02:00", "sell", 120.0, 1.5, "KRW-BTC", "RSIStrategy"),
+    ]
+    first, carry = pair_trades(trade_log(rows[:2]))
+    assert first.empty and len(carry) == 2
+    second, carry = pair_trades(trade_log(rows[2:]), carry)
+    assert len(second) == 1 and carry.empty
+    assert second.iloc[0]["profit"] == pytest.approx(pair_trades(trade_log(rows))[0].iloc[0]["profit"])
+
+
+def test_legacy_rows_close_on_first_sell():
+    # 예전 형식: 매수 volume은 KRW 금액, 매도 volume은 코인 수량
+    df = trade_log([
+        ("2025-01-01 00:00:00", "buy", 100.0, 10000.0, "", ""),
+        ("2025-01-01 00:01:00", "sell", 101.0, 99.9, "", ""),
+        ("2025-01-01 00:02:00", "sell", 102.0, 99.9, "", ""),
+    ])
+    trades, carry = pair_trades(df)
+    assert len(trades) == 1 and carry.empty
+    assert trades.iloc[0]["profit"] == pytest.approx((101 - 100) * 10000)
@@ -1,78 +1,213 @@
+import argparse
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from config.config import TRADE_LOG_FILE  # 거래 기록 CSV 파일 경로 (config에 설정)
 
-def analyze_profit(csv_path=TRADE_LOG_FILE, show_chart=True):
+DUST_VOLUME = 0.0001  # 이보다 적게 남으면 포지션이 정리된 것으로 봄 (Portfolio의 최소 매도 수량과 같음)
+TRADE_COLUMNS = ["buy_time", "sell_time", "buy_price", "sell_price", "volume", "profit",
+                 "return_rate", "ticker", "strategy"]
+
+
+def pair_trades(df, carry=None):
+    """
+    매수/매도 기록을 배열 연산으로 짝지음 (티커/전략별)
+    - 거래 하나는 매수 한 행에서 시작 (Trader는 포지션이 없는 전략만 매수하므로 매수 행은 항상 새 포지션)
+    - Trader.settle은 부분 체결/부분 청산을 행마다 따로 기록하므로, 매도 수량을 누적해 매수 수량을 덮는 매도에서 거래가 끝남
+      (남은 수량이 DUST_VOLUME보다 적으면 끝난 것으로 봄, 매수 수량을 넘는 매도 수량은 무시)
+    - 매도가는 매도 행들의 수량 가중 평균, 수익은 (평균 매도가 - 매수가) x 매수 수량
+    - 포지션 없이 나온 매도는 무시하고, 끝나기 전에 다음 매수가 나온 거래(잔고 부족으로 정리된 포지션)는 버림
+    - 전략 컬럼이 없는 예전 형식 기록은 매수 volume이 KRW 금액이므로 첫 매도가 매수 전체를 정리한 것으로 봄 (기존 iterrows 규칙)
+    :param df: datetime 순으로 정렬된 거래 기록 DataFrame
+    :param carry: 이전 청크에서 넘어온 끝나지 않은 거래의 행 DataFrame (스트리밍용)
+    :return: (짝지어진 거래 DataFrame, 다음 청크로 넘길 끝나지 않은 거래의 행 DataFrame)
+    """
+    if carry is not None and len(carry):
+        df = pd.concat([carry, df], ignore_index=True)
+    key = df.groupby(["ticker", "strategy"], sort=False, observed=True).ngroup().to_numpy()
+    order = np.argsort(key, kind="stable")  # 그룹별로 모으되 그룹 안에서는 시간순 유지
+    df = df.iloc[order].reset_index(drop=True)
+    key = key[order]
+
+    n = len(df)
+    index = np.arange(n)
+    group_start = np.r_[True, key[1:] != key[:-1]] if n else np.zeros(0, dtype=bool)
+    start_index = np.maximum.accumulate(np.where(group_start, index, 0)) if n else index
+
+    is_buy = (df["action"] == "buy").to_numpy()
+    is_sell = (df["action"] == "sell").to_numpy()
+    legacy = (df["strategy"] == "").to_numpy()
+    # 각 행 시점에서 같은 그룹의 가장 최근 매수 위치 = 그 행이 속한 거래 (없으면 -1)
+    last_buy = np.maximum.accumulate(np.where(is_buy, index, -1)) if n else index
+    last_buy = np.where(last_buy >= start_index, last_buy, -1)
+
+    price = df["price"].to_numpy(dtype=np.float64)
+    volume = df["volume"].to_numpy(dtype=np.float64)
+    sell = is_sell & (last_buy >= 0)
+    bought = volume[last_buy]  # 행이 속한 거래의 매수 수량 (last_buy가 -1인 행은 쓰지 않음)
+    sold = np.where(sell, np.where(legacy, bought, volume), 0.0)
+    # 거래별 누적 매도 수량 (매수 행에서 0으로 시작 - 매수 행의 sold는 0)
+    total = np.cumsum(sold)
+    after = total - total[last_buy]
+    before = after - sold
+    target = bought - DUST_VOLUME
+    counted = sell & (before < target)  # 거래가 끝나기 전의 매도
+    closing = counted & (after >= target)
+    filled = np.where(counted, np.minimum(sold, bought - before), 0.0)
+    sold_volume = np.bincount(last_buy[counted], filled[counted], minlength=n)
+    sold_value = np.bincount(last_buy[counted], (filled * price)[counted], minlength=n)
+
+    sells = np.flatnonzero(closing)
+    buys = last_buy[sells]
+    sell_price = sold_value[buys] / sold_volume[buys]
+    when = df["datetime"].to_numpy()
+    trades = pd.DataFrame({
+        "buy_time": when[buys],
+        "sell_time": when[sells],
+        "buy_price": price[buys],
+        "sell_price": sell_price,
+        "volume": volume[buys],
+        "profit": (sell_price - price[buys]) * volume[buys],
+        "return_rate": (sell_price - price[buys]) / price[buys] * 100,
+        "ticker": df["ticker"].to_numpy(dtype=object)[buys],
+        "strategy": df["strategy"].to_numpy(dtype=object)[buys],
+    })
+
+    # 그룹별 마지막 거래가 아직 끝나지 않았으면 그 거래의 행(매수 + 지금까지의 매도)을 다음 청크로 넘김
+    group_end = np.r_[start_index[1:] != start_index[:-1], True] if n else group_start
+    open_buys = last_buy[group_end]
+    open_buys = open_buys[(open_buys >= 0) & ~np.isin(open_buys, buys)]
+    return trades, df.iloc[np.flatnonzero(np.isin(last_buy, open_buys))]
+
+
+def read_trades(csv_path=TRADE_LOG_FILE, chunksize=None):
+    """
+    거래 기록 CSV를 읽어 짝지어진 거래 DataFrame 반환
+    같은 시각(초 단위)의 행은 파일에 기록된 순서를 유지 (안정 정렬)
+    - 예전 iterrows 코드는 불안정 정렬(quicksort)이라 같은 초의 매수/매도 순서가 바뀔 수 있었음
+      → 같은 초에 매도/매수가 이어진 기록은 거래 수가 예전 결과와 다를 수 있음 (logs/trade_history.csv: 89건 → 93건)
+    :param chunksize: 지정하면 그 행 수씩 나눠 읽음 (메모리보다 큰 파일용, 파일이 시간순이어야 함)
+    """
+    options = dict(usecols=lambda c: c in ("datetime", "action", "price", "volume", "ticker", "strategy"),
+                   dtype={"action": "category", "price": np.float64, "volume": np.float64,
+                          "ticker": "category", "strategy": "category"})
+
+    def prepare(df):
+        df["datetime"] = pd.to_datetime(df["datetime"], format="%Y-%m-%d %H:%M:%S")
+        for column in ("ticker", "strategy"):
+            if column not in df:
+                df[column] = ""  # 티커/전략 컬럼이 없던 예전 형식
+            elif df[column].isna().any():
+                df[column] = df[column].cat.add_categories("").fillna("")
+        return df
+
+    if chunksize is None:
+        df = prepare(pd.read_csv(csv_path, **options))
+        if not df["datetime"].is_monotonic_increasing:
+            df = df.sort_values("datetime", kind="stable")
+        return pair_trades(df)[0]
+
+    parts = []
+    carry = None
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, **options):
+        trades, carry = pair_trades(prepare(chunk), carry)
+        parts.append(trades)
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=TRADE_COLUMNS)
+
+
+def summarize(result_df):
+    """
+    수익 분석 요약 통계
+    :param result_df: 짝지어진 거래 DataFrame
+    """
+    profit = result_df["profit"].to_numpy()
+    returns = result_df["return_rate"].to_numpy()
+    order = np.argsort(result_df["sell_time"].to_numpy(), kind="stable")
+    equity = np.cumsum(profit[order])
+    drawdown = equity - np.maximum.accumulate(np.maximum(equity, 0))
+    holding = (result_df["sell_time"] - result_df["buy_time"]).dt.total_seconds().to_numpy() / 60
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    return {
+        "총 거래 횟수": len(result_df),
+        "총 수익 (KRW)": profit.sum(),
+        "평균 수익 (KRW)": profit.mean(),
+        "승률 (%)": (profit > 0).sum() / len(result_df) * 100,
+        "최대 낙폭 (KRW)": drawdown.min(),
+        "샤프 지수 (거래당)": returns.mean() / std if std else 0.0,
+        "평균 보유 시간 (분)": holding.mean(),
+        "중앙 보유 시간 (분)": float(np.median(holding)),
+    }
+
+
+def breakdown(result_df, by):
+    """
+    그룹별 (전략/티커) 거래 수, 총 수익, 승률
+    """
+    grouped = result_df.groupby(by)["profit"]
+    return pd.DataFrame({
+        "거래 수": grouped.size(),
+        "총 수익": grouped.sum(),
+        "승률 (%)": grouped.apply(lambda p: (p > 0).mean() * 100),
+    })
+
+
+def show_charts(result_df):
+    import matplotlib.pyplot as plt  # 차트를 그릴 때만 로드
+
+    # 📊 수익률 변화 그래프
+    plt.figure(figsize=(10, 5))
+    plt.plot(result_df["sell_time"], result_df["return_rate"], marker='o', label="Return (%)")
+    plt.axhline(0, color='red', linestyle='--')
+    plt.title("📈 거래 수익 변화 그래프")
+    plt.xlabel("판매 시각")
+    plt.ylabel("수익률 (%)")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+    # 🟩🟥 손익 비율 파이 차트
+    wins = (result_df["profit"] > 0).sum()
+    losses = (result_df["profit"] <= 0).sum()
+    plt.figure(figsize=(5, 5))
+    plt.pie([wins, losses], labels=["Profit", "Loss"], autopct='%1.1f%%', colors=["green", "red"])
+    plt.title("🟩🟥 손익 비율")
+    plt.tight_layout()
+    plt.show()
+
+
+def analyze_profit(csv_path=TRADE_LOG_FILE, show_chart=True, chunksize=None):
     try:
-        # 거래 기록 CSV 파일 읽기
-        df = pd.read_csv(csv_path)
-        df["datetime"] = pd.to_datetime(df["datetime"])
-        df = df.sort_values("datetime")
-
-        trades = []
-        position = None
-
-        # 매수/매도 쌍 처리
-        for _, row in df.iterrows():
-            if row["action"] == "buy":
-                position = {
-                    "buy_price": row["price"],
-                    "volume": row["volume"],
-                    "datetime": row["datetime"]
-                }
-            elif row["action"] == "sell" and position:
-                profit = (row["price"] - position["buy_price"]) * float(position["volume"])
-                trades.append({
-                    "buy_time": position["datetime"],
-                    "sell_time": row["datetime"],
-                    "buy_price": position["buy_price"],
-                    "sell_price": row["price"],
-                    "volume": position["volume"],
-                    "profit": profit,
-                    "return_rate": (row["price"] - position["buy_price"]) / position["buy_price"] * 100
-                })
-                position = None
-
-        # 거래 결과 데이터프레임 생성
-        result_df = pd.DataFrame(trades)
+        # 거래 기록 CSV 파일 읽기 + 매수/매도 쌍 처리
+        result_df = read_trades(csv_path, chunksize)
 
         if result_df.empty:
             print("❗ 분석할 거래 기록이 없습니다.")
             return
 
-        # 📊 수익률 변화 그래프
         if show_chart:
-            plt.figure(figsize=(10, 5))
-            plt.plot(result_df["sell_time"], result_df["return_rate"], marker='o', label="Return (%)")
-            plt.axhline(0, color='red', linestyle='--')
-            plt.title("📈 거래 수익 변화 그래프")
-            plt.xlabel("판매 시각")
-            plt.ylabel("수익률 (%)")
-            plt.grid(True)
-            plt.legend()
-            plt.tight_layout()
-            plt.show()
-
-            # 🟩🟥 손익 비율 파이 차트
-            wins = (result_df["profit"] > 0).sum()
-            losses = (result_df["profit"] <= 0).sum()
-            plt.figure(figsize=(5, 5))
-            plt.pie([wins, losses], labels=["Profit", "Loss"], autopct='%1.1f%%', colors=["green", "red"])
-            plt.title("🟩🟥 손익 비율")
-            plt.tight_layout()
-            plt.show()
+            show_charts(result_df.sort_values("sell_time"))
 
         # 📊 수익 분석 요약 통계 (한글로 출력)
-        summary = {
-            "총 거래 횟수": len(result_df),
-            "총 수익 (KRW)": result_df["profit"].sum(),
-            "평균 수익 (KRW)": result_df["profit"].mean(),
-            "승률 (%)": (result_df["profit"] > 0).sum() / len(result_df) * 100
-        }
+        summary = summarize(result_df)
 
         print("\n📊 **수익 분석 요약 통계**")
         for k, v in summary.items():
-            print(f"{k}: {v:,.2f} 원" if isinstance(v, float) else f"{k}: {v} 건")
+            print(f"{k}: {v:,.2f} 원" if "KRW" in k else f"{k}: {v:,.2f}" if isinstance(v, float) else f"{k}: {v} 건")
+
+        for by, title in (("strategy", "전략별"), ("ticker", "티커별")):
+            if (result_df[by] != "").any():
+                print(f"\n📌 {title} 요약")
+                print(breakdown(result_df, by).to_string(float_format=lambda v: f"{v:,.2f}"))
+        return summary
 
     except FileNotFoundError:
         print(f"❌ 파일을 찾을 수 없습니다: {csv_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="거래 기록 수익 분석")
+    parser.add_argument("path", nargs="?", default=TRADE_LOG_FILE)
+    parser.add_argument("--chunksize", type=int, default=None, help="나눠 읽을 행 수 (대용량 파일)")
+    parser.add_argument("--no-chart", action="store_true")
+    args = parser.parse_args()
+    analyze_profit(args.path, show_chart=not args.no_chart, chunksize=args.chunksize)
@@ -1,16 +1,215 @@
 # 로그 함수
+# 호출한 스레드는 큐에 넣기만 하고, 파일/콘솔 쓰기는 백그라운드 스레드가 모아서 처리
+import atexit
 import datetime
+import json
 import os
+import queue
+import sys
+import threading
+import time
+from config.config import LOG_FILE, LOG_FORMAT, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_ROTATE_SECONDS
 
-# logs 디렉토리 없으면 생성
-if not os.path.exists("logs"):
-    os.makedirs("logs")
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
 
-def log(message):
-    time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_line = f"[{time}] {message}"
-    
-    with open("logs/trade.log", "a", encoding="utf-8") as f:
-        f.write(log_line + "\n")
+threshold = {name: value for value, name in LEVEL_NAMES.items()}.get(str(LOG_LEVEL).upper(), INFO)  # 기록할 최소 레벨
+console = True  # 콘솔 출력 여부
+json_lines = LOG_FORMAT == "json"  # True면 trade.log를 JSON Lines로 기록
 
-    print(log_line)
+
+class _Sink:
+    """
+    파일 하나에 대한 쓰기 대상 (크기/시간 기준 회전)
+    """
+
+    def __init__(self, path, max_bytes=None, backup_count=0, rotate_seconds=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_seconds = rotate_seconds
+        self.file = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8", newline="")
+        self.size = self.file.tell()
+        self.opened_at = time.time()
+
+    def _rotate(self):
+        self.file.close()
+        if self.backup_count:
+            for i in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            open(self.path, "w").close()
+        self._open()
+
+    def write(self, text):
+        if self.file is None:
+            self._open()
+        size = len(text.encode("utf-8"))
+        if self.size and ((self.max_bytes and self.size + size > self.max_bytes)
+                          or (self.rotate_seconds and time.time() - self.opened_at >= self.rotate_seconds)):
+            self._rotate()
+        self.file.write(text)
+        self.size += size
+
+    def flush(self):
+        if self.file:
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class _Writer(threading.Thread):
+    """
+    큐에 쌓인 레코드를 모아 한 번에 쓰는 백그라운드 스레드
+    """
+
+    def __init__(self, flush_interval=0.2, batch_size=1000):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = queue.SimpleQueue()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.sinks = {}
+
+    def sink(self, path, **options):
+        if path not in self.sinks:
+            self.sinks[path] = _Sink(path, **options)
+        return self.sinks[path]
+
+    def run(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:  # 기록 스레드가 죽으면 이후 로그가 모두 사라지므로 배치 하나만 버림
+                sys.stderr.write(f"[logger] 로그 기록 오류 ({len(batch)}건 버림): {e!r}\n")
+
+    def _write(self, batch):
+        lines = {}
+        waiters = []
+        out = []
+        for item in batch:
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+                continue
+            kind, payload = item
+            if kind == "log":
+                created, level, message = payload
+                stamp = datetime.datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
+                text = f"[{stamp}] {message}"
+                if console:
+                    out.append(text)
+                if json_lines:
+                    text = json.dumps({"time": stamp, "level": LEVEL_NAMES.get(level, str(level)), "message": message},
+                                      ensure_ascii=False)
+                lines.setdefault(LOG_FILE, []).append(text + "\n")
+            else:
+                lines.setdefault(kind, []).append(payload)
+        for path, chunk in lines.items():
+            try:
+                if path == LOG_FILE:
+                    sink = self.sink(path, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                                     rotate_seconds=LOG_ROTATE_SECONDS)
+                else:
+                    sink = self.sink(path)
+                sink.write("".join(chunk))
+                sink.flush()
+            except OSError as e:
+                out.append(f"[logger] 로그 기록 실패 ({path}): {e}")
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
+            sys.stdout.flush()
+        for waiter in waiters:
+            waiter.set()
+
+    def close(self):
+        for sink in self.sinks.values():
+            sink.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _Writer()
+                _writer.start()
+    return _writer
+
+
+def _reset_after_fork():
+    global _writer, _writer_lock
+    _writer = None  # fork된 자식 프로세스에는 기록 스레드가 없으므로 새로 시작
+    _writer_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def is_enabled(level):
+    """
+    level 로그가 기록되는지 여부 - 자주 호출되는 곳의 DEBUG 로그는 이 검사 뒤에서 메시지를 만듦
+    (log()에서 버려지더라도 f-string 포매팅 비용은 호출할 때 이미 치름)
+    """
+    return level >= threshold
+
+
+def log(message, level=INFO):
+    """
+    로그 기록 (비동기)
+    :param message: 메시지
+    :param level: 로그 레벨 (DEBUG/INFO/WARNING/ERROR) - threshold보다 낮으면 바로 무시
+    """
+    if level < threshold:
+        return
+    _get_writer().queue.put(("log", (time.time(), level, message)))
+
+
+def write_line(path, line):
+    """
+    임의 파일에 한 줄 추가 (비동기, 회전 없음) - 거래 기록 CSV 등에서 사용
+    """
+    _get_writer().queue.put((path, line))
+
+
+def flush(timeout=5):
+    """
+    지금까지 넣은 로그가 모두 기록될 때까지 대기
+    """
+    if _writer is None:
+        return
+    done = threading.Event()
+    _writer.queue.put(done)
+    done.wait(timeout)
+
+
+@atexit.register
+def _shutdown():
+    flush()
+    if _writer is not None:
+        _writer.close()
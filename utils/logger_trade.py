@@ -1,17 +1,32 @@
 import csv
+import io
 import os
 from datetime import datetime
+from utils.logger import write_line
 
 TRADE_LOG_FILE = "logs/trade_history.csv"
+TRADE_LOG_COLUMNS = ["datetime", "action", "price", "volume", "ticker", "strategy"]
 
 def init_trade_log():
     if not os.path.exists(TRADE_LOG_FILE):
+        os.makedirs(os.path.dirname(TRADE_LOG_FILE), exist_ok=True)
         with open(TRADE_LOG_FILE, mode="w", newline="", encoding="utf-8") as file:
             writer = csv.writer(file)
-            writer.writerow(["datetime", "action", "price", "volume"])
+            writer.writerow(TRADE_LOG_COLUMNS)
+        return
 
-def log_trade(action, price, volume):
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(TRADE_LOG_FILE, mode="a", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow([now, action, price, volume])
+    # 예전 형식(ticker/strategy 컬럼 없음) 파일이면 헤더만 새 형식으로 교체
+    with open(TRADE_LOG_FILE, mode="r", newline="", encoding="utf-8") as file:
+        header = file.readline().strip().split(",")
+        if header == TRADE_LOG_COLUMNS:
+            return
+        rest = file.read()
+    with open(TRADE_LOG_FILE, mode="w", newline="", encoding="utf-8") as file:
+        file.write(",".join(TRADE_LOG_COLUMNS) + "\n" + rest)
+
+def log_trade(action, price, volume, ticker="", strategy="", timestamp=None):
+    # timestamp: 거래 시각 (epoch 초, 모의 거래의 가상 시각 등) - 없으면 현재 시각
+    now = (datetime.fromtimestamp(timestamp) if timestamp else datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([now, action, price, volume, ticker, strategy])
+    write_line(TRADE_LOG_FILE, buffer.getvalue())  # 백그라운드 로그 스레드가 기록
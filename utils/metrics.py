@@ -0,0 +1,197 @@
+# 성능 지표 수집 (단계별 소요 시간 히스토그램, API 호출/재시도 카운터)
+# enabled가 False면 모든 함수가 바로 반환하므로 계측 코드를 남겨 둬도 부담이 거의 없음
+# Prometheus 텍스트 형식으로 로컬 HTTP(/metrics) 또는 파일로 내보냄
+import atexit
+import bisect
+import os
+import threading
+import time
+from config.config import METRICS_ENABLED, METRICS_FILE, METRICS_PORT
+from utils.logger import WARNING, log
+
+PREFIX = "upbit_bot_"
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # 초
+
+enabled = METRICS_ENABLED  # False면 기록하지 않음
+
+_lock = threading.Lock()
+_counters = {}  # (이름, 레이블 튜플) -> 값
+_histograms = {}  # (이름, 레이블 튜플) -> [버킷별 개수, 합계, 개수]
+_started = False
+
+
+def inc(name, value=1, **labels):
+    """
+    카운터 증가
+    :param name: 지표 이름 (예: "api_calls_total")
+    :param labels: 레이블 (예: api="get_ohlcv")
+    """
+    if not enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """
+    히스토그램에 값 하나 기록
+    :param name: 지표 이름 (예: "stage_seconds")
+    :param value: 값 (초)
+    """
+    if not enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    index = bisect.bisect_left(BUCKETS, value)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        histogram[0][index] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name, **labels):
+    """
+    with 블록 소요 시간을 히스토그램에 기록
+    예: with metrics.timer("stage_seconds", stage="fetch"): ...
+    """
+    if not enabled:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render():
+    """
+    Prometheus 텍스트 형식 문자열
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: [list(h[0]), h[1], h[2]] for key, h in _histograms.items()}
+
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {PREFIX}{name} counter")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), buckets):
+                cumulative += n
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """수집한 값 모두 삭제"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def dump(path):
+    """
+    현재 지표를 파일로 저장 (임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 반쯤 쓴 파일을 보지 않음)
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(path + ".tmp", path)
+
+
+def serve(port=METRICS_PORT, host="127.0.0.1"):
+    """
+    /metrics HTTP 엔드포인트를 백그라운드 스레드로 실행
+    :return: ThreadingHTTPServer
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # 엔드포인트를 켤 때만 로드
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # 요청마다 콘솔 출력하지 않음
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start(port=METRICS_PORT, path=METRICS_FILE, interval=15):
+    """
+    실행 진입점에서 한 번 호출: enabled일 때만 HTTP 엔드포인트와 주기적 파일 저장 시작
+    :param port: HTTP 포트 (None이면 엔드포인트 없음)
+    :param path: 지표 파일 경로 (None이면 저장 안 함)
+    :param interval: 파일 저장 주기(초)
+    """
+    global _started
+    if not enabled or _started:
+        return
+    _started = True
+    if port:
+        try:
+            serve(port)
+        except OSError as e:
+            log(f"⚠️ 지표 엔드포인트 시작 실패 (포트 {port}): {e}", WARNING)
+    if path:
+        def loop():
+            while True:
+                time.sleep(interval)
+                dump(path)
+        threading.Thread(target=loop, name="metrics-dump", daemon=True).start()
+        atexit.register(dump, path)